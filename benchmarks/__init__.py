@@ -0,0 +1,4 @@
+"""Benchmarks du package clients.
+
+Chaque module s'exécute avec ``python -m benchmarks.<module>`` depuis la racine du projet.
+"""
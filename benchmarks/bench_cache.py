@@ -0,0 +1,81 @@
+"""Benchmark du cache de l'étape data (voir :class:`~clients.cache.FragmentCache`):
+ré-ingestion quotidienne de fichiers pubmed découpés en fragments, dont un seul est nouveau.
+
+Usage:
+
+|  python -m benchmarks.bench_cache --shards 20 --rows 50000
+"""
+
+import argparse
+import filecmp
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from benchmarks.bench_ingestion import write_raw_files
+from clients.tasks import read_and_format_data
+
+
+def write_shards(directory: str, n_shards: int, n_rows: int) -> str:
+    """Ecrit des fichiers bruts synthétiques et découpe le fichier pubmed en fragments
+
+    Args:
+        directory (str): répertoire des fichiers
+        n_shards (int): nombre de fragments pubmed
+        n_rows (int): nombre de lignes par fragment
+
+    Returns:
+        str: répertoire des fragments
+    """
+    write_raw_files(directory, n_shards * n_rows)
+    shards_directory = os.path.join(directory, 'pubmed')
+    os.mkdir(shards_directory)
+    with open(os.path.join(directory, 'pubmed.csv')) as f:
+        header = f.readline()
+        lines = f.readlines()
+    rng = random.Random(0)
+    rng.shuffle(lines)
+    for shard in range(n_shards):
+        with open(os.path.join(shards_directory, f'pubmed_{shard:04d}.csv'), 'w') as f:
+            f.write(header)
+            f.writelines(lines[shard * n_rows:(shard + 1) * n_rows])
+    return shards_directory
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--shards', type=int, default=20)
+    parser.add_argument('--rows', type=int, default=50000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        shards_directory = write_shards(tmp_dir, args.shards + 1, args.rows)
+        # the last shard is the new file of the day
+        new_shard = os.path.join(tmp_dir, 'new_shard.csv')
+        shutil.move(os.path.join(shards_directory, f'pubmed_{args.shards:04d}.csv'), new_shard)
+        cache_directory = os.path.join(tmp_dir, 'cache')
+
+        print(f"{'shards':>8} {'rows':>10} {'run':>22} {'time (s)':>10}")
+        outputs = {}
+        for run, no_cache in [('previous day, no cache', True), ('previous day, cold', False),
+                              ('new shard, no cache', True), ('new shard, warm cache', False)]:
+            if run.startswith('new shard') and os.path.exists(new_shard):
+                shutil.move(new_shard, shards_directory)
+            outputs[run] = os.path.join(tmp_dir, run.replace(' ', '_').replace(',', ''))
+            os.mkdir(outputs[run])
+            start = time.perf_counter()
+            read_and_format_data([shards_directory], os.path.join(tmp_dir, 'clinical_trials.csv'),
+                                 os.path.join(tmp_dir, 'drugs.csv'), outputs[run],
+                                 cache_directory=cache_directory, no_cache=no_cache)
+            timing = time.perf_counter() - start
+            n_shards = len(os.listdir(shards_directory))
+            print(f"{n_shards:>8} {n_shards * args.rows:>10} {run:>22} {timing:>10.2f}")
+        for name in ['pubmeds.json', 'clinical_trials.json', 'journals.json', 'drugs.json']:
+            assert filecmp.cmp(os.path.join(outputs['new shard, no cache'], name),
+                               os.path.join(outputs['new shard, warm cache'], name), shallow=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark du nettoyage des colonnes de chaine de caractère: enchainement historique ``.str``
+(:func:`~clients.data._clean_str_col`) contre :class:`~clients.cleaning.TextCleaner` (avec et sans Arrow).
+
+Usage:
+
+|  python -m benchmarks.bench_cleaning --rows 10000 100000
+"""
+
+import argparse
+import random
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.utils import make_drugs_and_titles, random_word, timeit
+from clients.cleaning import TextCleaner, pyarrow
+
+STR_COLS = ['id', 'title', 'journal']
+
+
+def historical_clean(col: pd.Series) -> pd.Series:
+    """Implémentation historique de :func:`~clients.data._clean_str_col`"""
+    return col.str.lower()\
+        .str.strip()\
+        .str.replace(r'\\x\w{2}', '', regex=True)\
+        .replace(r'^\s*$', np.NaN, regex=True)
+
+
+def make_raw_df(n_rows: int) -> pd.DataFrame:
+    """Tableau de données brut synthétique: majuscules, espaces, caractères échappés et valeurs vides"""
+    rng = random.Random(0)
+    _, titles = make_drugs_and_titles(100, 10000)
+    journals = [random_word(rng, 10, 40).capitalize() for _ in range(500)]
+    return pd.DataFrame({
+        'id': [str(i) if rng.random() > 0.01 else np.NaN for i in range(n_rows)],
+        'title': [f" {rng.choice(titles).title()}\\xc3\\xb1 " if rng.random() > 0.01 else "  " for _ in range(n_rows)],
+        'journal': [rng.choice(journals) for _ in range(n_rows)]
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    engines = {
+        'historical': lambda df: df[STR_COLS].apply(historical_clean),
+        'columns': lambda df: TextCleaner().clean_columns(df[STR_COLS].copy(), STR_COLS),
+    }
+    if pyarrow is not None:
+        engines['arrow'] = lambda df: TextCleaner(use_arrow=True).clean_columns(df[STR_COLS].copy(), STR_COLS)
+
+    print(f"{'rows':>10} {'engine':>10} {'time (s)':>10} {'rows/s':>12} {'same output':>12}")
+    for n_rows in args.rows:
+        df = make_raw_df(n_rows)
+        expected = engines['historical'](df)
+        for name, engine in engines.items():
+            same = engine(df).to_json(orient='records') == expected.to_json(orient='records')
+            timing = timeit(lambda: engine(df), args.repeat)
+            print(f"{n_rows:>10} {name:>10} {timing:>10.3f} {n_rows / timing:>12.0f} {str(same):>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Benchmark de bout en bout des fichiers compressés (voir :mod:`~clients.compression`):
+étapes data (par morceaux), build_graph et mentions avec des fichiers non compressés, gzip et zstd
+(fichiers bruts, données intermédiaires et graph). Chaque mode est exécuté dans un nouveau processus
+pour mesurer son pic de mémoire (RSS).
+
+Le volume lu et écrit est aussi converti en temps de transfert pour un stockage réseau
+de débit `--bandwidth` Mo/s, le goulot d'étranglement visé par la compression.
+
+Usage:
+
+|  python -m benchmarks.bench_compression --rows 100000 --bandwidth 100
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+from benchmarks.bench_ingestion import write_raw_files
+from clients.compression import COMPRESSION_EXTENSIONS, open_file
+
+
+def compress_raw_files(directory: str, compression: Optional[str]) -> Dict[str, str]:
+    """Copie compressée des fichiers bruts
+
+    Args:
+        directory (str): répertoire des fichiers bruts
+        compression (Optional[str]): gzip, zstd ou None
+
+    Returns:
+        Dict[str, str]: chemins des fichiers bruts par nom
+    """
+    raw_files = {}
+    for name in ['pubmed.csv', 'clinical_trials.csv', 'drugs.csv']:
+        raw_files[name] = os.path.join(directory, name)
+        if compression is not None:
+            raw_files[name] += COMPRESSION_EXTENSIONS[compression]
+            with open(os.path.join(directory, name), 'rb') as f_in, open_file(raw_files[name], 'wb') as f_out:
+                for block in iter(lambda: f_in.read(1 << 20), b''):
+                    f_out.write(block)
+    return raw_files
+
+
+def directory_size(directory: str) -> int:
+    """Taille en octets des fichiers d'un répertoire"""
+    return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+
+
+def graph_filename(output_directory: str, compression: Optional[str]) -> str:
+    """Chemin du graph, avec l'extension de la compression"""
+    return os.path.join(output_directory, 'graph.json' + (COMPRESSION_EXTENSIONS[compression] if compression else ''))
+
+
+def run(raw_files: Dict[str, str], output_directory: str, compression: Optional[str],
+        chunk_size: int, drug_name: str) -> Tuple[Dict[str, float], int]:
+    """Exécute les étapes data, build_graph et mentions et retourne leur durée et le pic de mémoire du processus
+
+    Returns:
+        Tuple[Dict[str, float], int]: durées en secondes par étape, pic de mémoire en Mo
+    """
+    from clients.tasks import export_graph, read_and_format_data
+    from clients.graph import Graph
+
+    timings = {}
+    start = time.perf_counter()
+    read_and_format_data([raw_files['pubmed.csv']], raw_files['clinical_trials.csv'], raw_files['drugs.csv'],
+                         output_directory, chunk_size=chunk_size, no_cache=True, compression=compression)
+    timings['data'] = time.perf_counter() - start
+    graph_file = graph_filename(output_directory, compression)
+    start = time.perf_counter()
+    export_graph(output_directory, graph_file)
+    timings['build_graph'] = time.perf_counter() - start
+    start = time.perf_counter()
+    Graph.from_json(graph_file).get_drugs_mentions([drug_name], verbose=False)
+    timings['mentions'] = time.perf_counter() - start
+    return timings, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000])
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--bandwidth', type=float, default=100, help="débit du stockage réseau en Mo/s")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'mode':>6} {'data':>7} {'graph':>7} {'mentions':>9} {'total (s)':>10} "
+          f"{'raw (MB)':>9} {'outputs (MB)':>13} {'I/O (MB)':>9} {'network (s)':>12} {'peak RSS (MB)':>14}")
+    for n_rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            write_raw_files(tmp_dir, n_rows)
+            with open(os.path.join(tmp_dir, 'drugs.csv')) as f:
+                drug_name = f.readlines()[1].split(',')[1].strip().lower()
+            for compression in [None, 'gzip', 'zstd']:
+                mode = compression or 'none'
+                raw_files = compress_raw_files(tmp_dir, compression)
+                output_directory = os.path.join(tmp_dir, mode)
+                os.mkdir(output_directory)
+                with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+                    timings, peak_rss = executor.submit(run, raw_files, output_directory, compression,
+                                                        args.chunk_size, drug_name).result()
+                raw_size = sum(os.path.getsize(filename) for filename in raw_files.values()) / 1e6
+                outputs_size = directory_size(output_directory) / 1e6
+                graph_size = os.path.getsize(graph_filename(output_directory, compression)) / 1e6
+                # raw files read, outputs written, intermediate files and graph read again
+                io_size = raw_size + 2 * outputs_size + graph_size
+                total = sum(timings.values())
+                print(f"{n_rows:>8} {mode:>6} {timings['data']:>7.2f} {timings['build_graph']:>7.2f} "
+                      f"{timings['mentions']:>9.2f} {total:>10.2f} {raw_size:>9.1f} {outputs_size:>13.1f} "
+                      f"{io_size:>9.1f} {total + io_size / args.bandwidth:>12.2f} {peak_rss:>14}")
+
+
+if __name__ == "__main__":
+    main()
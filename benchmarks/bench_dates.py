@@ -0,0 +1,72 @@
+"""Benchmark de la lecture des dates (voir :func:`~clients.dates.normalize_dates` et
+:func:`~clients.dates.parse_epochs`): ``parse_dates`` de ``pd.read_csv`` contre une lecture au format texte
+suivie d'une conversion par date distincte, et conversion en timestamps epoch date par date
+contre conversion vectorisée.
+
+Usage:
+
+|  python -m benchmarks.bench_dates --rows 100000 1000000
+"""
+
+import argparse
+import io
+import random
+
+import pandas as pd
+
+from benchmarks.utils import timeit
+from clients.dates import normalize_dates, parse_epochs
+
+
+def make_dates_csv(n_rows: int) -> str:
+    """Génère un csv d'une colonne de dates aux formats des fichiers bruts
+
+    Args:
+        n_rows (int): nombre de lignes
+
+    Returns:
+        str: contenu du csv
+    """
+    rng = random.Random(0)
+    days = pd.date_range('2015-01-01', '2020-12-31', freq='D')
+    formats = ['%m/%d/%Y', '%d %B %Y', '%Y-%m-%d']
+    values = [day.strftime(date_format) for day in days for date_format in formats]
+    return 'date\n' + '\n'.join(rng.choice(values) for _ in range(n_rows)) + '\n'
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'step':>8} {'mode':>12} {'time (s)':>10}")
+    for n_rows in args.rows:
+        content = make_dates_csv(n_rows)
+
+        def parse_dates():
+            return pd.read_csv(io.StringIO(content), parse_dates=['date'])['date']
+
+        def normalize():
+            return normalize_dates(pd.read_csv(io.StringIO(content), dtype={'date': str})['date'])
+
+        pd.testing.assert_series_equal(parse_dates(), normalize())
+        print(f"{n_rows:>8} {'read':>8} {'parse_dates':>12} {timeit(parse_dates, repeat=1):>10.2f}")
+        print(f"{n_rows:>8} {'read':>8} {'normalize':>12} {timeit(normalize):>10.2f}")
+
+        iso_dates = normalize().dt.strftime('%Y-%m-%dT%H:%M:%S.000Z').tolist()
+
+        def per_value():
+            # previous conversion of ColumnarGraph.from_graph, cached by distinct value
+            epochs = {}
+            for date in iso_dates:
+                if date not in epochs:
+                    epochs[date] = pd.to_datetime(date, utc=True).value
+            return [epochs[date] for date in iso_dates]
+
+        assert per_value() == parse_epochs(iso_dates).tolist()
+        print(f"{n_rows:>8} {'epochs':>8} {'per value':>12} {timeit(per_value):>10.2f}")
+        print(f"{n_rows:>8} {'epochs':>8} {'vectorized':>12} {timeit(lambda: parse_epochs(iso_dates)):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Benchmark des requêtes de mentions d'un lot de molécules (voir :func:`~clients.graph.Graph.look_for_drugs_mentions`):
+recherche historique (parcours des noeuds et test ``name in names`` sur une liste, puis recherche des liaisons
+molécule par molécule) contre l'index des noms et la collecte des liaisons en un passage.
+
+Usage:
+
+|  python -m benchmarks.bench_drug_lookup --drugs 5000 --titles 100000 --requested 10 1000 5000
+"""
+
+from typing import Dict, List
+import argparse
+import random
+
+from benchmarks.utils import make_graph, timeit
+from clients.graph import Graph, Link, MentionnedLink, Node
+
+
+def historical_mentions(g: Graph, drug_names: List[str]) -> Dict[str, List[MentionnedLink]]:
+    """Implémentation historique de :func:`~clients.graph.Graph.get_drugs_mentions` (verbose=False)"""
+    drug_mentions = {}
+    drug_nodes = [drug for drug in g.nodes if drug.type == Node.DRUG_NODE and drug.name in drug_names]
+    for drug_node in drug_nodes:
+        drug_mentions.update({drug_node.name: g.look_for_links_by_nodes([drug_node], Link.MENTIONNED_LINK)})
+    return drug_mentions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--drugs', type=int, default=5000)
+    parser.add_argument('--titles', type=int, default=100000)
+    parser.add_argument('--journals', type=int, default=500)
+    parser.add_argument('--requested', type=int, nargs='+', default=[10, 1000, 5000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    g = make_graph(args.drugs, args.titles, args.journals)
+    drug_names = [node.name for node in g.nodes if node.type == Node.DRUG_NODE]
+    rng = random.Random(0)
+    print(f"{len(g.nodes)} noeuds, {len(g.links)} liaisons")
+    print(f"{'requested':>10} {'mentions':>9} {'historical (s)':>15} {'batch (s)':>10} {'speedup':>8}")
+    for n_requested in args.requested:
+        requested = rng.sample(drug_names, min(n_requested, len(drug_names)))
+        expected = historical_mentions(g, requested)
+        assert g.look_for_drugs_mentions(requested) == expected
+        n_mentions = sum(len(links) for links in expected.values())
+
+        historical = timeit(lambda: historical_mentions(g, requested), args.repeat)
+        batch = timeit(lambda: g.look_for_drugs_mentions(requested), args.repeat)
+        print(f"{len(requested):>10} {n_mentions:>9} {historical:>15.4f} {batch:>10.4f} {historical / batch:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
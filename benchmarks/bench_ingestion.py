@@ -0,0 +1,83 @@
+"""Benchmark de l'étape data: lecture en mémoire contre lecture par morceaux
+(voir :func:`~clients.data.export_formatted_data_by_chunks`).
+Chaque mode est exécuté dans un nouveau processus pour mesurer son pic de mémoire (RSS).
+
+Usage:
+
+|  python -m benchmarks.bench_ingestion --rows 100000 1000000
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+import argparse
+import filecmp
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+import time
+
+from benchmarks.utils import make_drugs_and_titles, random_word
+
+
+def write_raw_files(directory: str, n_rows: int) -> None:
+    """Ecrit des fichiers bruts synthétiques (pubmed.csv, clinical_trials.csv, drugs.csv)
+
+    Args:
+        directory (str): répertoire des fichiers
+        n_rows (int): nombre de lignes des fichiers pubmed et essais cliniques
+    """
+    rng = random.Random(0)
+    drugs, titles = make_drugs_and_titles(100, n_rows // 2)
+    journals = [random_word(rng, 10, 40).capitalize() for _ in range(500)]
+    with open(os.path.join(directory, 'drugs.csv'), 'w') as f:
+        f.write('atccode,drug\n')
+        f.writelines(f'A{i},{name.upper()}\n' for i, name in enumerate(drugs))
+    with open(os.path.join(directory, 'pubmed.csv'), 'w') as f:
+        f.write('id,title,date,journal\n')
+        f.writelines(f'{i},{rng.choice(titles).capitalize()},{rng.randint(1, 12):02d}/01/2020,{rng.choice(journals)}\n'
+                     for i in range(n_rows))
+    with open(os.path.join(directory, 'clinical_trials.csv'), 'w') as f:
+        f.write('id,scientific_title,date,journal\n')
+        f.writelines(f'NCT{i},{rng.choice(titles).title()},{rng.randint(1, 28)} January 2020,{rng.choice(journals)}\n'
+                     for i in range(n_rows))
+
+
+def run(input_directory: str, output_directory: str, chunk_size: Optional[int]) -> Tuple[float, int]:
+    """Exécute l'étape data et retourne sa durée et le pic de mémoire du processus
+
+    Returns:
+        Tuple[float, int]: durée en secondes, pic de mémoire en Mo
+    """
+    from clients.tasks import read_and_format_data
+
+    start = time.perf_counter()
+    read_and_format_data([os.path.join(input_directory, 'pubmed.csv')], os.path.join(input_directory, 'clinical_trials.csv'),
+                         os.path.join(input_directory, 'drugs.csv'), output_directory, chunk_size=chunk_size)
+    return time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'mode':>10} {'time (s)':>10} {'peak RSS (MB)':>14}")
+    for n_rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            write_raw_files(tmp_dir, n_rows)
+            outputs = {}
+            for mode, chunk_size in [('memory', None), ('chunks', args.chunk_size)]:
+                outputs[mode] = os.path.join(tmp_dir, mode)
+                os.mkdir(outputs[mode])
+                with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+                    timing, peak_rss = executor.submit(run, tmp_dir, outputs[mode], chunk_size).result()
+                print(f"{n_rows:>10} {mode:>10} {timing:>10.2f} {peak_rss:>14}")
+            for name in ['pubmeds.json', 'clinical_trials.json', 'journals.json', 'drugs.json']:
+                assert filecmp.cmp(os.path.join(outputs['memory'], name), os.path.join(outputs['chunks'], name), shallow=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark de la requête ``clients query`` (voir :func:`~clients.tasks.export_journals_with_distinct_mention`):
+calcul historique à partir des liaisons (``dataclasses.asdict``, ``pd.json_normalize`` puis regroupement)
+contre l'agrégat des molécules par journal tenu à jour par le graph et exporté avec lui.
+
+Usage:
+
+|  python -m benchmarks.bench_journals --titles 100000 --journals 500
+"""
+
+import argparse
+import dataclasses
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.utils import make_graph, timeit
+from clients.graph import Graph, Link, MentionnedLink
+from clients.server import journals_distinct_mentions
+from clients.tasks import _default_journals_file, _write_journals_aggregate, export_journals_with_distinct_mention
+
+
+def historical_journals(g: Graph) -> pd.Series:
+    """Implémentation historique de :func:`~clients.tasks.export_journals_with_distinct_mention`"""
+    journal_mention_links = [dataclasses.asdict(link) for link in g.look_for_links_by_type(Link.MENTIONNED_LINK)
+                             if link.mention_type == MentionnedLink.MENTION_JOURNAL]
+    journal_links_df = pd.DataFrame.from_dict(pd.json_normalize(journal_mention_links, sep="_"))
+    return journal_links_df.groupby(['node_b_name', 'node_b_id']).node_a_name.nunique().sort_values(ascending=False)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--drugs', type=int, default=1000)
+    parser.add_argument('--titles', type=int, default=100000)
+    parser.add_argument('--journals', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    g = make_graph(args.drugs, args.titles, args.journals)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        graph_file = os.path.join(tmp_dir, 'graph.json')
+        g.to_json(graph_file)
+        start = time.perf_counter()
+        _write_journals_aggregate(_default_journals_file(graph_file), g, graph_file)
+        write_time = time.perf_counter() - start
+
+        expected = historical_journals(g)
+        pd.testing.assert_series_equal(journals_distinct_mentions(g), expected)
+        pd.testing.assert_series_equal(export_journals_with_distinct_mention(graph_file), expected)
+        n_links = len(g.look_for_links_by_type(Link.MENTIONNED_LINK))
+        print(f"{len(expected)} journaux, {n_links} liaisons de mention, "
+              f"écriture de l'agrégat {write_time * 1e3:.1f} ms")
+
+        print(f"{'step':>22} {'historical (s)':>15} {'aggregate (s)':>14} {'speedup':>8}")
+        historical = timeit(lambda: historical_journals(g), args.repeat)
+        aggregate = timeit(lambda: journals_distinct_mentions(g), args.repeat)
+        print(f"{'graph in memory':>22} {historical:>15.4f} {aggregate:>14.4f} {historical / aggregate:>7.1f}x")
+        historical = timeit(lambda: historical_journals(Graph.from_json(graph_file)), args.repeat)
+        aggregate = timeit(lambda: export_journals_with_distinct_mention(graph_file), args.repeat)
+        print(f"{'clients query':>22} {historical:>15.4f} {aggregate:>14.4f} {historical / aggregate:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Benchmark de la lecture des fichiers pubmed json: lecture complète nettoyée par expressions régulières
+(implémentation historique) contre lecture incrémentale :func:`~clients.json_records.iter_json_records`.
+Chaque mode est exécuté dans un nouveau processus pour mesurer son pic de mémoire (RSS).
+
+Usage:
+
+|  python -m benchmarks.bench_json_reader --records 200000
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import re
+import resource
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.utils import make_drugs_and_titles, random_word
+
+DTYPES = {'id': str, 'title': str, 'journal': str}
+
+
+def write_pubmed_json(filename: str, n_records: int) -> None:
+    """Ecrit un fichier pubmed json synthétique, indenté et avec des virgules en fin de liste
+
+    Args:
+        filename (str): chemin du fichier
+        n_records (int): nombre d'enregistrements
+    """
+    rng = random.Random(0)
+    _, titles = make_drugs_and_titles(100, 10000)
+    journals = [random_word(rng, 10, 40) for _ in range(500)]
+    with open(filename, 'w') as f:
+        f.write('[\n')
+        for i in range(n_records):
+            record = {"id": i, "title": rng.choice(titles), "date": f"{rng.randint(1, 12):02d}/01/2020",
+                      "journal": rng.choice(journals)}
+            f.write(json.dumps(record, indent=2) + ',\n')
+        f.write(']\n')
+
+
+def read_whole_file(filename: str, batch_size: Optional[int]) -> int:
+    """Implémentation historique: lecture complète, suppression des virgules par expressions régulières"""
+    with open(filename, "r") as f:
+        content = f.read()
+    content = re.sub(r",[ \t\r\n]+}", "}", content)
+    content = re.sub(r",[ \t\r\n]+\]", "]", content)
+    return len(pd.read_json(content, dtype=DTYPES, convert_dates='date'))
+
+
+def read_by_batches(filename: str, batch_size: Optional[int]) -> int:
+    """Lecture incrémentale, un tableau de données par lot construit directement à partir des enregistrements
+    (voir :func:`~clients.data._read_pubmed_chunks`)"""
+    from clients.data import _read_pubmed_chunks
+
+    return sum(len(chunk) for chunk in _read_pubmed_chunks(filename, chunk_size=batch_size))
+
+
+def read_records_only(filename: str, batch_size: Optional[int]) -> int:
+    """Lecture incrémentale des enregistrements seulement"""
+    from clients.json_records import iter_json_records
+
+    return sum(len(records) for records in iter_json_records(filename, batch_size=batch_size))
+
+
+def run(mode: str, filename: str, batch_size: Optional[int]) -> Tuple[int, float, int]:
+    """Exécute un mode de lecture et retourne le nombre d'enregistrements, la durée et le pic de mémoire
+
+    Returns:
+        Tuple[int, float, int]: enregistrements, durée en secondes, pic de mémoire en Mo
+    """
+    start = time.perf_counter()
+    n_records = MODES[mode](filename, batch_size)
+    return n_records, time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+
+
+MODES = {'whole file': read_whole_file, 'batches': read_by_batches, 'records only': read_records_only}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, nargs='+', default=[200000])
+    parser.add_argument('--batch-size', type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'records':>10} {'size (MB)':>10} {'mode':>14} {'time (s)':>10} {'MB/s':>8} {'peak RSS (MB)':>14}")
+    for n_records in args.records:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, 'pubmed.json')
+            write_pubmed_json(filename, n_records)
+            size = os.path.getsize(filename) / 2 ** 20
+            for mode in MODES:
+                with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+                    count, timing, peak_rss = executor.submit(run, mode, filename, args.batch_size).result()
+                assert count == n_records
+                print(f"{n_records:>10} {size:>10.1f} {mode:>14} {timing:>10.2f} {size / timing:>8.1f} {peak_rss:>14}")
+
+
+if __name__ == "__main__":
+    main()
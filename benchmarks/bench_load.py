@@ -0,0 +1,61 @@
+"""Benchmark du chargement d'un graph depuis son fichier json: chargement historique
+par ``dacite.from_dict`` contre :class:`~clients.graph.GraphDecoder`, pour les formats
+version 1 et 2, avec le module json standard ou ``orjson`` s'il est installé.
+
+Usage:
+
+|  python -m benchmarks.bench_load
+"""
+
+import argparse
+import json
+import os
+import tempfile
+from unittest import mock
+
+from benchmarks.utils import make_graph, timeit
+from clients.graph import Graph, orjson
+
+try:
+    import dacite
+except ImportError:
+    dacite = None
+
+
+def dacite_from_json(input_file: str) -> Graph:
+    """Chargement historique: json standard puis dacite.from_dict"""
+    with open(input_file, 'r') as f:
+        graph_dict = json.load(f)
+    return dacite.from_dict(Graph, graph_dict)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--drugs', type=int, default=500)
+    parser.add_argument('--titles', type=int, default=20000)
+    parser.add_argument('--journals', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    g = make_graph(args.drugs, args.titles, args.journals)
+    print(f"graph: {len(g.nodes)} noeuds, {len(g.links)} liaisons")
+    print(f"{'loader':>24} {'format':>7} {'size (MB)':>10} {'time (s)':>9}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for version in (1, 2):
+            graph_file = os.path.join(tmp_dir, f'graph_v{version}.json')
+            g.to_json(graph_file, version=version)
+            size = os.path.getsize(graph_file) / 1e6
+
+            if dacite is not None and version == 1:
+                timing = timeit(lambda: dacite_from_json(graph_file), args.repeat)
+                print(f"{'dacite':>24} {version:>7} {size:>10.1f} {timing:>9.3f}")
+            with mock.patch('clients.graph.orjson', None):
+                timing = timeit(lambda: Graph.from_json(graph_file), args.repeat)
+            print(f"{'GraphDecoder + json':>24} {version:>7} {size:>10.1f} {timing:>9.3f}")
+            if orjson is not None:
+                timing = timeit(lambda: Graph.from_json(graph_file), args.repeat)
+                print(f"{'GraphDecoder + orjson':>24} {version:>7} {size:>10.1f} {timing:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
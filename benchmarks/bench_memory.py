@@ -0,0 +1,60 @@
+"""Benchmark de l'empreinte mémoire du graph: octets par noeud et par liaison,
+pour un graph construit puis pour ce même graph rechargé depuis son fichier json.
+
+Usage:
+
+|  python -m benchmarks.bench_memory
+"""
+
+import argparse
+import gc
+import os
+import tempfile
+import tracemalloc
+
+from benchmarks.utils import make_graph
+from clients.graph import Graph
+
+
+def report(label: str, build) -> None:
+    """Construit le graph en traçant la mémoire allouée et affiche l'empreinte
+    des noeuds et des liaisons. La mémoire des liaisons est celle libérée
+    lorsque les liaisons (et leurs index) sont supprimées du graph.
+
+    Args:
+        label (str): libellé de la ligne
+        build (Callable): fonction sans argument retournant le graph
+    """
+    gc.collect()
+    tracemalloc.start()
+    g = build()
+    gc.collect()
+    total_size, _ = tracemalloc.get_traced_memory()
+    n_nodes, n_links = len(g.nodes), len(g.links)
+    g.links = []
+    g._build_links_index()
+    gc.collect()
+    nodes_size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:>8} {n_nodes:>8} {n_links:>8} {total_size / 1e6:>10.1f} "
+          f"{nodes_size / n_nodes:>10.0f} {(total_size - nodes_size) / n_links:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--drugs', type=int, default=500)
+    parser.add_argument('--titles', type=int, default=5000)
+    parser.add_argument('--journals', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'graph':>8} {'nodes':>8} {'links':>8} {'total (MB)':>10} {'B/node':>10} {'B/link':>10}")
+    report('build', lambda: make_graph(args.drugs, args.titles, args.journals))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        graph_file = os.path.join(tmp_dir, 'graph.json')
+        make_graph(args.drugs, args.titles, args.journals).to_json(graph_file)
+        report('load', lambda: Graph.from_json(graph_file))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark des requêtes de mentions filtrées par période (voir :func:`~clients.graph.Graph.look_for_drugs_mentions`):
+filtre des mentions complètes après coup, comme le font les analyses à partir de la sortie de ``clients mentions``,
+contre la recherche dichotomique dans les mentions de chaque molécule triées par date.
+
+Usage:
+
+|  python -m benchmarks.bench_mention_filters --drugs 100 --titles 100000
+"""
+
+from typing import Dict, List
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.utils import make_graph, timeit
+from clients.columnar import ColumnarGraph
+from clients.dates import is_date_only
+from clients.graph import Graph, MentionnedLink, Node
+
+
+def filter_afterwards(g: Graph, drug_names: List[str], date_from: str, date_to: str) -> Dict[str, List[MentionnedLink]]:
+    """Toutes les mentions des molécules, filtrées par date ensuite (date de fin sans heure: jusqu'à la fin du jour)"""
+    start, end = pd.Timestamp(date_from, tz='UTC'), pd.Timestamp(date_to, tz='UTC')
+    if is_date_only(date_to):
+        end += pd.Timedelta(days=1) - pd.Timedelta(1)
+    return {drug_name: [link for link in links if link.date and start <= pd.Timestamp(link.date, tz='UTC') <= end]
+            for drug_name, links in g.look_for_drugs_mentions(drug_names).items()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--drugs', type=int, default=100)
+    parser.add_argument('--titles', type=int, default=100000)
+    parser.add_argument('--journals', type=int, default=500)
+    parser.add_argument('--date-from', type=str, default='2020-03-01')
+    parser.add_argument('--date-to', type=str, default='2020-03-01')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    g = make_graph(args.drugs, args.titles, args.journals)
+    columnar_graph = ColumnarGraph.from_graph(g)
+    drug_names = [node.name for node in g.nodes if node.type == Node.DRUG_NODE]
+    filters = {'date_from': args.date_from, 'date_to': args.date_to}
+
+    expected = filter_afterwards(g, drug_names, **filters)
+    start = time.perf_counter()
+    assert g.look_for_drugs_mentions(drug_names, **filters) == expected
+    first_query = time.perf_counter() - start
+    assert columnar_graph.look_for_drugs_mentions(drug_names, **filters) == expected
+    n_all = sum(len(links) for links in g.look_for_drugs_mentions(drug_names).values())
+    n_window = sum(len(links) for links in expected.values())
+    print(f"{len(drug_names)} molécules, {n_all} mentions dont {n_window} dans la période, "
+          f"première requête (tri par date) {first_query:.3f} s")
+
+    print(f"{'graph':>10} {'afterwards (s)':>15} {'indexed (s)':>12} {'speedup':>8}")
+    afterwards = timeit(lambda: filter_afterwards(g, drug_names, **filters), args.repeat)
+    indexed = timeit(lambda: g.look_for_drugs_mentions(drug_names, **filters), args.repeat)
+    print(f"{'Graph':>10} {afterwards:>15.4f} {indexed:>12.4f} {afterwards / indexed:>7.1f}x")
+    columnar = timeit(lambda: columnar_graph.look_for_drugs_mentions(drug_names, **filters), args.repeat)
+    print(f"{'columnar':>10} {afterwards:>15.4f} {columnar:>12.4f} {afterwards / columnar:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark de la construction des mentions: boucle imbriquée historique
+contre l'automate :class:`~clients.matching.MentionMatcher`.
+
+Usage:
+
+|  python -m benchmarks.bench_mentions
+"""
+
+from typing import List
+import argparse
+
+from benchmarks.utils import make_drugs_and_titles, timeit
+from clients.graph import ClinicalTrial, Drug, Graph, MentionnedLink, Publication
+from clients.matching import ahocorasick
+
+
+def nested_loop_mentions(drug_nodes: List[Drug], nodes_with_title: List[Publication]) -> Graph:
+    """Implémentation historique de :func:`~clients.graph.Graph._build_mentions` (hors journaux)"""
+    g = Graph()
+    for d_node in drug_nodes:
+        for node_with_title in nodes_with_title:
+            if d_node.is_name_mentionned(node_with_title.title):
+                g._build_link(d_node, node_with_title, node_with_title.date, MentionnedLink)
+    return g
+
+
+def automaton_mentions(drug_nodes: List[Drug], nodes_with_title: List[Publication]) -> Graph:
+    """Construction des mentions avec l'automate (hors journaux)"""
+    g = Graph()
+    g._build_mentions(drug_nodes, nodes_with_title, [])
+    return g
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--drugs', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--titles', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"pyahocorasick: {'oui' if ahocorasick is not None else 'non'}")
+    print(f"{'drugs':>8} {'titles':>8} {'nested (s)':>12} {'automaton (s)':>14} {'speedup':>8}")
+    for n_drugs in args.drugs:
+        drugs, titles = make_drugs_and_titles(n_drugs, args.titles)
+        drug_nodes = [Drug(id=i, name=name, atccode=str(i)) for i, name in enumerate(drugs)]
+        offset = len(drug_nodes)
+        nodes_with_title = [Publication(id=offset + i, title=title, date="2020-01-01") if i % 2
+                            else ClinicalTrial(id=offset + i, title=title, date="2020-01-01")
+                            for i, title in enumerate(titles)]
+
+        expected = [link.id for link in nested_loop_mentions(drug_nodes, nodes_with_title).links]
+        assert [link.id for link in automaton_mentions(drug_nodes, nodes_with_title).links] == expected
+
+        nested = timeit(lambda: nested_loop_mentions(drug_nodes, nodes_with_title), args.repeat)
+        automaton = timeit(lambda: automaton_mentions(drug_nodes, nodes_with_title), args.repeat)
+        print(f"{len(drug_nodes):>8} {len(titles):>8} {nested:>12.4f} {automaton:>14.4f} {nested / automaton:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
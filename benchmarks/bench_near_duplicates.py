@@ -0,0 +1,87 @@
+"""Benchmark de la détection des titres quasi identiques (voir :class:`~clients.dedupe.NearDuplicateIndex`):
+index LSH contre comparaison des signatures de toutes les paires, et proportion des quasi-doublons
+injectés (ponctuation, casse, mot supprimé) retrouvés.
+
+Usage:
+
+|  python -m benchmarks.bench_near_duplicates --titles 10000 100000
+"""
+
+from typing import List, Set, Tuple
+import argparse
+import random
+import time
+
+import numpy as np
+
+from benchmarks.utils import make_drugs_and_titles
+from clients.dedupe import NearDuplicateIndex
+
+
+def make_titles(n_titles: int, duplicate_rate: float = 0.1) -> Tuple[List[str], Set[int]]:
+    """Génère des titres dont une partie sont des variantes d'un titre précédent
+
+    Args:
+        n_titles (int): nombre de titres
+        duplicate_rate (float, optional): proportion de variantes. Defaults to 0.1.
+
+    Returns:
+        Tuple[List[str], Set[int]]: titres, positions des variantes
+    """
+    rng = random.Random(0)
+    _, originals = make_drugs_and_titles(100, n_titles)
+    titles, duplicates = [], set()
+    for title in originals:
+        if titles and rng.random() < duplicate_rate:
+            words = rng.choice(titles).split(' ')
+            variant = rng.randrange(3)
+            if variant == 0:
+                title = ' '.join(words).title() + '.'
+            elif variant == 1:
+                title = ', '.join(words)
+            else:
+                del words[rng.randrange(len(words))]
+                title = ' '.join(words)
+            duplicates.add(len(titles))
+        titles.append(title)
+    return titles, duplicates
+
+
+def pairwise(index: NearDuplicateIndex, titles: List[str]) -> int:
+    """Comparaison de chaque titre avec tous les titres conservés"""
+    kept: List[np.ndarray] = []
+    n_duplicates = 0
+    for title in titles:
+        signature = index.signature(title)
+        if kept and (np.stack(kept) == signature).mean(axis=1).max() >= index.threshold:
+            n_duplicates += 1
+        else:
+            kept.append(signature)
+    return n_duplicates
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--titles', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--threshold', type=float, default=0.8)
+    parser.add_argument('--pairwise-max', type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'titles':>8} {'mode':>9} {'time (s)':>10} {'found':>7} {'injected':>9} {'recall':>7}")
+    for n_titles in args.titles:
+        titles, duplicates = make_titles(n_titles)
+        index = NearDuplicateIndex(args.threshold)
+        start = time.perf_counter()
+        found = {position for position, title in enumerate(titles) if index.add(title) is not None}
+        timing = time.perf_counter() - start
+        recall = len(found & duplicates) / len(duplicates)
+        print(f"{n_titles:>8} {'lsh':>9} {timing:>10.2f} {len(found):>7} {len(duplicates):>9} {recall:>7.3f}")
+        if n_titles <= args.pairwise_max:
+            start = time.perf_counter()
+            n_found = pairwise(NearDuplicateIndex(args.threshold), titles)
+            timing = time.perf_counter() - start
+            print(f"{n_titles:>8} {'pairwise':>9} {timing:>10.2f} {n_found:>7} {len(duplicates):>9}")
+
+
+if __name__ == "__main__":
+    main()
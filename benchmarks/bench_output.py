@@ -0,0 +1,64 @@
+"""Benchmark de l'écriture des mentions (voir :mod:`~clients.output`): affichage lisible historique
+(``get_drugs_mentions(verbose=True)``, dictionnaire complet puis ``pprint``) contre l'écriture en JSON Lines
+et en CSV d'une mention à la fois. Le pic de mémoire allouée pendant l'écriture est mesuré avec ``tracemalloc``,
+pour un nombre croissant de mentions (graph déjà chargé).
+
+Usage:
+
+|  python -m benchmarks.bench_output --drugs 50 --titles 20000 50000 100000
+"""
+
+from contextlib import redirect_stdout
+from typing import Callable, Tuple
+import argparse
+import os
+import time
+import tracemalloc
+
+from benchmarks.utils import make_graph
+from clients.graph import Node
+from clients.output import MENTION_FIELDS, mention_records, write_records
+
+
+def measure(func: Callable) -> Tuple[float, float]:
+    """Durée et pic de mémoire allouée d'une écriture vers /dev/null
+
+    Returns:
+        Tuple[float, float]: durée en secondes, pic de mémoire en Mo
+    """
+    with open(os.devnull, 'w') as f, redirect_stdout(f):
+        tracemalloc.start()
+        start = time.perf_counter()
+        func(f)
+        timing = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return timing, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--drugs', type=int, default=50)
+    parser.add_argument('--titles', type=int, nargs='+', default=[20000, 50000, 100000])
+    parser.add_argument('--journals', type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'titles':>8} {'mentions':>9} {'format':>7} {'time (s)':>9} {'peak (MB)':>10}")
+    for n_titles in args.titles:
+        g = make_graph(args.drugs, n_titles, args.journals)
+        drug_names = [node.name for node in g.nodes if node.type == Node.DRUG_NODE]
+        n_mentions = sum(1 for _ in g.iter_drugs_mentions(drug_names))
+        runs = [
+            ('pretty', lambda f: g.get_drugs_mentions(drug_names, verbose=True)),
+            ('jsonl', lambda f: write_records(mention_records(g.iter_drugs_mentions(drug_names)), 'jsonl',
+                                              MENTION_FIELDS, f)),
+            ('csv', lambda f: write_records(mention_records(g.iter_drugs_mentions(drug_names)), 'csv',
+                                            MENTION_FIELDS, f)),
+        ]
+        for output_format, func in runs:
+            timing, peak = measure(func)
+            print(f"{n_titles:>8} {n_mentions:>9} {output_format:>7} {timing:>9.2f} {peak:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
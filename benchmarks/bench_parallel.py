@@ -0,0 +1,48 @@
+"""Benchmark de la construction des mentions répartie entre plusieurs processus
+(voir :func:`~clients.matching.find_mentions`).
+
+Usage:
+
+|  python -m benchmarks.bench_parallel --workers 1 2 4 8
+"""
+
+import argparse
+import os
+
+from benchmarks.utils import make_drugs_and_titles, timeit
+from clients.graph import ClinicalTrial, Drug, Graph, Publication
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--drugs', type=int, default=1000)
+    parser.add_argument('--titles', type=int, default=200000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    drugs, titles = make_drugs_and_titles(args.drugs, args.titles)
+    drug_nodes = [Drug(id=i, name=name, atccode=str(i)) for i, name in enumerate(drugs)]
+    offset = len(drug_nodes)
+    publication_nodes = [Publication(id=offset + i, title=title, date="2020-01-01") for i, title in enumerate(titles[::2])]
+    offset += len(publication_nodes)
+    clinical_trial_nodes = [ClinicalTrial(id=offset + i, title=title, date="2020-01-01") for i, title in enumerate(titles[1::2])]
+
+    def build(workers):
+        g = Graph()
+        g._build_mentions(drug_nodes, publication_nodes, clinical_trial_nodes, workers=workers)
+        return g
+
+    expected = [link.id for link in build(1).links]
+    print(f"cpus: {os.cpu_count()}, drugs: {len(drug_nodes)}, titles: {len(titles)}, links: {len(expected)}")
+    print(f"{'workers':>8} {'time (s)':>10} {'speedup':>8}")
+    serial = None
+    for workers in args.workers:
+        assert [link.id for link in build(workers).links] == expected
+        timing = timeit(lambda: build(workers), args.repeat)
+        serial = serial or timing
+        print(f"{workers:>8} {timing:>10.3f} {serial / timing:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark du format intermédiaire entre les étapes data et build_graph: fichiers json
+(:func:`~clients.data.export_dfs_to_json`) contre fichiers parquet (:func:`~clients.data.export_dfs_to_parquet`).
+Mesure la durée d'écriture, la durée de lecture des enregistrements par build_graph
+(avec projection des colonnes pour parquet) et la taille sur disque.
+
+Usage:
+
+|  python -m benchmarks.bench_parquet --records 100000 1000000
+"""
+
+import argparse
+import functools
+import os
+import random
+import tempfile
+
+import pandas as pd
+
+from benchmarks.utils import make_drugs_and_titles, random_word, timeit
+from clients.data import export_dfs_to_json, export_dfs_to_parquet
+from clients.graph import Graph, Publication
+
+
+def make_pubmeds(n_records: int) -> pd.DataFrame:
+    """Génère un tableau de publications formatées, comme en sortie de l'étape data
+
+    Args:
+        n_records (int): nombre de publications
+
+    Returns:
+        pd.DataFrame: tableau des publications
+    """
+    rng = random.Random(0)
+    _, titles = make_drugs_and_titles(100, 10000)
+    journals = [random_word(rng, 10, 40) for _ in range(500)]
+    dates = pd.to_datetime([f"2020-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" for _ in range(366)])
+    return pd.DataFrame({
+        'base_id': [str(i) for i in range(n_records)],
+        'title': [rng.choice(titles) for _ in range(n_records)],
+        'date': [rng.choice(dates) for _ in range(n_records)],
+        'journal': [rng.choice(journals) for _ in range(n_records)]
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, nargs='+', default=[100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    formats = [('json', export_dfs_to_json), ('parquet', export_dfs_to_parquet)]
+    print(f"{'records':>10} {'format':>8} {'write (s)':>10} {'read (s)':>10} {'size (MB)':>10}")
+    for n_records in args.records:
+        df = make_pubmeds(n_records)
+        records = {}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for output_format, export_dfs in formats:
+                filename = os.path.join(tmp_dir, f"pubmeds.{output_format}")
+                write_time = timeit(lambda: export_dfs(tmp_dir, {'pubmeds': df}), args.repeat)
+                read = functools.partial(Graph()._read_records, filename, Publication)
+                read_time = timeit(read, args.repeat)
+                records[output_format] = read()
+                size = os.path.getsize(filename) / 2 ** 20
+                print(f"{n_records:>10} {output_format:>8} {write_time:>10.3f} {read_time:>10.3f} {size:>10.1f}")
+        assert records['parquet'] == records['json']
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Benchmark du serveur de requêtes (voir :mod:`~clients.server`): latence et débit des requêtes
+de mentions envoyées par des clients locaux concurrents (HTTP et socket Unix), comparés au chargement
+du graph à chaque requête comme le font ``clients mentions`` et ``clients query`` sans serveur
+(hors démarrage de l'interpréteur).
+
+Usage:
+
+|  python -m benchmarks.bench_server --titles 100000 --clients 1 4 16
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+import argparse
+import multiprocessing
+import os
+import random
+import socket
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.utils import make_graph
+from clients.graph import Graph, Node
+from clients.server import GraphClient
+from clients.tasks import serve_graph
+
+
+def free_port() -> int:
+    """Port TCP local libre"""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_server(address: str, timeout: float = 120) -> None:
+    """Attend que le serveur réponde (chargement du graph)"""
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            client = GraphClient(address)
+            client.health()
+            client.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def run_clients(address: str, drug_names: List[str], n_clients: int, n_requests: int) -> Tuple[np.ndarray, float]:
+    """Envoie `n_requests` requêtes de mentions par client, chaque client sur sa connexion
+
+    Returns:
+        Tuple[np.ndarray, float]: latences en secondes, durée totale en secondes
+    """
+    def client_requests(seed: int) -> List[float]:
+        rng = random.Random(seed)
+        client = GraphClient(address)
+        latencies = []
+        for _ in range(n_requests):
+            start = time.perf_counter()
+            client.mentions([rng.choice(drug_names)])
+            latencies.append(time.perf_counter() - start)
+        client.close()
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(n_clients) as executor:
+        latencies = [latency for result in executor.map(client_requests, range(n_clients)) for latency in result]
+    return np.array(latencies), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--drugs', type=int, default=1000)
+    parser.add_argument('--titles', type=int, default=100000)
+    parser.add_argument('--journals', type=int, default=500)
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--requests', type=int, default=200, help="requêtes par client")
+    args = parser.parse_args()
+
+    g = make_graph(args.drugs, args.titles, args.journals)
+    drug_names = [node.name for node in g.nodes if node.type == Node.DRUG_NODE]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        graph_file = os.path.join(tmp_dir, 'graph.json')
+        g.to_json(graph_file)
+        del g
+
+        print(f"{'mode':>12} {'clients':>8} {'requests':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'req/s':>9}")
+        latencies = []
+        for drug_name in drug_names[:3]:
+            start = time.perf_counter()
+            Graph.from_json(graph_file).get_drugs_mentions([drug_name], verbose=False)
+            latencies.append(time.perf_counter() - start)
+        latencies = np.array(latencies)
+        print(f"{'no server':>12} {1:>8} {len(latencies):>9} {np.median(latencies) * 1e3:>9.1f} "
+              f"{latencies.max() * 1e3:>9.1f} {1 / latencies.mean():>9.1f}")
+
+        context = multiprocessing.get_context('spawn')
+        unix_socket = os.path.join(tmp_dir, 'graph.sock')
+        port = free_port()
+        for mode, address, kwargs in [('http', f"http://127.0.0.1:{port}", {'port': port}),
+                                      ('unix socket', f"unix:{unix_socket}", {'unix_socket': unix_socket})]:
+            process = context.Process(target=serve_graph, args=(graph_file,), kwargs=kwargs, daemon=True)
+            process.start()
+            try:
+                wait_for_server(address)
+                for n_clients in args.clients:
+                    latencies, timing = run_clients(address, drug_names, n_clients, args.requests)
+                    print(f"{mode:>12} {n_clients:>8} {len(latencies):>9} {np.median(latencies) * 1e3:>9.2f} "
+                          f"{np.percentile(latencies, 99) * 1e3:>9.2f} {len(latencies) / timing:>9.0f}")
+            finally:
+                process.terminate()
+                process.join()
+
+
+if __name__ == "__main__":
+    main()
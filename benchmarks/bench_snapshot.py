@@ -0,0 +1,45 @@
+"""Benchmark du démarrage des requêtes: chargement du graph json contre ouverture
+du snapshot binaire par projection mémoire, suivi d'une requête de mentions.
+
+Usage:
+
+|  python -m benchmarks.bench_snapshot
+"""
+
+import argparse
+import os
+import tempfile
+
+from benchmarks.utils import make_graph, timeit
+from clients.columnar import ColumnarGraph
+from clients.graph import Graph
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--drugs', type=int, default=500)
+    parser.add_argument('--titles', type=int, default=20000)
+    parser.add_argument('--journals', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    g = make_graph(args.drugs, args.titles, args.journals)
+    drug_names = [node.name for node in g.nodes[:3]]
+    print(f"graph: {len(g.nodes)} noeuds, {len(g.links)} liaisons")
+    print(f"{'source':>10} {'size (MB)':>10} {'open (s)':>9} {'open + mentions (s)':>20}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        graph_file = os.path.join(tmp_dir, 'graph.json')
+        snapshot_file = os.path.join(tmp_dir, 'graph.bin')
+        g.to_json(graph_file)
+        ColumnarGraph.from_graph(g).to_snapshot(snapshot_file)
+
+        for label, path, load in [('json', graph_file, Graph.from_json),
+                                  ('snapshot', snapshot_file, ColumnarGraph.from_snapshot)]:
+            size = os.path.getsize(path) / 1e6
+            open_timing = timeit(lambda: load(path), args.repeat)
+            query_timing = timeit(lambda: load(path).get_drugs_mentions(drug_names, verbose=False), args.repeat)
+            print(f"{label:>10} {size:>10.1f} {open_timing:>9.4f} {query_timing:>20.4f}")
+
+
+if __name__ == "__main__":
+    main()
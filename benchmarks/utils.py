@@ -0,0 +1,94 @@
+"""Outils communs aux benchmarks: génération de données synthétiques et chronométrage"""
+
+from typing import Callable, List, Tuple
+import random
+import string
+import time
+
+from clients.graph import ClinicalTrial, Drug, Graph, Journal, Publication
+
+
+def random_word(rng: random.Random, min_length: int = 4, max_length: int = 12) -> str:
+    """Génère un mot aléatoire en minuscule
+
+    Args:
+        rng (random.Random): générateur aléatoire
+        min_length (int, optional): longueur minimale. Defaults to 4.
+        max_length (int, optional): longueur maximale. Defaults to 12.
+
+    Returns:
+        str: mot aléatoire
+    """
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(min_length, max_length)))
+
+
+def make_drugs_and_titles(n_drugs: int, n_titles: int, words_per_title: int = 15,
+                          mention_rate: float = 0.1, seed: int = 0) -> Tuple[List[str], List[str]]:
+    """Génère des noms de molécules et des titres dont une partie mentionne une molécule
+
+    Args:
+        n_drugs (int): nombre de molécules
+        n_titles (int): nombre de titres
+        words_per_title (int, optional): nombre de mots par titre. Defaults to 15.
+        mention_rate (float, optional): proportion de titres mentionnant une molécule. Defaults to 0.1.
+        seed (int, optional): graine aléatoire. Defaults to 0.
+
+    Returns:
+        Tuple[List[str], List[str]]: noms des molécules, titres
+    """
+    rng = random.Random(seed)
+    drugs = sorted({random_word(rng, 6, 14) for _ in range(n_drugs)})
+    titles = []
+    for _ in range(n_titles):
+        words = [random_word(rng) for _ in range(words_per_title)]
+        if rng.random() < mention_rate:
+            words[rng.randrange(words_per_title)] = rng.choice(drugs)
+        titles.append(' '.join(words))
+    return drugs, titles
+
+
+def make_graph(n_drugs: int, n_titles: int, n_journals: int) -> Graph:
+    """Construit un graph synthétique avec les méthodes de construction du graph.
+    Les noms des journaux et les dates sont copiés pour chaque enregistrement,
+    comme s'ils étaient lus depuis un fichier.
+
+    Args:
+        n_drugs (int): nombre de molécules
+        n_titles (int): nombre de publications et d'essais cliniques
+        n_journals (int): nombre de journaux
+
+    Returns:
+        Graph: graph construit
+    """
+    rng = random.Random(0)
+    drugs, titles = make_drugs_and_titles(n_drugs, n_titles, mention_rate=0.5)
+    journals = sorted({random_word(rng, 10, 40) for _ in range(n_journals)})
+    dates = [f"2020-{month:02d}-01T00:00:00.000Z" for month in range(1, 13)]
+
+    g = Graph()
+    drug_nodes = g._build_nodes_from_list([{"name": name, "atccode": f"A{i}"} for i, name in enumerate(drugs)], Drug)
+    g._build_nodes_from_list([{"name": name} for name in journals], Journal)
+    records = [{"title": title, "date": ''.join(rng.choice(dates)), "journal": ''.join(rng.choice(journals)),
+                "base_id": str(i)} for i, title in enumerate(titles)]
+    publication_nodes = g._build_nodes_from_list(records[::2], Publication)
+    clinical_trial_nodes = g._build_nodes_from_list(records[1::2], ClinicalTrial)
+    g._build_mentions(drug_nodes, publication_nodes, clinical_trial_nodes)
+    return g
+
+
+def timeit(func: Callable, repeat: int = 3) -> float:
+    """Retourne le meilleur temps d'exécution (en secondes) sur plusieurs répétitions
+
+    Args:
+        func (Callable): fonction sans argument à chronométrer
+        repeat (int, optional): nombre de répétitions. Defaults to 3.
+
+    Returns:
+        float: meilleur temps en secondes
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
@@ -0,0 +1,151 @@
+"""Module du cache des fragments nettoyés de l'étape data.
+
+Chaque fichier brut est lu et nettoyé en un fragment (une suite de tableaux de données),
+conservé dans le répertoire du cache sous une clé calculée à partir du contenu du fichier brut
+et de la configuration du nettoyage. Un fichier inchangé n'est donc ni relu ni nettoyé
+à l'exécution suivante, seuls l'assemblage et le dédoublonnage sont refaits.
+Les fragments les moins récemment utilisés sont supprimés au-delà d'une taille maximale.
+"""
+
+from typing import Callable, Iterable, Iterator, List, Optional
+import hashlib
+import json
+import logging
+import os
+import shutil
+import uuid
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_MAX_SIZE = 1 << 30
+_TMP_SUFFIX = '.tmp'
+
+
+def file_sha256(filename: str) -> str:
+    """Empreinte sha256 du contenu d'un fichier
+
+    Args:
+        filename (str): chemin du fichier
+
+    Returns:
+        str: empreinte hexadécimale
+    """
+    sha = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class FragmentCache():
+    """Cache des fragments nettoyés, adressé par le contenu des fichiers bruts.
+
+    Un fragment est un répertoire de morceaux (pickle pandas, les types des colonnes sont conservés).
+    Il est écrit dans un répertoire temporaire puis renommé une fois complet: un fragment
+    interrompu n'est jamais relu et plusieurs processus peuvent partager le cache.
+
+    Args:
+        directory (str): répertoire du cache, créé si besoin
+        max_size (int, optional): taille maximale du cache en octets, voir :func:`~FragmentCache.evict`.
+                                  Defaults to DEFAULT_CACHE_MAX_SIZE (1 Go).
+    """
+
+    def __init__(self, directory: str, max_size: int = DEFAULT_CACHE_MAX_SIZE) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, filename: str, config: dict) -> str:
+        """Clé d'un fragment: empreinte du contenu du fichier brut et de la configuration
+
+        Args:
+            filename (str): chemin du fichier brut
+            config (dict): configuration de la lecture et du nettoyage (sérialisable en json)
+
+        Returns:
+            str: clé hexadécimale
+        """
+        sha = hashlib.sha256(file_sha256(filename).encode())
+        sha.update(json.dumps({'version': CACHE_VERSION, **config}, sort_keys=True).encode())
+        return sha.hexdigest()
+
+    def fragments(self, filename: str, config: dict,
+                  build: Callable[[], Iterable[pd.DataFrame]]) -> Iterator[pd.DataFrame]:
+        """Retourne les morceaux du fragment d'un fichier brut, depuis le cache
+        ou en les construisant (et en les ajoutant au cache au fil de la lecture)
+
+        Args:
+            filename (str): chemin du fichier brut
+            config (dict): configuration de la lecture et du nettoyage
+            build (Callable[[], Iterable[pd.DataFrame]]): construction des morceaux si le fragment est absent
+
+        Yields:
+            Iterator[pd.DataFrame]: morceaux nettoyés
+        """
+        path = os.path.join(self.directory, self.key(filename, config))
+        if os.path.isdir(path):
+            logger.info(f"Cache: fragment réutilisé pour {filename}.")
+            os.utime(path)
+            for name in sorted(os.listdir(path)):
+                yield pd.read_pickle(os.path.join(path, name))
+            return
+
+        tmp_path = f"{path}.{uuid.uuid4().hex}{_TMP_SUFFIX}"
+        os.mkdir(tmp_path)
+        try:
+            for position, df in enumerate(build()):
+                df.to_pickle(os.path.join(tmp_path, f"{position:06d}.pkl"))
+                yield df
+            try:
+                os.rename(tmp_path, path)
+            except OSError:
+                # fragment written meanwhile by another process
+                pass
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def _entries(self) -> List[os.DirEntry]:
+        """Fragments complets du cache"""
+        with os.scandir(self.directory) as entries:
+            return [entry for entry in entries if entry.is_dir() and not entry.name.endswith(_TMP_SUFFIX)]
+
+    @staticmethod
+    def _entry_size(entry: os.DirEntry) -> int:
+        """Taille en octets d'un fragment"""
+        with os.scandir(entry.path) as files:
+            return sum(f.stat().st_size for f in files)
+
+    def size(self) -> int:
+        """Taille du cache en octets
+
+        Returns:
+            int: taille des fragments complets
+        """
+        return sum(self._entry_size(entry) for entry in self._entries())
+
+    def evict(self, max_size: Optional[int] = None) -> List[str]:
+        """Supprime les fragments les moins récemment utilisés jusqu'à ce que
+        la taille du cache ne dépasse plus la taille maximale
+
+        Args:
+            max_size (int, optional): taille maximale en octets. Defaults to None, celle du cache.
+
+        Returns:
+            List[str]: clés des fragments supprimés
+        """
+        max_size = self.max_size if max_size is None else max_size
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime)
+        sizes = [self._entry_size(entry) for entry in entries]
+        total = sum(sizes)
+        evicted = []
+        for entry, entry_size in zip(entries, sizes):
+            if total <= max_size:
+                break
+            shutil.rmtree(entry.path, ignore_errors=True)
+            total -= entry_size
+            evicted.append(entry.name)
+        if evicted:
+            logger.info(f"Cache: {len(evicted)} fragments supprimés, {total} octets conservés.")
+        return evicted
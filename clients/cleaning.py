@@ -0,0 +1,111 @@
+"""Module de nettoyage des colonnes de chaine de caractère.
+
+Les normalisations choisies sont enchainées en opérations ``.str`` sur la colonne entière,
+une opération par normalisation, au lieu d'un enchainement appliqué ligne par ligne.
+Les colonnes peuvent aussi être traitées sous forme de chaines Arrow (``string[pyarrow]``)
+si le package ``pyarrow`` est installé.
+"""
+
+from typing import Callable, Dict, List, Sequence
+import logging
+import re
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+_ESCAPES = re.compile(r'\\x\w{2}')
+_BLANK = re.compile(r'^\s*$')
+
+NORMALIZERS: Dict[str, Callable[[pd.Series], pd.Series]] = {
+    'lower': lambda col: col.str.lower(),
+    'strip': lambda col: col.str.strip(),
+    'escapes': lambda col: col.str.replace(_ESCAPES.pattern, '', regex=True),
+    'blank_to_nan': lambda col: col.mask(col.str.match(_BLANK.pattern, na=False))
+}
+"""Normalisations d'une colonne, dans l'ordre par défaut:
+
+* lower: minuscule
+* strip: suppression des espaces en début et fin
+* escapes: suppression des caractères échappés ``\\xNN``
+* blank_to_nan: np.NaN si vide
+"""
+
+
+class TextCleaner():
+    """Nettoyage des colonnes de chaine de caractère par une liste de normalisations
+    (voir :data:`~NORMALIZERS`).
+
+    Avec les normalisations par défaut, le résultat est identique à l'enchainement historique
+    ``col.str.lower().str.strip().str.replace(r'\\\\x\\w{2}', '', regex=True).replace(r'^\\s*$', np.NaN, regex=True)``.
+    Avec Arrow, les règles unicode d'Arrow s'appliquent (minuscule, espaces),
+    elles peuvent différer de python pour quelques caractères rares.
+
+    Args:
+        normalizers (Sequence[str], optional): normalisations à appliquer dans l'ordre. Defaults to toutes.
+        use_arrow (bool, optional): traiter les colonnes en chaines Arrow si ``pyarrow`` est installé. Defaults to False.
+
+    Raises:
+        ValueError: normalisation inconnue
+    """
+
+    def __init__(self, normalizers: Sequence[str] = tuple(NORMALIZERS), use_arrow: bool = False) -> None:
+        unknown = [name for name in normalizers if name not in NORMALIZERS]
+        if unknown:
+            raise ValueError(f"normalisation inconnue: {unknown}")
+        if use_arrow and pyarrow is None:
+            logger.warning("pyarrow n'est pas installé, les colonnes sont traitées sans Arrow.")
+            use_arrow = False
+        self.normalizers: List[str] = list(normalizers)
+        self.use_arrow = use_arrow
+        self._steps = [NORMALIZERS[name] for name in self.normalizers]
+
+    def __reduce__(self):
+        # the normalizers are lambdas, rebuild the cleaner from its arguments (process pools)
+        return (TextCleaner, (self.normalizers, self.use_arrow))
+
+    def clean(self, col: pd.Series) -> pd.Series:
+        """Nettoie une colonne de chaine de caractère. Les valeurs manquantes sont conservées,
+        les autres valeurs qui ne sont pas des chaines de caractère deviennent np.NaN (comme avec ``.str``).
+
+        Args:
+            col (pd.Series): colonne de chaine de caractère
+
+        Returns:
+            pd.Series: colonne nettoyée (dtype object, np.NaN pour les valeurs vides)
+        """
+        if not self._steps:
+            return col
+        if self.use_arrow:
+            arrow_col = col.astype('string[pyarrow]')
+            for step in self._steps:
+                arrow_col = step(arrow_col)
+            return arrow_col.astype(object).where(arrow_col.notna(), np.NaN)
+        col = col.astype(object)
+        try:
+            col.str
+        except AttributeError:
+            # no string at all, .str is not available
+            return col.where(col.isna(), np.NaN)
+        for step in self._steps:
+            col = step(col)
+        return col
+
+    def clean_columns(self, df: pd.DataFrame, cols: List[str]) -> pd.DataFrame:
+        """Nettoie les colonnes d'un tableau de données (modifié en place)
+
+        Args:
+            df (pd.DataFrame): tableau de données
+            cols (List[str]): colonnes de chaine de caractère
+
+        Returns:
+            pd.DataFrame: tableau de données
+        """
+        for col in cols:
+            df[col] = self.clean(df[col])
+        return df
@@ -4,10 +4,19 @@ import sys
 import logging.config
 import logging
 
-from clients.tasks import (export_graph,
+from clients.cache import DEFAULT_CACHE_MAX_SIZE
+from clients.cleaning import NORMALIZERS
+from clients.compression import COMPRESSIONS
+from clients.data import OUTPUT_FORMATS
+from clients.graph import GRAPH_FORMAT_VERSION, MentionnedLink
+from clients.output import RESULT_FORMATS
+from clients.server import DEFAULT_HOST, DEFAULT_POLL_INTERVAL, DEFAULT_PORT
+from clients.tasks import (convert_graph,
+                           export_graph,
                            export_journals_with_distinct_mention,
                            print_drug_mention,
-                           read_and_format_data)
+                           read_and_format_data,
+                           serve_graph)
 
 
 logger = logging.getLogger(__name__)
@@ -47,10 +56,10 @@ def main():
 
     Ce CLI renvoit comme exit code 0 si l'action est effectué, 1 sinon.
 
-    |  usage: clients [-h] {data,build_graph,mentions,query} ...
+    |  usage: clients [-h] {data,build_graph,mentions,query,serve,convert} ...
     |
     |  positional arguments:
-    |      {data,build_graph,mentions,query}
+    |      {data,build_graph,mentions,query,serve,convert}
     |
     |  optional arguments:
     |      -h, --help            show this help message and exit
@@ -66,23 +75,76 @@ def main():
     parser_data.add_argument('--clinical-trials-file', type=str, required=True)
     parser_data.add_argument('--drug-file', type=str, required=True)
     parser_data.add_argument('-o', '--output-directory', type=str, required=True)
+    parser_data.add_argument('--chunk-size', type=int)
+    parser_data.add_argument('--normalizers', type=str, nargs='*', choices=list(NORMALIZERS))
+    parser_data.add_argument('--arrow-strings', action='store_true')
+    parser_data.add_argument('-w', '--workers', type=int, default=1)
+    parser_data.add_argument('--output-format', type=str, choices=OUTPUT_FORMATS, default='json')
+    parser_data.add_argument('--cache-directory', type=str)
+    parser_data.add_argument('--cache-max-size', type=int, default=DEFAULT_CACHE_MAX_SIZE)
+    parser_data.add_argument('--no-cache', action='store_true')
+    parser_data.add_argument('--near-duplicates-threshold', type=float)
+    parser_data.add_argument('--compression', type=str, choices=COMPRESSIONS)
     parser_data.set_defaults(func=read_and_format_data)
 
     parser_build_graph = subparser.add_parser('build_graph')
     parser_build_graph.add_argument('-i', '--input-directory', type=str, required=True)
     parser_build_graph.add_argument('-g', '--json-graph-file', type=str, required=True)
+    parser_build_graph.add_argument('--format-version', type=int, choices=[1, 2], default=GRAPH_FORMAT_VERSION)
+    parser_build_graph.add_argument('-s', '--snapshot-file', type=str)
+    parser_build_graph.add_argument('--incremental', action='store_true')
+    parser_build_graph.add_argument('--manifest-file', type=str)
+    parser_build_graph.add_argument('-w', '--workers', type=int, default=1)
+    parser_build_graph.add_argument('--input-format', type=str, choices=OUTPUT_FORMATS, default='json')
+    parser_build_graph.add_argument('--compression', type=str, choices=COMPRESSIONS)
+    parser_build_graph.add_argument('--journals-file', type=str)
     parser_build_graph.set_defaults(func=export_graph)
 
     parser_mentions = subparser.add_parser('mentions')
-    parser_mentions.add_argument('-g', '--json-graph-file', type=str, required=True)
-    parser_mentions.add_argument('-d', '--drug-names', type=str, required=True, nargs='+')
+    parser_mentions_graph = parser_mentions.add_mutually_exclusive_group(required=True)
+    parser_mentions_graph.add_argument('-g', '--json-graph-file', type=str)
+    parser_mentions_graph.add_argument('-s', '--snapshot-file', type=str)
+    parser_mentions_graph.add_argument('--server', type=str)
+    parser_mentions.add_argument('-d', '--drug-names', type=str, nargs='+')
+    parser_mentions.add_argument('--drug-names-file', type=str)
+    parser_mentions.add_argument('--date-from', type=str)
+    parser_mentions.add_argument('--date-to', type=str)
+    parser_mentions.add_argument('--mention-type', type=str, choices=list(MentionnedLink.MENTION_TYPES))
+    parser_mentions.add_argument('--journal', type=str)
+    parser_mentions.add_argument('--output-format', type=str, choices=RESULT_FORMATS, default='pretty')
+    parser_mentions.add_argument('-o', '--output-file', type=str)
     parser_mentions.set_defaults(func=print_drug_mention)
 
     parser_query = subparser.add_parser('query')
-    parser_query.add_argument('-g', '--json-graph-file', type=str, required=True)
+    parser_query_graph = parser_query.add_mutually_exclusive_group(required=True)
+    parser_query_graph.add_argument('-g', '--json-graph-file', type=str)
+    parser_query_graph.add_argument('-s', '--snapshot-file', type=str)
+    parser_query_graph.add_argument('--server', type=str)
+    parser_query.add_argument('--journals-file', type=str)
+    parser_query.add_argument('--output-format', type=str, choices=RESULT_FORMATS, default='pretty')
+    parser_query.add_argument('-o', '--output-file', type=str)
     parser_query.set_defaults(func=export_journals_with_distinct_mention)
 
+    parser_serve = subparser.add_parser('serve')
+    parser_serve_graph = parser_serve.add_mutually_exclusive_group(required=True)
+    parser_serve_graph.add_argument('-g', '--json-graph-file', type=str)
+    parser_serve_graph.add_argument('-s', '--snapshot-file', type=str)
+    parser_serve.add_argument('--host', type=str, default=DEFAULT_HOST)
+    parser_serve.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser_serve.add_argument('--unix-socket', type=str)
+    parser_serve.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL)
+    parser_serve.set_defaults(func=serve_graph)
+
+    parser_convert = subparser.add_parser('convert')
+    parser_convert.add_argument('-g', '--json-graph-file', type=str, required=True)
+    parser_convert.add_argument('-o', '--output-file', type=str, required=True)
+    parser_convert.add_argument('--format-version', type=int, choices=[1, 2], default=GRAPH_FORMAT_VERSION)
+    parser_convert.add_argument('--compression', type=str, choices=COMPRESSIONS)
+    parser_convert.set_defaults(func=convert_graph)
+
     args, _ = parser.parse_known_args()
+    if args.task == 'mentions' and not (args.drug_names or args.drug_names_file):
+        parser_mentions.error("l'un des arguments -d/--drug-names --drug-names-file est requis")
     res = None
     if args.task:
         dict_args = vars(args).copy()
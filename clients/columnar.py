@@ -0,0 +1,581 @@
+"""Module d'un graph stocké en colonnes (tableaux numpy).
+
+Alternative compacte à :class:`~clients.graph.Graph` : les attributs des noeuds sont
+stockés dans des colonnes typées, les chaines de caractères dans un tas unique et les
+liaisons sous forme d'adjacence compressée (CSR) par type de liaison.
+Les objets :class:`~clients.graph.Drug`, :class:`~clients.graph.Journal`, etc.
+ne sont créés qu'à la demande, comme des vues sur les colonnes.
+"""
+
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from dataclasses import dataclass
+from pprint import pprint
+import dataclasses
+import json
+import logging
+import mmap
+import struct
+import numpy as np
+import pandas as pd
+
+from clients.dates import parse_date_range, parse_epochs
+from clients.graph import (ClinicalTrial, Drug, Graph, Journal, Link, MentionnedLink,
+                           Node, Publication, PublishedLink)
+
+logger = logging.getLogger(__name__)
+
+NO_STRING = -1
+
+SNAPSHOT_MAGIC = b'CLGRAPH1'
+SNAPSHOT_NODE_ARRAYS = ('node_ids', 'node_types', 'node_labels', 'node_extras', 'node_date_labels', 'node_dates',
+                        'string_heap', 'string_offsets', 'string_order', 'ids_order', 'labels_order')
+SNAPSHOT_ADJACENCY_ARRAYS = ('indptr', 'indices', 'date_labels', 'dates')
+
+
+def _align(size: int, alignment: int = 8) -> int:
+    """Arrondit une taille au multiple supérieur de l'alignement
+
+    Args:
+        size (int): taille en octets
+        alignment (int, optional): alignement en octets. Defaults to 8.
+
+    Returns:
+        int: taille alignée
+    """
+    return (size + alignment - 1) // alignment * alignment
+
+
+def parse_epoch(date: Optional[str]) -> int:
+    """Convertit une date en nombre de nanosecondes depuis epoch (UTC)
+
+    Args:
+        date (Optional[str]): date au format texte
+
+    Returns:
+        int: timestamp epoch en nanosecondes, NO_DATE si absente ou illisible
+    """
+    return int(parse_epochs([date])[0])
+
+
+@dataclass
+class CsrAdjacency():
+    """Adjacence compressée (CSR) des liaisons d'un même type, indexée par noeud A
+
+    Attributes:
+        indptr (np.ndarray): pour le noeud en position i, ses liaisons sont dans [indptr[i], indptr[i + 1][
+        indices (np.ndarray): position du noeud B de chaque liaison
+        date_labels (np.ndarray): indice de la date de la liaison dans la table des chaines (NO_STRING si absente)
+        dates (np.ndarray): date epoch (ns) de la liaison (NO_DATE si absente)
+    """
+    indptr: np.ndarray
+    indices: np.ndarray
+    date_labels: np.ndarray
+    dates: np.ndarray
+
+    def row(self, position: int) -> slice:
+        """Retourne l'intervalle des liaisons du noeud A en position donnée
+
+        Args:
+            position (int): position du noeud A
+
+        Returns:
+            slice: intervalle dans indices, date_labels et dates
+        """
+        return slice(int(self.indptr[position]), int(self.indptr[position + 1]))
+
+    def sources(self) -> np.ndarray:
+        """Retourne la position du noeud A de chaque liaison
+
+        Returns:
+            np.ndarray: positions des noeuds A, alignées sur indices
+        """
+        return np.repeat(np.arange(len(self.indptr) - 1), np.diff(self.indptr))
+
+
+class ColumnarGraph():
+    """Graph stocké en colonnes numpy.
+
+    Les noeuds sont repérés par leur position (ordre de :attr:`Graph.nodes`).
+
+    Attributes:
+        id_state (int): valeur de l'identifiant interne du graph d'origine
+        node_ids (np.ndarray): identifiant de chaque noeud (int64)
+        node_types (np.ndarray): type de chaque noeud (int8, voir Node.\\*_NODE)
+        node_labels (np.ndarray): indice du nom (molécule, journal) ou du titre (publication, essai clinique)
+        node_extras (np.ndarray): indice de l'atccode (molécule) ou du base_id (publication, essai clinique)
+        node_date_labels (np.ndarray): indice de la date du noeud
+        node_dates (np.ndarray): date epoch (ns) du noeud
+        string_heap (np.ndarray): tas des chaines de caractère encodées en utf-8 (uint8)
+        string_offsets (np.ndarray): la chaine i est string_heap[string_offsets[i]:string_offsets[i + 1]]
+        string_order (np.ndarray): indices des chaines triées par valeur (recherche dichotomique)
+        adjacency (Dict[int, CsrAdjacency]): adjacence par type de liaison (Link.\\*_LINK)
+        ids_order (np.ndarray): positions des noeuds triées par identifiant
+        labels_order (np.ndarray): positions des noeuds triées par indice de nom ou de titre
+
+    Les indices de chaine valent NO_STRING si l'attribut est absent.
+    Le graph peut être sauvegardé dans un fichier binaire (:func:`~ColumnarGraph.to_snapshot`)
+    puis ouvert par projection mémoire (:func:`~ColumnarGraph.from_snapshot`).
+    """
+
+    def __init__(self, id_state: int, node_ids: np.ndarray, node_types: np.ndarray, node_labels: np.ndarray,
+                 node_extras: np.ndarray, node_date_labels: np.ndarray, node_dates: np.ndarray,
+                 string_heap: np.ndarray, string_offsets: np.ndarray, string_order: np.ndarray,
+                 adjacency: Dict[int, CsrAdjacency], ids_order: Optional[np.ndarray] = None,
+                 labels_order: Optional[np.ndarray] = None) -> None:
+        self.id_state = id_state
+        self.node_ids = node_ids
+        self.node_types = node_types
+        self.node_labels = node_labels
+        self.node_extras = node_extras
+        self.node_date_labels = node_date_labels
+        self.node_dates = node_dates
+        self.string_heap = string_heap
+        self.string_offsets = string_offsets
+        self.string_order = string_order
+        self.adjacency = adjacency
+        self.ids_order = np.argsort(node_ids, kind='stable') if ids_order is None else ids_order
+        self.labels_order = np.argsort(node_labels, kind='stable') if labels_order is None else labels_order
+        # built at the first filtered query
+        self._mentions_by_date: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._journal_positions: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    @staticmethod
+    def from_graph(graph: Graph) -> "ColumnarGraph":
+        """Construit le graph en colonnes à partir d'un objet graph
+
+        Args:
+            graph (Graph): graph d'origine
+
+        Returns:
+            ColumnarGraph: graph en colonnes
+        """
+        strings: Dict[str, int] = {}
+
+        def intern(value: Optional[Union[str, int]]) -> int:
+            if value is None:
+                return NO_STRING
+            return strings.setdefault(str(value), len(strings))
+
+        n_nodes = len(graph.nodes)
+        node_ids = np.empty(n_nodes, dtype=np.int64)
+        node_types = np.empty(n_nodes, dtype=np.int8)
+        node_labels = np.empty(n_nodes, dtype=np.int32)
+        node_extras = np.empty(n_nodes, dtype=np.int32)
+        node_date_labels = np.empty(n_nodes, dtype=np.int32)
+        node_dates = parse_epochs([getattr(node, 'date', None) for node in graph.nodes])
+        position_by_id: Dict[int, int] = {}
+
+        for position, node in enumerate(graph.nodes):
+            position_by_id[node.id] = position
+            node_ids[position] = node.id
+            node_types[position] = node.type
+            date = getattr(node, 'date', None)
+            if node.type in (Node.DRUG_NODE, Node.JOURNAL_NODE):
+                node_labels[position] = intern(node.name)
+            else:
+                node_labels[position] = intern(node.title)
+            node_extras[position] = intern(node.atccode if node.type == Node.DRUG_NODE else getattr(node, 'base_id', None))
+            node_date_labels[position] = intern(date)
+
+        adjacency: Dict[int, CsrAdjacency] = {}
+        for link_type in (Link.PUBLISHED_LINK, Link.MENTIONNED_LINK):
+            links = graph.look_for_links_by_type(link_type)
+            sources = np.fromiter((position_by_id[link.node_a.id] for link in links), dtype=np.int64, count=len(links))
+            targets = np.fromiter((position_by_id[link.node_b.id] for link in links), dtype=np.int32, count=len(links))
+            date_labels = np.fromiter((intern(link.date) for link in links), dtype=np.int32, count=len(links))
+            dates = parse_epochs([link.date for link in links])
+            # stable sort: links of a node keep the graph order
+            order = np.argsort(sources, kind='stable')
+            indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+            np.cumsum(np.bincount(sources, minlength=n_nodes), out=indptr[1:])
+            adjacency[link_type] = CsrAdjacency(indptr, targets[order], date_labels[order], dates[order])
+
+        encoded = [value.encode('utf-8') for value in strings]
+        string_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=string_offsets[1:])
+        string_heap = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        string_order = np.array(sorted(range(len(encoded)), key=encoded.__getitem__), dtype=np.int32)
+
+        return ColumnarGraph(graph.id_state, node_ids, node_types, node_labels, node_extras, node_date_labels,
+                             node_dates, string_heap, string_offsets, string_order, adjacency)
+
+    @staticmethod
+    def from_json(input_file: str) -> "ColumnarGraph":
+        """Instancier le graph en colonnes à partir d'un fichier json du graph
+
+        Args:
+            input_file (str): chemin du fichier json d'entrée
+
+        Returns:
+            ColumnarGraph: graph en colonnes
+        """
+        return ColumnarGraph.from_graph(Graph.from_json(input_file))
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        """Retourne l'ensemble des tableaux du graph par nom (ordre d'écriture du snapshot)
+
+        Returns:
+            Dict[str, np.ndarray]: tableaux par nom
+        """
+        arrays = {name: getattr(self, name) for name in SNAPSHOT_NODE_ARRAYS}
+        for link_type, adjacency in self.adjacency.items():
+            for name in SNAPSHOT_ADJACENCY_ARRAYS:
+                arrays[f'adjacency_{link_type}_{name}'] = getattr(adjacency, name)
+        return arrays
+
+    def to_snapshot(self, output_file: str) -> None:
+        """Sauvegarde le graph dans un fichier binaire (snapshot):
+
+        |  SNAPSHOT_MAGIC (8 octets)
+        |  taille de l'entête (uint64, little endian)
+        |  entête json: id_state, types de liaison, et pour chaque tableau son dtype, sa longueur et son offset
+        |  tableaux à taille fixe (colonnes des noeuds, tas des chaines, index, adjacences), alignés sur 8 octets
+
+        Args:
+            output_file (str): chemin du fichier binaire
+        """
+        arrays = {name: np.ascontiguousarray(array) for name, array in self._arrays().items()}
+        header = {'id_state': int(self.id_state), 'link_types': [int(t) for t in self.adjacency], 'arrays': {}}
+        offset = 0
+        for name, array in arrays.items():
+            header['arrays'][name] = {'dtype': array.dtype.str, 'length': len(array), 'offset': offset}
+            offset += _align(array.nbytes)
+        header_bytes = json.dumps(header).encode('utf-8')
+        data_start = _align(len(SNAPSHOT_MAGIC) + 8 + len(header_bytes))
+
+        with open(output_file, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(struct.pack('<Q', len(header_bytes)))
+            f.write(header_bytes)
+            f.write(b'\0' * (data_start - f.tell()))
+            for array in arrays.values():
+                f.write(array.tobytes())
+                f.write(b'\0' * (_align(array.nbytes) - array.nbytes))
+
+    @staticmethod
+    def from_snapshot(input_file: str) -> "ColumnarGraph":
+        """Ouvre un snapshot binaire par projection mémoire (mmap).
+        Les tableaux ne sont pas copiés : seules les pages lues par les requêtes sont chargées.
+
+        Args:
+            input_file (str): chemin du fichier binaire
+
+        Raises:
+            ValueError: le fichier n'est pas un snapshot de graph
+
+        Returns:
+            ColumnarGraph: graph en colonnes
+        """
+        with open(input_file, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if buffer[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise ValueError(f"{input_file} n'est pas un snapshot de graph")
+        header_size, = struct.unpack_from('<Q', buffer, len(SNAPSHOT_MAGIC))
+        header_start = len(SNAPSHOT_MAGIC) + 8
+        header = json.loads(buffer[header_start:header_start + header_size].decode('utf-8'))
+        data_start = _align(header_start + header_size)
+
+        arrays = {}
+        for name, spec in header['arrays'].items():
+            if spec['length']:
+                arrays[name] = np.frombuffer(buffer, dtype=np.dtype(spec['dtype']), count=spec['length'],
+                                             offset=data_start + spec['offset'])
+            else:
+                arrays[name] = np.empty(0, dtype=np.dtype(spec['dtype']))
+
+        adjacency = {
+            link_type: CsrAdjacency(*[arrays[f'adjacency_{link_type}_{name}'] for name in SNAPSHOT_ADJACENCY_ARRAYS])
+            for link_type in header['link_types']
+        }
+        return ColumnarGraph(header['id_state'], adjacency=adjacency,
+                             **{name: arrays[name] for name in SNAPSHOT_NODE_ARRAYS})
+
+    def get_string(self, index: int) -> Optional[str]:
+        """Retourne la chaine de caractère de la table des chaines
+
+        Args:
+            index (int): indice de la chaine
+
+        Returns:
+            Optional[str]: chaine de caractère ou None si NO_STRING
+        """
+        if index == NO_STRING:
+            return None
+        return self._string_bytes(index).decode('utf-8')
+
+    def find_string(self, value: str) -> int:
+        """Recherche dichotomique d'une chaine de caractère dans la table des chaines
+
+        Args:
+            value (str): chaine recherchée
+
+        Returns:
+            int: indice de la chaine ou NO_STRING si absente
+        """
+        encoded = value.encode('utf-8')
+        low, high = 0, len(self.string_order)
+        while low < high:
+            middle = (low + high) // 2
+            if self._string_bytes(self.string_order[middle]) < encoded:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self.string_order) and self._string_bytes(self.string_order[low]) == encoded:
+            return int(self.string_order[low])
+        return NO_STRING
+
+    def _string_bytes(self, index: int) -> bytes:
+        """Retourne la chaine encodée en utf-8 de la table des chaines
+
+        Args:
+            index (int): indice de la chaine
+
+        Returns:
+            bytes: chaine encodée
+        """
+        return self.string_heap[self.string_offsets[index]:self.string_offsets[index + 1]].tobytes()
+
+    def position_of(self, node_id: int) -> Optional[int]:
+        """Retourne la position d'un noeud à partir de son identifiant
+
+        Args:
+            node_id (int): identifiant du noeud
+
+        Returns:
+            Optional[int]: position du noeud ou None si absent
+        """
+        i = np.searchsorted(self.node_ids, node_id, sorter=self.ids_order)
+        if i < len(self.node_ids) and self.node_ids[self.ids_order[i]] == node_id:
+            return int(self.ids_order[i])
+        return
+
+    def node(self, position: int) -> Node:
+        """Crée la vue dataclass du noeud en position donnée
+
+        Args:
+            position (int): position du noeud
+
+        Returns:
+            Node: Drug, Journal, Publication ou ClinicalTrial
+        """
+        node_id = int(self.node_ids[position])
+        node_type = self.node_types[position]
+        label = self.get_string(self.node_labels[position])
+        extra = self.get_string(self.node_extras[position])
+        if node_type == Node.DRUG_NODE:
+            return Drug(id=node_id, name=label, atccode=extra)
+        if node_type == Node.JOURNAL_NODE:
+            return Journal(id=node_id, name=label)
+        cls = Publication if node_type == Node.PUBLICATION_NODE else ClinicalTrial
+        return cls(id=node_id, title=label, date=self.get_string(self.node_date_labels[position]), base_id=extra)
+
+    def look_for_drug_by_names(self, names: List[str]) -> List[Drug]:
+        """Retrouve les noeuds molécule par nom de molécule
+
+        Args:
+            names (List[str]): liste des noms de molécule
+
+        Returns:
+            List[Drug]: list des vues Drug, dans l'ordre des noeuds
+        """
+        positions = set()
+        for name in names:
+            label = self.find_string(name)
+            if label == NO_STRING:
+                continue
+            start = np.searchsorted(self.node_labels, label, side='left', sorter=self.labels_order)
+            end = np.searchsorted(self.node_labels, label, side='right', sorter=self.labels_order)
+            positions.update(int(position) for position in self.labels_order[start:end]
+                             if self.node_types[position] == Node.DRUG_NODE)
+        return [self.node(position) for position in sorted(positions)]
+
+    def look_for_links_by_node(self, node: Node, link_type: int) -> List[Link]:
+        """Retrouve les liaisons dont le noeud A est le noeud en paramètre
+
+        Args:
+            node (Node): noeud A des liaisons
+            link_type (int): type de liaison à retrouver
+
+        Returns:
+            List[Link]: vues des liaisons, dans l'ordre du graph d'origine
+        """
+        position = self.position_of(node.id)
+        if position is None:
+            return []
+        adjacency = self.adjacency[link_type]
+        row = adjacency.row(position)
+        cls = PublishedLink if link_type == Link.PUBLISHED_LINK else MentionnedLink
+        return [cls(node, self.node(target), self.get_string(date_label))
+                for target, date_label in zip(adjacency.indices[row], adjacency.date_labels[row])]
+
+    def look_for_drugs_mentions(self, drug_names: List[str], date_from: Optional[str] = None,
+                                date_to: Optional[str] = None, mention_type: Optional[int] = None,
+                                journal: Optional[str] = None) -> Dict[str, List[MentionnedLink]]:
+        """Retrouve les liaisons de mention d'un lot de molécules, avec les filtres
+        de :func:`~clients.graph.Graph.look_for_drugs_mentions`. Avec une période, les mentions d'une molécule
+        sont retrouvées par recherche dichotomique dans ses mentions triées par date.
+
+        Args:
+            drug_names (List[str]): liste des molécules
+            date_from (str, optional): date de début de la période, incluse. Defaults to None.
+            date_to (str, optional): date de fin de la période, incluse (jusqu'à la fin du jour
+                                     si sans heure). Defaults to None.
+            mention_type (int, optional): type de mention (MentionnedLink.MENTION_*). Defaults to None.
+            journal (str, optional): nom du journal de la mention. Defaults to None.
+
+        Raises:
+            ValueError: date illisible
+
+        Returns:
+            Dict[str, List[MentionnedLink]]: vues des liaisons par nom de molécule, dans l'ordre du graph d'origine
+        """
+        date_range = parse_date_range(date_from, date_to)
+        journals = None if journal is None else self._look_for_journals(journal)
+        drugs = {drug_node.name: drug_node for drug_node in self.look_for_drug_by_names(drug_names)}
+        return {drug_name: list(self._iter_drug_mentions(drug_node, date_range, mention_type, journals))
+                for drug_name, drug_node in drugs.items()}
+
+    def iter_drugs_mentions(self, drug_names: List[str], date_from: Optional[str] = None,
+                            date_to: Optional[str] = None, mention_type: Optional[int] = None,
+                            journal: Optional[str] = None) -> Iterator[Tuple[str, MentionnedLink]]:
+        """Itère sur les liaisons de mention d'un lot de molécules, une vue à la fois,
+        voir :func:`~clients.graph.Graph.iter_drugs_mentions`
+
+        Raises:
+            ValueError: date illisible
+
+        Returns:
+            Iterator[Tuple[str, MentionnedLink]]: nom de la molécule et vue de la liaison de mention
+        """
+        date_range = parse_date_range(date_from, date_to)
+        journals = None if journal is None else self._look_for_journals(journal)
+        drugs = {drug_node.name: drug_node for drug_node in self.look_for_drug_by_names(drug_names)}
+        return ((drug_name, link) for drug_name, drug_node in drugs.items()
+                for link in self._iter_drug_mentions(drug_node, date_range, mention_type, journals))
+
+    def _iter_drug_mentions(self, drug_node: Drug, date_range: Optional[Tuple[int, int]],
+                            mention_type: Optional[int], journals: Optional[np.ndarray]) -> Iterator[MentionnedLink]:
+        """Itère sur les vues des liaisons de mention filtrées d'une molécule
+
+        Args:
+            drug_node (Drug): vue de la molécule
+            date_range (Optional[Tuple[int, int]]): période en dates epoch (ns)
+            mention_type (Optional[int]): type de mention
+            journals (Optional[np.ndarray]): positions des journaux, voir :func:`~ColumnarGraph._look_for_journals`
+
+        Yields:
+            Iterator[MentionnedLink]: vues des liaisons, dans l'ordre du graph d'origine
+        """
+        adjacency = self.adjacency[Link.MENTIONNED_LINK]
+        position = self.position_of(drug_node.id)
+        if date_range is None:
+            row = adjacency.row(position)
+            link_indexes = np.arange(row.start, row.stop)
+        else:
+            link_indexes = self._look_for_mentions_by_date(position, *date_range)
+        targets = adjacency.indices[link_indexes]
+        mask = np.ones(len(link_indexes), dtype=bool)
+        if mention_type is not None:
+            mask &= self.node_types[targets] == mention_type
+        if journals is not None:
+            mask &= np.isin(targets, journals) | np.isin(self._published_in()[targets], journals)
+        for target, date_label in zip(targets[mask], adjacency.date_labels[link_indexes[mask]]):
+            yield MentionnedLink(drug_node, self.node(target), self.get_string(date_label))
+
+    def _look_for_mentions_by_date(self, position: int, start: int, end: int) -> np.ndarray:
+        """Liaisons de mention de la molécule en position donnée datées dans l'intervalle [start, end].
+        L'ordre des mentions de la molécule par date est calculé à la première requête.
+
+        Args:
+            position (int): position de la molécule
+            start (int): date epoch (ns) de début, incluse
+            end (int): date epoch (ns) de fin, incluse
+
+        Returns:
+            np.ndarray: indices des liaisons dans l'adjacence des mentions, dans l'ordre du graph d'origine
+        """
+        index = self._mentions_by_date.get(position)
+        if index is None:
+            row = self.adjacency[Link.MENTIONNED_LINK].row(position)
+            dates = self.adjacency[Link.MENTIONNED_LINK].dates[row]
+            order = np.argsort(dates, kind='stable')
+            index = self._mentions_by_date[position] = (dates[order], row.start + order)
+        dates, link_indexes = index
+        low, high = np.searchsorted(dates, start, side='left'), np.searchsorted(dates, end, side='right')
+        return np.sort(link_indexes[low:high])
+
+    def _look_for_journals(self, name: str) -> np.ndarray:
+        """Positions des journaux d'un nom donné
+
+        Args:
+            name (str): nom du journal
+
+        Returns:
+            np.ndarray: positions des noeuds journal
+        """
+        label = self.find_string(name)
+        if label == NO_STRING:
+            return np.empty(0, dtype=np.int64)
+        start = np.searchsorted(self.node_labels, label, side='left', sorter=self.labels_order)
+        end = np.searchsorted(self.node_labels, label, side='right', sorter=self.labels_order)
+        positions = self.labels_order[start:end]
+        return positions[self.node_types[positions] == Node.JOURNAL_NODE]
+
+    def _published_in(self) -> np.ndarray:
+        """Position du journal de chaque noeud (publication ou essai clinique), -1 sans journal,
+        calculée à la première requête
+
+        Returns:
+            np.ndarray: positions des journaux, alignées sur les noeuds
+        """
+        if self._journal_positions is None:
+            adjacency = self.adjacency[Link.PUBLISHED_LINK]
+            journal_positions = np.full(len(self), -1, dtype=np.int64)
+            # reversed: the first publication link of a node wins, as in Graph.look_for_journal_link
+            journal_positions[adjacency.indices[::-1]] = adjacency.sources()[::-1]
+            self._journal_positions = journal_positions
+        return self._journal_positions
+
+    def get_drugs_mentions(self, drug_names: List[str], verbose: bool = True,
+                           **filters) -> Dict[str, List[MentionnedLink]]:
+        """Retourne les liaisons de mention d'une liste de molécule.
+        Même format que :func:`~clients.graph.Graph.get_drugs_mentions`.
+
+        Args:
+            drug_names (List[str]): liste des molécules
+            verbose (bool, optional): Defaults to True.
+            filters: filtres date_from, date_to, mention_type et journal de :func:`~ColumnarGraph.look_for_drugs_mentions`
+
+        Returns:
+            Dict[str, MentionnedLink]: retourne le dictionnaire de résultats
+        """
+        drug_mentions = self.look_for_drugs_mentions(drug_names, **filters)
+
+        if verbose:
+            pprint({
+                drug_name: [{**dataclasses.asdict(drug_mention.node_b), **{'date': drug_mention.date}} for drug_mention in drug_links]
+                for drug_name, drug_links in drug_mentions.items()
+            })
+
+        return drug_mentions
+
+    def get_journals_distinct_mentions(self) -> pd.Series:
+        """Retourne le nombre distinct de molécules mentionnées par journal.
+        Même format que :func:`~clients.tasks.export_journals_with_distinct_mention`.
+
+        Returns:
+            pd.Series: nombre de molécules distinctes indexé par (node_b_name, node_b_id)
+        """
+        adjacency = self.adjacency[Link.MENTIONNED_LINK]
+        sources = adjacency.sources()
+        mask = self.node_types[adjacency.indices] == Node.JOURNAL_NODE
+        sources, targets = sources[mask], adjacency.indices[mask]
+        journal_links_df = pd.DataFrame({
+            'node_b_name': [self.get_string(label) for label in self.node_labels[targets]],
+            'node_b_id': self.node_ids[targets],
+            'node_a_name': [self.get_string(label) for label in self.node_labels[sources]],
+        })
+        return journal_links_df.groupby(['node_b_name', 'node_b_id']).node_a_name.nunique().sort_values(ascending=False)
@@ -0,0 +1,148 @@
+"""Module d'ouverture des fichiers compressés (gzip, zstd).
+
+Les fichiers sont compressés et décompressés au fil de la lecture et de l'écriture:
+la mémoire utilisée ne dépend pas de la taille des fichiers.
+A l'écriture, la compression est choisie explicitement ou d'après l'extension du fichier
+(``.gz``, ``.zst``). A la lecture, elle est reconnue d'après les premiers octets du fichier,
+quelle que soit son extension. Le package ``zstandard`` est nécessaire pour zstd.
+"""
+
+from typing import IO, Optional
+import gzip
+import io
+import os
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+COMPRESSIONS = ('gzip', 'zstd')
+COMPRESSION_EXTENSIONS = {'gzip': '.gz', 'zstd': '.zst'}
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+_MAGIC_NUMBERS = {b'\x1f\x8b': 'gzip', b'\x28\xb5\x2f\xfd': 'zstd'}
+
+
+def _check_compression(compression: Optional[str]) -> None:
+    """Vérifie que la compression est connue et disponible
+
+    Raises:
+        ValueError: compression inconnue
+        ImportError: zstandard est nécessaire pour la compression zstd
+    """
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ValueError(f"compression inconnue {compression}")
+    if compression == 'zstd' and zstandard is None:
+        raise ImportError("zstandard est nécessaire pour la compression zstd")
+
+
+def compression_from_extension(filename: str) -> Optional[str]:
+    """Compression correspondant à l'extension d'un fichier
+
+    Args:
+        filename (str): chemin du fichier
+
+    Returns:
+        Optional[str]: gzip, zstd ou None si l'extension n'est pas celle d'un fichier compressé
+    """
+    for compression, extension in COMPRESSION_EXTENSIONS.items():
+        if filename.endswith(extension):
+            return compression
+    return None
+
+
+def strip_compression_extension(filename: str) -> str:
+    """Chemin d'un fichier sans l'extension de compression (``pubmed.json.gz`` -> ``pubmed.json``)
+
+    Args:
+        filename (str): chemin du fichier
+
+    Returns:
+        str: chemin sans extension de compression
+    """
+    compression = compression_from_extension(filename)
+    return filename[:-len(COMPRESSION_EXTENSIONS[compression])] if compression else filename
+
+
+def add_compression_extension(filename: str, compression: Optional[str]) -> str:
+    """Ajoute l'extension d'une compression au chemin d'un fichier, si elle n'y est pas déjà
+
+    Args:
+        filename (str): chemin du fichier
+        compression (Optional[str]): gzip, zstd ou None (pas de compression)
+
+    Returns:
+        str: chemin du fichier
+    """
+    _check_compression(compression)
+    if compression is None or compression_from_extension(filename) == compression:
+        return filename
+    return filename + COMPRESSION_EXTENSIONS[compression]
+
+
+def detect_compression(filename: str) -> Optional[str]:
+    """Reconnait la compression d'un fichier d'après ses premiers octets
+
+    Args:
+        filename (str): chemin du fichier
+
+    Returns:
+        Optional[str]: gzip, zstd ou None si le fichier n'est pas compressé
+    """
+    with open(filename, 'rb') as f:
+        header = f.read(4)
+    for magic_number, compression in _MAGIC_NUMBERS.items():
+        if header.startswith(magic_number):
+            return compression
+    return None
+
+
+def find_file(filename: str) -> str:
+    """Retourne le chemin du fichier s'il existe, sinon celui de sa version compressée
+    (``graph.json``, ``graph.json.gz`` puis ``graph.json.zst``)
+
+    Args:
+        filename (str): chemin du fichier non compressé
+
+    Returns:
+        str: chemin existant, le chemin d'origine si aucun n'existe
+    """
+    for extension in ('',) + tuple(COMPRESSION_EXTENSIONS.values()):
+        if os.path.exists(filename + extension):
+            return filename + extension
+    return filename
+
+
+def open_file(filename: str, mode: str = 'r', compression: Optional[str] = None) -> IO:
+    """Ouvre un fichier, compressé ou non, en lecture ou en écriture (texte ou binaire)
+
+    Args:
+        filename (str): chemin du fichier
+        mode (str, optional): r, w, rb ou wb. Defaults to 'r'.
+        compression (Optional[str], optional): gzip ou zstd. Defaults to None, d'après les premiers
+                                               octets du fichier en lecture et son extension en écriture.
+
+    Raises:
+        ValueError: compression inconnue
+        ImportError: zstandard est nécessaire pour la compression zstd
+
+    Returns:
+        IO: fichier ouvert
+    """
+    if compression is None:
+        compression = detect_compression(filename) if mode.startswith('r') else compression_from_extension(filename)
+    _check_compression(compression)
+    if compression is None:
+        return open(filename, mode)
+
+    binary_mode = mode.replace('t', '').replace('b', '') + 'b'
+    if compression == 'gzip':
+        f = gzip.open(filename, binary_mode, compresslevel=GZIP_LEVEL)
+    elif binary_mode == 'rb':
+        f = zstandard.open(filename, binary_mode)
+    else:
+        f = zstandard.open(filename, binary_mode, cctx=zstandard.ZstdCompressor(level=ZSTD_LEVEL))
+    if 'b' in mode:
+        return f
+    return io.TextIOWrapper(f, encoding='utf-8')
@@ -1,51 +1,68 @@
 """Module pour ingérer les données et les formater"""
 
-from typing import Dict, List, Union
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Union
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import functools
+import glob
+import hashlib
 import logging
-import re
 import os
 import numpy as np
 import pandas as pd
+from clients.cache import FragmentCache
+from clients.cleaning import TextCleaner
+from clients.compression import add_compression_extension, open_file, strip_compression_extension
+from clients.dates import normalize_dates
+from clients.dedupe import NEAR_DUPLICATES_COLUMNS, NearDuplicateIndex, drop_near_duplicates
+from clients.json_records import iter_json_records
+from clients.parquet import ParquetRecordsWriter, write_parquet
 
 logger = logging.getLogger(__name__)
 
 
-def _clean_json(string):
-    """
-    supprime les virgule non utile dans le json
-    from https://stackoverflow.com/questions/23705304/can-json-loads-ignore-trailing-commas
+def _clean_str_col(col: pd.Series, cleaner: Optional[TextCleaner] = None):
+    """Nettoyer la colonne de chaine de caractère:
+    * strip
+    * remplacer les unicodes inutiles
+    * np.NaN si vide
 
     Args:
-        string (str): chaine de caractère du json
+        col (pd.Series): colonne de chaine de caractère
+        cleaner (TextCleaner, optional): normalisations à appliquer. Defaults to None, toutes.
 
     Returns:
-
+        pd.Serie
     """
-    string = re.sub(r",[ \t\r\n]+}", "}", string)
-    string = re.sub(r",[ \t\r\n]+\]", "]", string)
+    return (cleaner or TextCleaner()).clean(col)
 
-    return string
 
-
-def _clean_str_col(col: pd.Series):
-    """Nettoyer la colonne de chaine de caractère:
-    * strip
-    * remplacer les unicodes inutiles
-    * np.NaN si vide
+def _cached_chunks(filename: str, kind: str, build: Callable[[], Iterable[pd.DataFrame]],
+                   chunk_size: Optional[int] = None, cleaner: Optional[TextCleaner] = None,
+                   cache: Optional[FragmentCache] = None) -> Iterable[pd.DataFrame]:
+    """Morceaux nettoyés d'un fichier brut, réutilisés depuis le cache si le fichier
+    et la configuration du nettoyage n'ont pas changé
 
     Args:
-        col (pd.Series): colonne de chaine de caractère
+        filename (str): chemin du fichier brut
+        kind (str): type de données (pubmed, clinical_trials, drugs)
+        build (Callable[[], Iterable[pd.DataFrame]]): lecture et nettoyage des morceaux
+        chunk_size (int, optional): nombre de lignes par morceau. Defaults to None.
+        cleaner (TextCleaner, optional): nettoyage des chaines de caractère. Defaults to None, toutes les normalisations.
+        cache (FragmentCache, optional): cache des fragments. Defaults to None, sans cache.
 
     Returns:
-        pd.Serie
+        Iterable[pd.DataFrame]: morceaux nettoyés
     """
-    return col.str.lower()\
-        .str.strip()\
-        .str.replace(r'\\x\w{2}', '', regex=True)\
-        .replace(r'^\s*$', np.NaN, regex=True)
+    if cache is None:
+        return build()
+    cleaner = cleaner or TextCleaner()
+    config = {'kind': kind, 'chunk_size': chunk_size, 'normalizers': cleaner.normalizers, 'use_arrow': cleaner.use_arrow}
+    return cache.fragments(filename, config, build)
 
 
-def read_and_format_drugs(drug_filename: str) -> pd.DataFrame:
+def read_and_format_drugs(drug_filename: str, cleaner: Optional[TextCleaner] = None,
+                          cache: Optional[FragmentCache] = None) -> pd.DataFrame:
     """Lire et formater les données molécules (drugs)
     dans le but de les exporter en fichier json sous la forme:
 
@@ -57,16 +74,22 @@ def read_and_format_drugs(drug_filename: str) -> pd.DataFrame:
 
     Args:
         drug_filename (str): chemin du fichier brut
+        cleaner (TextCleaner, optional): nettoyage des chaines de caractère. Defaults to None, toutes les normalisations.
+        cache (FragmentCache, optional): cache des fichiers nettoyés. Defaults to None, sans cache.
 
     Returns:
         pd.DataFrame: tableau de données
     """
-    logger.info(f'Drugs: lecture du fichier csv {drug_filename} ...')
-    drugs = pd.read_csv(drug_filename)
+    def read_and_clean() -> Iterator[pd.DataFrame]:
+        logger.info(f'Drugs: lecture du fichier csv {drug_filename} ...')
+        with open_file(drug_filename) as f:
+            drugs = pd.read_csv(f)
 
-    logger.info('Drugs: format des colonnes ...')
-    drugs.drug = _clean_str_col(drugs.drug)
-    drugs = drugs.rename(columns={'drug': 'name'})
+        logger.info('Drugs: format des colonnes ...')
+        drugs.drug = _clean_str_col(drugs.drug, cleaner)
+        yield drugs.rename(columns={'drug': 'name'})
+
+    drugs = pd.concat(list(_cached_chunks(drug_filename, 'drugs', read_and_clean, cleaner=cleaner, cache=cache)))
     drugs_deduplicated = drugs.drop_duplicates('name')
     if drugs_deduplicated.shape != drugs.shape:
         logger.info('Drugs: des doublons sont présents dans la base...')
@@ -76,7 +99,155 @@ def read_and_format_drugs(drug_filename: str) -> pd.DataFrame:
     return drugs
 
 
-def read_and_format_pubmed(pubmed_filename: Union[str, List[str]]) -> pd.DataFrame:
+def _read_csv_chunks(filename: str, dtypes_args: Dict[str, type],
+                     chunk_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """Lecture d'un fichier csv brut, compressé ou non, par morceaux.
+    Les dates sont lues au format texte puis converties une fois par date distincte
+    (voir :func:`~clients.dates.normalize_dates`).
+
+    Args:
+        filename (str): chemin du fichier brut
+        dtypes_args (Dict[str, type]): types des colonnes
+        chunk_size (int, optional): nombre de lignes par morceau. Defaults to None, le fichier en un seul morceau.
+
+    Yields:
+        Iterator[pd.DataFrame]: morceaux du fichier brut
+    """
+    with open_file(filename) as f:
+        if chunk_size is None:
+            chunks = iter([pd.read_csv(f, dtype={**dtypes_args, 'date': str})])
+        else:
+            chunks = pd.read_csv(f, dtype={**dtypes_args, 'date': str}, chunksize=chunk_size)
+        for chunk in chunks:
+            chunk['date'] = normalize_dates(chunk['date'])
+            yield chunk
+
+
+def _read_pubmed_chunks(pubmed_filename: str, chunk_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """Lecture d'un fichier brut de publications par morceaux
+
+    Args:
+        pubmed_filename (str): chemin du fichier brut (csv ou json, compressé ou non)
+        chunk_size (int, optional): nombre de lignes (ou d'enregistrements json) par morceau.
+                                    Defaults to None, le fichier en un seul morceau.
+
+    Raises:
+        ValueError: Pubmed: l'extension du fichier est inconnu
+
+    Yields:
+        Iterator[pd.DataFrame]: morceaux du fichier brut
+    """
+    dtypes_args = {'id': str, 'title': str, 'journal': str}
+    logger.info(f'Pubmed: lecture du fichier pubmed {pubmed_filename} ...')
+    name = strip_compression_extension(pubmed_filename)
+    if name.endswith('.json'):
+        # dates are read as text then parsed once per distinct value
+        for records in iter_json_records(pubmed_filename, batch_size=chunk_size):
+            # records of the batch turned into columns, without serializing them back to json
+            chunk = pd.DataFrame.from_records(records)
+            chunk = chunk.astype({column: dtype for column, dtype in dtypes_args.items() if column in chunk.columns})
+            chunk['date'] = normalize_dates(chunk['date'])
+            yield chunk
+    elif name.endswith('.csv'):
+        yield from _read_csv_chunks(pubmed_filename, dtypes_args, chunk_size)
+    else:
+        raise ValueError("Pubmed: l'extension du fichier est inconnu")
+
+
+def _format_pubmed(pubmed_data: pd.DataFrame, cleaner: Optional[TextCleaner] = None) -> pd.DataFrame:
+    """Format des colonnes de chaine de caractère des publications
+
+    Args:
+        pubmed_data (pd.DataFrame): tableau de données brut
+        cleaner (TextCleaner, optional): nettoyage des chaines de caractère. Defaults to None, toutes les normalisations.
+
+    Returns:
+        pd.DataFrame: tableau de données
+    """
+    return (cleaner or TextCleaner()).clean_columns(pubmed_data, ['id', 'title', 'journal'])
+
+
+def _formatted_pubmed_chunks(pubmed_filename: str, chunk_size: Optional[int] = None,
+                             cleaner: Optional[TextCleaner] = None,
+                             cache: Optional[FragmentCache] = None) -> Iterable[pd.DataFrame]:
+    """Lecture et format d'un fichier brut de publications par morceaux, avec le cache si donné
+
+    Args:
+        pubmed_filename (str): chemin du fichier brut (csv ou json)
+        chunk_size (int, optional): nombre de lignes par morceau. Defaults to None, le fichier en un seul morceau.
+        cleaner (TextCleaner, optional): nettoyage des chaines de caractère. Defaults to None, toutes les normalisations.
+        cache (FragmentCache, optional): cache des fichiers nettoyés. Defaults to None, sans cache.
+
+    Returns:
+        Iterable[pd.DataFrame]: morceaux formatés
+    """
+    def read_and_clean() -> Iterator[pd.DataFrame]:
+        return (_format_pubmed(chunk, cleaner) for chunk in _read_pubmed_chunks(pubmed_filename, chunk_size))
+
+    return _cached_chunks(pubmed_filename, 'pubmed', read_and_clean, chunk_size, cleaner, cache)
+
+
+PUBMED_EXTENSIONS = ('.csv', '.json')
+
+
+def expand_pubmed_files(pubmed_files: List[str]) -> List[str]:
+    """Remplace les répertoires et les motifs (glob) par les fichiers qu'ils désignent.
+    Les fichiers d'un répertoire (extensions :data:`~PUBMED_EXTENSIONS`, éventuellement suivies de ``.gz``
+    ou ``.zst``) ou d'un motif sont triés par nom,
+    l'ordre des fichiers (et donc des données) est ainsi le même d'une exécution à l'autre.
+
+    Args:
+        pubmed_files (List[str]): chemins de fichiers, de répertoires ou motifs
+
+    Raises:
+        ValueError: Pubmed: aucun fichier ne correspond
+
+    Returns:
+        List[str]: chemins des fichiers
+    """
+    filenames = []
+    for pubmed_file in pubmed_files:
+        if os.path.isdir(pubmed_file):
+            matches = sorted(os.path.join(pubmed_file, name) for name in os.listdir(pubmed_file)
+                             if strip_compression_extension(name).endswith(PUBMED_EXTENSIONS))
+        elif glob.has_magic(pubmed_file):
+            matches = sorted(glob.glob(pubmed_file))
+        else:
+            matches = [pubmed_file]
+        if not matches:
+            raise ValueError(f"Pubmed: aucun fichier ne correspond à {pubmed_file}")
+        filenames += matches
+    return filenames
+
+
+def _map_in_order(func: Callable, items: Iterable, workers: int = 1) -> Iterator[Any]:
+    """Applique la fonction aux éléments dans une pool de processus et retourne les résultats
+    dans l'ordre des éléments. Au plus deux tâches par processus sont en attente,
+    afin de borner la mémoire des résultats non consommés.
+
+    Args:
+        func (Callable): fonction (sérialisable) à appliquer
+        items (Iterable): éléments
+        workers (int, optional): nombre de processus, 1 pour une exécution séquentielle. Defaults to 1.
+
+    Yields:
+        Iterator[Any]: résultats dans l'ordre des éléments
+    """
+    if workers <= 1:
+        yield from map(func, items)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = deque()
+        for item in items:
+            futures.append(executor.submit(func, item))
+            if len(futures) >= 2 * workers:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
+
+
+def read_and_format_pubmed(pubmed_filename: Union[str, List[str]], cleaner: Optional[TextCleaner] = None,
+                           workers: int = 1, cache: Optional[FragmentCache] = None) -> pd.DataFrame:
     """Lire et formater les données de publications (pubmeds)
     dans le but de les exporter en fichier json sous la forme:
 
@@ -87,7 +258,12 @@ def read_and_format_pubmed(pubmed_filename: Union[str, List[str]]) -> pd.DataFra
     | }, ...]
 
     Args:
-        pubmed_filename (Union[str, List[str]]): chemins des fichiers bruts
+        pubmed_filename (Union[str, List[str]]): chemins des fichiers bruts, des répertoires ou motifs
+                                                  (voir :func:`~expand_pubmed_files`)
+        cleaner (TextCleaner, optional): nettoyage des chaines de caractère. Defaults to None, toutes les normalisations.
+        workers (int, optional): nombre de processus pour lire et formater les fichiers en parallèle. Defaults to 1.
+        cache (FragmentCache, optional): cache des fichiers nettoyés, voir :class:`~clients.cache.FragmentCache`.
+                                         Defaults to None, sans cache.
 
     Raises:
         ValueError: Pubmed: l'extension du fichier est inconnu
@@ -95,21 +271,11 @@ def read_and_format_pubmed(pubmed_filename: Union[str, List[str]]) -> pd.DataFra
     Returns:
         pd.DataFrame: tableau de données
     """
-    dtypes_args = {'id': str, 'title': str, 'journal': str}
-    str_cols = ['id', 'title', 'journal']
     if isinstance(pubmed_filename, list):
-        pubmed_data = pd.concat([read_and_format_pubmed(f) for f in pubmed_filename])
+        read_file = functools.partial(read_and_format_pubmed, cleaner=cleaner, cache=cache)
+        pubmed_data = pd.concat(list(_map_in_order(read_file, expand_pubmed_files(pubmed_filename), workers)))
     else:
-        logger.info(f'Pubmed: lecture du fichier pubmed {pubmed_filename} ...')
-        if pubmed_filename.endswith('.json'):
-            with open(pubmed_filename, "r") as f:
-                content = f.read()
-                pubmed_data = pd.read_json(_clean_json(content), dtype=dtypes_args, convert_dates='date')
-        elif pubmed_filename.endswith('.csv'):
-            pubmed_data = pd.read_csv(pubmed_filename, dtype=dtypes_args, parse_dates=['date'])
-        else:
-            raise ValueError("Pubmed: l'extension du fichier est inconnu")
-        pubmed_data[str_cols] = pubmed_data[str_cols].apply(_clean_str_col, axis=1)
+        pubmed_data = pd.concat(list(_formatted_pubmed_chunks(pubmed_filename, cleaner=cleaner, cache=cache)))
 
     pubmed_data_deduplicated = pubmed_data.drop_duplicates('title')
     if pubmed_data_deduplicated.shape != pubmed_data.shape:
@@ -122,7 +288,59 @@ def read_and_format_pubmed(pubmed_filename: Union[str, List[str]]) -> pd.DataFra
     return pubmed_data
 
 
-def read_and_format_clinical_trials(clinical_trial_filename: str) -> pd.DataFrame:
+def _read_clinical_trials_chunks(clinical_trial_filename: str, chunk_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """Lecture du fichier brut des essais cliniques par morceaux
+
+    Args:
+        clinical_trial_filename (str): chemin du fichier brut
+        chunk_size (int, optional): nombre de lignes par morceau. Defaults to None, le fichier en un seul morceau.
+
+    Yields:
+        Iterator[pd.DataFrame]: morceaux du fichier brut
+    """
+    dtypes_args = {'id': str, 'scientific_title': str, 'journal': str}
+    logger.info(f'Trial: lecture du fichier csv {clinical_trial_filename} ...')
+    yield from _read_csv_chunks(clinical_trial_filename, dtypes_args, chunk_size)
+
+
+def _format_clinical_trials(clinical_trials: pd.DataFrame, cleaner: Optional[TextCleaner] = None) -> pd.DataFrame:
+    """Format des colonnes des essais cliniques et suppression des titres vides
+
+    Args:
+        clinical_trials (pd.DataFrame): tableau de données brut
+        cleaner (TextCleaner, optional): nettoyage des chaines de caractère. Defaults to None, toutes les normalisations.
+
+    Returns:
+        pd.DataFrame: tableau de données
+    """
+    clinical_trials = clinical_trials.rename(columns={'scientific_title': 'title'})
+    clinical_trials = (cleaner or TextCleaner()).clean_columns(clinical_trials, ['title', 'journal'])
+    return clinical_trials[(clinical_trials.title != "") & (~clinical_trials.title.isnull())]
+
+
+def _formatted_clinical_trials_chunks(clinical_trial_filename: str, chunk_size: Optional[int] = None,
+                                      cleaner: Optional[TextCleaner] = None,
+                                      cache: Optional[FragmentCache] = None) -> Iterable[pd.DataFrame]:
+    """Lecture et format du fichier brut des essais cliniques par morceaux, avec le cache si donné
+
+    Args:
+        clinical_trial_filename (str): chemin du fichier brut
+        chunk_size (int, optional): nombre de lignes par morceau. Defaults to None, le fichier en un seul morceau.
+        cleaner (TextCleaner, optional): nettoyage des chaines de caractère. Defaults to None, toutes les normalisations.
+        cache (FragmentCache, optional): cache des fichiers nettoyés. Defaults to None, sans cache.
+
+    Returns:
+        Iterable[pd.DataFrame]: morceaux formatés
+    """
+    def read_and_clean() -> Iterator[pd.DataFrame]:
+        return (_format_clinical_trials(chunk, cleaner)
+                for chunk in _read_clinical_trials_chunks(clinical_trial_filename, chunk_size))
+
+    return _cached_chunks(clinical_trial_filename, 'clinical_trials', read_and_clean, chunk_size, cleaner, cache)
+
+
+def read_and_format_clinical_trials(clinical_trial_filename: str, cleaner: Optional[TextCleaner] = None,
+                                    cache: Optional[FragmentCache] = None) -> pd.DataFrame:
     """Lire et formater les données des essais cliniqques (clinical_trials)
     dans le but de les exporter en fichier json sous la forme:
 
@@ -134,19 +352,15 @@ def read_and_format_clinical_trials(clinical_trial_filename: str) -> pd.DataFram
 
     Args:
         clinical_trial_filename (str): chemin du fichier brut
+        cleaner (TextCleaner, optional): nettoyage des chaines de caractère. Defaults to None, toutes les normalisations.
+        cache (FragmentCache, optional): cache des fichiers nettoyés. Defaults to None, sans cache.
 
     Returns:
         pd.DataFrame: tableau de données
     """
-    logger.info(f'Trial: lecture du fichier csv {clinical_trial_filename} ...')
-    clinical_trials = pd.read_csv(clinical_trial_filename, dtype={'id': str, 'scientific_title': str, 'journal': str}, parse_dates=['date'])
-    clinical_trials = clinical_trials.rename(columns={'scientific_title': 'title'})
-
-    logger.info('Trial: format des colonnes ...')
-    clinical_trials[['title', 'journal']] = clinical_trials[['title', 'journal']].apply(_clean_str_col, axis=1)
-
-    logger.info('Trial: suppression des clinical_trials avec titre vide ...')
-    clinical_trials = clinical_trials[(clinical_trials.title != "") & (~clinical_trials.title.isnull())]
+    logger.info('Trial: format des colonnes et suppression des clinical_trials avec titre vide ...')
+    clinical_trials = pd.concat(list(_formatted_clinical_trials_chunks(clinical_trial_filename,
+                                                                       cleaner=cleaner, cache=cache)))
 
     clinical_trials_deduplicated = clinical_trials.drop_duplicates('title')
     if clinical_trials_deduplicated.shape != clinical_trials.shape:
@@ -162,12 +376,15 @@ def read_and_format_clinical_trials(clinical_trial_filename: str) -> pd.DataFram
 def create_journal_df(clinical_trials: pd.DataFrame, pubmeds: pd.DataFrame) -> pd.DataFrame:
     """Construction du tableau de données de référence des journaux.
     Ce tableau est un référentiel des journaux présents dans les bases bruts.
+    Chaque journal reçoit un identifiant entier ``journal_id``, attribué dans l'ordre d'apparition
+    (publications puis essais cliniques): ajouter des enregistrements à la fin des fichiers bruts
+    ne modifie pas les identifiants des journaux des publications.
     Ce tableau sera exporter en fichier json sous la forme:
 
     | [
-    |    {"name":"american journal of veterinary research"},
+    |    {"journal_id":5,"name":"american journal of veterinary research"},
     |     ...,
-    |    {"name":"journal of back and musculoskeletal rehabilitation"},
+    |    {"journal_id":0,"name":"journal of back and musculoskeletal rehabilitation"},
     | ]
 
     Args:
@@ -178,23 +395,243 @@ def create_journal_df(clinical_trials: pd.DataFrame, pubmeds: pd.DataFrame) -> p
         pd.DataFrame: tableau de données
     """
     logger.info("Journal: création de la base journal de référence")
-    return pd.concat([clinical_trials[['journal']], pubmeds[['journal']]])\
-        .drop_duplicates()\
-        .dropna()\
-        .sort_values(by='journal')\
-        .rename(columns={'journal': 'name'})
+    names = pd.concat([pubmeds.journal, clinical_trials.journal]).dropna().drop_duplicates()
+    return pd.DataFrame({'journal_id': range(len(names)), 'name': names.values}).sort_values(by='name')
 
 
-def export_dfs_to_json(output_directory: str, dict_name_df: Dict[str, pd.DataFrame]) -> None:
+def encode_journal_ids(df: pd.DataFrame, journal_ids: Dict[str, int]) -> pd.DataFrame:
+    """Remplace le nom du journal (colonne journal) par son identifiant (colonne journal_id),
+    les fichiers exportés ne contiennent ainsi qu'un entier par enregistrement
+
+    Args:
+        df (pd.DataFrame): tableau des publications ou des essais cliniques
+        journal_ids (Dict[str, int]): identifiants des journaux par nom, voir :func:`~create_journal_df`
+
+    Returns:
+        pd.DataFrame: tableau de données avec la colonne journal_id (entier, vide si pas de journal)
+    """
+    journal_id = df.journal.map(journal_ids).astype('Int64')
+    return df.drop(columns='journal').assign(journal_id=journal_id)
+
+
+def export_dfs_to_json(output_directory: str, dict_name_df: Dict[str, pd.DataFrame],
+                       compression: Optional[str] = None) -> None:
     """Export des tableaux de données en json. Fonction générique
 
     Args:
         output_directory (str): chemin du répertoire de sauvegarde
         dict_name_df (Dict[str, pd.DataFrame]): dictionnaire des noms de fichier (sans extension)
                                                 et le tableau correspondant
+        compression (str, optional): compression des fichiers (gzip ou zstd, extension ``.json.gz`` ou ``.json.zst``).
+                                     Defaults to None, sans compression.
     """
     logger.info("Export des fichiers ...")
     for name, df in dict_name_df.items():
         logger.info(f"export du fichier {name}")
-        df.to_json(os.path.join(output_directory, f"{name}.json"), orient='records', date_format='iso')
+        filename = add_compression_extension(os.path.join(output_directory, f"{name}.json"), compression)
+        with open_file(filename, 'w', compression) as f:
+            df.to_json(f, orient='records', date_format='iso')
     return
+
+
+def export_dfs_to_parquet(output_directory: str, dict_name_df: Dict[str, pd.DataFrame]) -> None:
+    """Export des tableaux de données en parquet (colonnes typées et compressées), voir :mod:`~clients.parquet`
+
+    Args:
+        output_directory (str): chemin du répertoire de sauvegarde
+        dict_name_df (Dict[str, pd.DataFrame]): dictionnaire des noms de fichier (sans extension)
+                                                et le tableau correspondant
+    """
+    logger.info("Export des fichiers parquet ...")
+    for name, df in dict_name_df.items():
+        logger.info(f"export du fichier {name}")
+        write_parquet(df, os.path.join(output_directory, f"{name}.parquet"))
+
+
+OUTPUT_FORMATS = ('json', 'parquet')
+NEAR_DUPLICATES_FILE = 'near_duplicates.json'
+
+
+def export_near_duplicates_report(output_directory: str, reports: List[pd.DataFrame],
+                                  compression: Optional[str] = None) -> pd.DataFrame:
+    """Export du rapport des quasi-doublons supprimés (voir :func:`~clients.dedupe.drop_near_duplicates`)
+    dans le fichier json :data:`~NEAR_DUPLICATES_FILE`
+
+    Args:
+        output_directory (str): chemin du répertoire de sauvegarde
+        reports (List[pd.DataFrame]): rapports des différentes données
+        compression (str, optional): compression du fichier (gzip ou zstd). Defaults to None, sans compression.
+
+    Returns:
+        pd.DataFrame: rapport complet
+    """
+    report = pd.concat(reports, ignore_index=True) if reports else pd.DataFrame(columns=NEAR_DUPLICATES_COLUMNS)
+    logger.info(f"Export du rapport des {len(report)} quasi-doublons ...")
+    filename = add_compression_extension(os.path.join(output_directory, NEAR_DUPLICATES_FILE), compression)
+    with open_file(filename, 'w', compression) as f:
+        report.to_json(f, orient='records')
+    return report
+
+
+class JsonRecordsWriter():
+    """Ecriture incrémentale d'un fichier json de records, morceau par morceau.
+    Le fichier obtenu est identique à l'export du tableau complet par :func:`~export_dfs_to_json`.
+
+    Args:
+        filename (str): chemin du fichier json
+        compression (str, optional): compression du fichier, compressé au fil de l'écriture (gzip ou zstd).
+                                     Defaults to None, d'après l'extension du fichier.
+    """
+
+    def __init__(self, filename: str, compression: Optional[str] = None) -> None:
+        self.filename = filename
+        self.compression = compression
+        self.count = 0
+        self._file = None
+
+    def __enter__(self) -> "JsonRecordsWriter":
+        self._file = open_file(self.filename, 'w', self.compression)
+        self._file.write('[')
+        return self
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Ajoute les lignes du tableau au fichier
+
+        Args:
+            df (pd.DataFrame): morceau du tableau de données
+        """
+        if df.empty:
+            return
+        if self.count:
+            self._file.write(',')
+        self._file.write(df.to_json(orient='records', date_format='iso')[1:-1])
+        self.count += len(df)
+
+    def __exit__(self, *exc_info) -> None:
+        self._file.write(']')
+        self._file.close()
+
+
+def _title_key(title: Optional[str]) -> Optional[bytes]:
+    """Empreinte compacte (16 octets) d'un titre normalisé pour la déduplication
+
+    Args:
+        title (str, optional): titre normalisé (ou NaN)
+
+    Returns:
+        Optional[bytes]: empreinte du titre ou None si absent
+    """
+    if not isinstance(title, str):
+        return None
+    return hashlib.blake2b(title.encode('utf-8'), digest_size=16).digest()
+
+
+def _drop_seen_titles(df: pd.DataFrame, seen_titles: Set[Optional[bytes]]) -> pd.DataFrame:
+    """Supprime les lignes dont le titre a déjà été rencontré (dans ce morceau ou les précédents),
+    comme un drop_duplicates('title') sur le tableau complet.
+
+    Args:
+        df (pd.DataFrame): morceau du tableau de données
+        seen_titles (Set[Optional[bytes]]): empreintes des titres rencontrés, complété par la fonction
+
+    Returns:
+        pd.DataFrame: morceau dédoublonné
+    """
+    mask = []
+    for title in df.title:
+        key = _title_key(title)
+        mask.append(key not in seen_titles)
+        seen_titles.add(key)
+    return df[np.array(mask, dtype=bool)]
+
+
+def export_formatted_data_by_chunks(pubmed_files: List[str], clinical_trials_file: str, drug_file: str,
+                                    output_directory: str, chunk_size: int, cleaner: Optional[TextCleaner] = None,
+                                    workers: int = 1, output_format: str = 'json',
+                                    cache: Optional[FragmentCache] = None,
+                                    near_duplicates_threshold: Optional[float] = None,
+                                    compression: Optional[str] = None) -> None:
+    """Lecture, format et export des données brutes par morceaux de `chunk_size` lignes,
+    avec une mémoire bornée quelle que soit la taille des fichiers bruts.
+
+    Chaque morceau est nettoyé, dédoublonné sur le titre à l'aide des empreintes des titres déjà rencontrés,
+    puis ajouté au fichier json de sortie. Les fichiers produits sont identiques à ceux de
+    :func:`~clients.tasks.read_and_format_data` en mémoire (à condition que toutes les dates soient lisibles,
+    une date illisible n'invalidant ici que le morceau qui la contient).
+
+    Args:
+        pubmed_files (List[str]): chemins des données bruts
+        clinical_trials_file (str): chemin des données bruts
+        drug_file (str): chemin des données bruts
+        output_directory (str): répertoire de sauvegarde des données json
+        chunk_size (int): nombre de lignes par morceau
+        cleaner (TextCleaner, optional): nettoyage des chaines de caractère. Defaults to None, toutes les normalisations.
+        workers (int, optional): nombre de processus pour lire et formater les fichiers pubmed en parallèle,
+                                 chaque fichier étant alors lu en entier par un processus. Defaults to 1.
+        output_format (str, optional): format des fichiers exportés, json ou parquet. Defaults to 'json'.
+        cache (FragmentCache, optional): cache des fichiers nettoyés, les morceaux sont mis en cache
+                                         pour cette taille de morceau. Defaults to None, sans cache.
+        near_duplicates_threshold (float, optional): similarité des titres au-delà de laquelle les quasi-doublons
+                                                     sont supprimés, voir :func:`~clients.dedupe.drop_near_duplicates`.
+                                                     Defaults to None, doublons exacts seulement.
+        compression (str, optional): compression des fichiers json (gzip ou zstd). Defaults to None, sans compression.
+    """
+    if output_format == 'parquet':
+        writer_cls, export_dfs = ParquetRecordsWriter, export_dfs_to_parquet
+    else:
+        writer_cls = functools.partial(JsonRecordsWriter, compression=compression)
+        export_dfs = functools.partial(export_dfs_to_json, compression=compression)
+
+    def output_file(name: str) -> str:
+        filename = os.path.join(output_directory, f"{name}.{output_format}")
+        return filename if output_format == 'parquet' else add_compression_extension(filename, compression)
+    journal_ids: Dict[str, int] = {}
+    near_duplicates = []
+
+    def encode_journals(chunk: pd.DataFrame) -> pd.DataFrame:
+        for name in chunk.journal.dropna():
+            journal_ids.setdefault(name, len(journal_ids))
+        return encode_journal_ids(chunk, journal_ids)
+
+    def drop_near_duplicate_titles(chunk: pd.DataFrame, index: Optional[NearDuplicateIndex], source: str) -> pd.DataFrame:
+        if index is None:
+            return chunk
+        chunk, report = drop_near_duplicates(chunk, index, source)
+        near_duplicates.append(report)
+        return chunk
+
+    def new_index() -> Optional[NearDuplicateIndex]:
+        return NearDuplicateIndex(near_duplicates_threshold) if near_duplicates_threshold else None
+
+    logger.info("Export des fichiers par morceaux ...")
+    index = new_index()
+    seen_titles: Set[Optional[bytes]] = set()
+    with writer_cls(output_file('pubmeds')) as writer:
+        if workers > 1:
+            read_file = functools.partial(read_and_format_pubmed, cleaner=cleaner, cache=cache)
+            chunks = _map_in_order(read_file, expand_pubmed_files(pubmed_files), workers)
+        else:
+            chunks = (chunk.rename(columns={'id': 'base_id'})
+                      for pubmed_filename in expand_pubmed_files(pubmed_files)
+                      for chunk in _formatted_pubmed_chunks(pubmed_filename, chunk_size, cleaner, cache))
+        for chunk in chunks:
+            chunk = drop_near_duplicate_titles(_drop_seen_titles(chunk, seen_titles), index, 'pubmed')
+            writer.write(encode_journals(chunk))
+    logger.info(f"Pubmed: {writer.count} publications exportées.")
+
+    index = new_index()
+    seen_titles = set()
+    with writer_cls(output_file('clinical_trials')) as writer:
+        for chunk in _formatted_clinical_trials_chunks(clinical_trials_file, chunk_size, cleaner, cache):
+            chunk = _drop_seen_titles(chunk, seen_titles).rename(columns={'id': 'base_id'})
+            chunk = drop_near_duplicate_titles(chunk, index, 'clinical_trials')
+            writer.write(encode_journals(chunk))
+    logger.info(f"Trial: {writer.count} essais cliniques exportés.")
+
+    logger.info("Journal: création de la base journal de référence")
+    export_dfs(output_directory, {
+        'journals': pd.DataFrame({'journal_id': list(journal_ids.values()), 'name': list(journal_ids)}).sort_values(by='name'),
+        'drugs': read_and_format_drugs(drug_file, cleaner, cache)
+    })
+    if near_duplicates_threshold:
+        export_near_duplicates_report(output_directory, near_duplicates, compression)
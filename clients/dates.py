@@ -0,0 +1,106 @@
+"""Module de normalisation des dates.
+
+Les dates des fichiers bruts sont des chaines de caractère de formats variés
+(``01/02/2020``, ``1 January 2020``, ``2020-01-01``, ...) mais peu nombreuses
+par rapport au nombre de lignes. Chaque date distincte n'est donc convertie qu'une fois,
+puis le résultat est réparti sur les lignes (``pd.factorize``): le coût dépend du nombre
+de dates distinctes et non du nombre de lignes.
+"""
+
+from typing import Any, Optional, Sequence, Tuple
+import re
+import numpy as np
+import pandas as pd
+
+NO_DATE = np.iinfo(np.int64).min
+# nanoseconds in a day
+DAY = 86400 * 10 ** 9
+# dates without time, in the formats of the raw files (2020-01-01, 01/02/2020, 1 January 2020)
+_DATE_ONLY = re.compile(r'\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{4}|\d{1,2} [A-Za-z]+ \d{4}')
+
+
+def normalize_dates(col: pd.Series) -> pd.Series:
+    """Convertit une colonne de dates au format texte en dates (datetime64), chaque date distincte
+    n'étant lue qu'une fois. Le résultat est celui de ``parse_dates`` de ``pd.read_csv``
+    (mois avant jour pour ``01/02/2020``): si une date est illisible, la colonne est retournée inchangée.
+    Les colonnes qui ne contiennent pas de chaines de caractère sont retournées inchangées.
+
+    Args:
+        col (pd.Series): colonne de dates au format texte
+
+    Returns:
+        pd.Series: colonne de dates (datetime64[ns], NaT si absente)
+    """
+    if col.dtype != object:
+        return col
+    codes, uniques = pd.factorize(col)
+    try:
+        parsed = pd.to_datetime(uniques, errors='raise')
+    except (ValueError, OverflowError, TypeError):
+        return col
+    if not len(uniques):
+        values = np.full(len(col), np.datetime64('NaT'), dtype='datetime64[ns]')
+    else:
+        values = parsed.values.take(codes)
+        values[codes < 0] = np.datetime64('NaT')
+    return pd.Series(values, index=col.index, name=col.name)
+
+
+def parse_epochs(dates: Sequence[Optional[str]]) -> np.ndarray:
+    """Convertit des dates au format texte en nombre de nanosecondes depuis epoch (UTC),
+    chaque date distincte n'étant lue qu'une fois
+
+    Args:
+        dates (Sequence[Optional[str]]): dates au format texte
+
+    Returns:
+        np.ndarray: timestamps epoch en nanosecondes (int64), NO_DATE si absente ou illisible
+    """
+    codes, uniques = pd.factorize(pd.Series(list(dates), dtype=object))
+    timestamps = pd.to_datetime(uniques, errors='coerce', utc=True)
+    epochs = np.where(timestamps.isna(), NO_DATE, timestamps.asi8)
+    return np.where(codes < 0, NO_DATE, epochs.take(codes) if len(epochs) else NO_DATE).astype(np.int64)
+
+
+def is_date_only(date: Any) -> bool:
+    """Indique si une date au format texte est un jour sans heure, dans l'un des formats des fichiers bruts
+    (``2020-01-01``, ``01/02/2020``, ``1 January 2020``)
+
+    Args:
+        date (Any): date au format texte
+
+    Returns:
+        bool: True si la date est un jour sans heure
+    """
+    return isinstance(date, str) and _DATE_ONLY.fullmatch(date.strip()) is not None
+
+
+def parse_date_range(date_from: Optional[str], date_to: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Convertit une période (filtre des requêtes) en dates epoch (ns). Les dates absentes (NO_DATE)
+    sont hors de toute période. Une date de fin sans heure (``2019-12-31``, voir :func:`~is_date_only`)
+    désigne la fin de ce jour: les mentions datées à une heure quelconque de ce jour sont dans la période.
+    Une date avec une heure (``2019-12-31T10``) est une borne exacte.
+
+    Args:
+        date_from (Optional[str]): date de début, incluse (None: sans limite)
+        date_to (Optional[str]): date de fin, incluse, jusqu'à la fin du jour si sans heure (None: sans limite)
+
+    Raises:
+        ValueError: date illisible
+
+    Returns:
+        Optional[Tuple[int, int]]: dates epoch de début et de fin, incluses, ou None sans période
+    """
+    if date_from is None and date_to is None:
+        return
+    bounds = []
+    for date, default, end in [(date_from, NO_DATE + 1, False), (date_to, np.iinfo(np.int64).max, True)]:
+        if date is not None and not isinstance(date, str):
+            raise ValueError(f"date illisible {date!r}")
+        epoch = default if date is None else int(parse_epochs([date])[0])
+        if epoch == NO_DATE:
+            raise ValueError(f"date illisible {date}")
+        if end and is_date_only(date):
+            epoch += DAY - 1
+        bounds.append(epoch)
+    return tuple(bounds)
@@ -0,0 +1,168 @@
+"""Module de détection des titres quasi identiques (MinHash et LSH).
+
+Les titres sont découpés en n-grammes de caractères (après suppression de la ponctuation),
+résumés par une signature MinHash puis rangés dans les seaux d'un index LSH (locality-sensitive hashing)
+par bandes de la signature. Seuls les titres partageant un seau sont comparés:
+le coût est linéaire en nombre de titres au lieu d'une comparaison de toutes les paires.
+"""
+
+from typing import Dict, List, Optional, Tuple
+import logging
+import re
+import zlib
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_NOT_WORD = re.compile(r'[\W_]+')
+
+
+def title_shingles(title: str, size: int = 3) -> List[str]:
+    """N-grammes de caractères d'un titre, sans ponctuation ni différence de casse
+
+    Args:
+        title (str): titre
+        size (int, optional): taille des n-grammes. Defaults to 3.
+
+    Returns:
+        List[str]: n-grammes distincts (le titre normalisé s'il est plus court)
+    """
+    normalized = _NOT_WORD.sub(' ', title.lower()).strip()
+    if len(normalized) <= size:
+        return [normalized]
+    return list({normalized[i:i + size] for i in range(len(normalized) - size + 1)})
+
+
+def _lsh_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """Choix du nombre de bandes et de lignes par bande de l'index LSH, minimisant la somme
+    des probabilités de faux positifs (similarité sous le seuil) et de faux négatifs (au-dessus)
+
+    Args:
+        threshold (float): seuil de similarité
+        num_perm (int): taille des signatures
+
+    Returns:
+        Tuple[int, int]: nombre de bandes, nombre de lignes par bande
+    """
+    similarities = np.linspace(0, 1, 201)
+    below = similarities <= threshold
+    best, best_error = (1, num_perm), None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        probabilities = 1 - (1 - similarities ** rows) ** bands
+        error = np.trapz(probabilities[below], similarities[below]) + \
+            np.trapz(1 - probabilities[~below], similarities[~below])
+        if best_error is None or error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class NearDuplicateIndex():
+    """Index LSH des titres conservés. Chaque nouveau titre est comparé aux titres conservés
+    de ses seaux: s'il est assez proche de l'un d'eux, c'est un quasi-doublon, sinon il est conservé.
+    Le premier titre rencontré est conservé (comme ``drop_duplicates``), l'index peut donc être
+    alimenté morceau par morceau avec le même résultat.
+
+    La similarité est l'estimation MinHash de l'indice de Jaccard des n-grammes (proportion de valeurs
+    égales des signatures), son écart-type est d'environ 0.04 avec 128 permutations.
+
+    Args:
+        threshold (float, optional): similarité minimale d'un quasi-doublon, entre 0 et 1. Defaults to 0.8.
+        num_perm (int, optional): nombre de permutations (taille des signatures). Defaults to 128.
+        shingle_size (int, optional): taille des n-grammes de caractères. Defaults to 3.
+        seed (int, optional): graine des permutations. Defaults to 1.
+
+    Raises:
+        ValueError: le seuil doit être compris entre 0 et 1
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, shingle_size: int = 3, seed: int = 1) -> None:
+        if not 0 < threshold <= 1:
+            raise ValueError("le seuil doit être compris entre 0 et 1")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        generator = np.random.RandomState(seed)
+        # a * hash + b stays below 2 ** 64 with 32 bits hashes
+        self._a = generator.randint(1, 1 << 32, size=(num_perm, 1), dtype=np.uint64)
+        self._b = generator.randint(0, 1 << 32, size=(num_perm, 1), dtype=np.uint64)
+        self.bands, self.rows = _lsh_bands(threshold, num_perm)
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self._signatures: List[np.ndarray] = []
+        self.labels: List[object] = []
+
+    def signature(self, title: str) -> np.ndarray:
+        """Signature MinHash d'un titre
+
+        Args:
+            title (str): titre
+
+        Returns:
+            np.ndarray: signature (num_perm valeurs uint64)
+        """
+        hashes = np.array([zlib.crc32(shingle.encode('utf-8')) for shingle in title_shingles(title, self.shingle_size)],
+                          dtype=np.uint64)
+        return (((self._a * hashes + self._b) % _MERSENNE_PRIME) & _MAX_HASH).min(axis=1)
+
+    def add(self, title: str, label: object = None) -> Optional[Tuple[object, float]]:
+        """Ajoute un titre à l'index, sauf s'il est un quasi-doublon d'un titre déjà conservé
+
+        Args:
+            title (str): titre
+            label (object, optional): étiquette du titre (identifiant), retournée pour ses quasi-doublons.
+                                      Defaults to None.
+
+        Returns:
+            Optional[Tuple[object, float]]: étiquette du titre conservé le plus proche et similarité,
+                                            None si le titre est conservé
+        """
+        signature = self.signature(title)
+        keys = [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+        candidates = {position for buckets, key in zip(self._buckets, keys) for position in buckets.get(key, ())}
+        best: Optional[Tuple[float, int]] = None
+        for position in candidates:
+            similarity = float(np.mean(self._signatures[position] == signature))
+            if similarity >= self.threshold and (best is None or (similarity, -position) > (best[0], -best[1])):
+                best = (similarity, position)
+        if best is not None:
+            return self.labels[best[1]], best[0]
+
+        position = len(self._signatures)
+        self._signatures.append(signature)
+        self.labels.append(label)
+        for buckets, key in zip(self._buckets, keys):
+            buckets.setdefault(key, []).append(position)
+        return None
+
+
+NEAR_DUPLICATES_COLUMNS = ['source', 'base_id', 'title', 'duplicate_of', 'duplicate_of_title', 'similarity']
+
+
+def drop_near_duplicates(df: pd.DataFrame, index: NearDuplicateIndex,
+                         source: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Supprime les lignes dont le titre est un quasi-doublon d'un titre déjà conservé
+    (dans ce tableau ou ceux déjà passés par l'index)
+
+    Args:
+        df (pd.DataFrame): tableau de données formaté (colonnes base_id et title)
+        index (NearDuplicateIndex): index des titres conservés, complété par la fonction
+        source (str): nom des données pour le rapport (pubmed, clinical_trials)
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: tableau sans quasi-doublon, rapport des lignes supprimées
+                                           (voir :data:`~NEAR_DUPLICATES_COLUMNS`)
+    """
+    mask = []
+    merged = []
+    for base_id, title in zip(df.base_id, df.title):
+        match = index.add(title, (base_id, title)) if isinstance(title, str) else None
+        mask.append(match is None)
+        if match is not None:
+            (kept_id, kept_title), similarity = match
+            merged.append((source, base_id, title, kept_id, kept_title, similarity))
+    if merged:
+        logger.info(f"{source}: {len(merged)} quasi-doublons par titre ont été supprimés.")
+    return df[np.array(mask, dtype=bool)], pd.DataFrame(merged, columns=NEAR_DUPLICATES_COLUMNS)
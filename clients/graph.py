@@ -1,18 +1,85 @@
 """Modules de définition des entités du projet représenant un Graph"""
 
-from typing import ClassVar, Optional, Union, List, Dict
+from typing import ClassVar, Iterator, Optional, Union, List, Dict, Set, Tuple
+import functools
 import json
+import sys
 from abc import ABC
+from collections import Counter
 from dataclasses import dataclass, field
 import dataclasses
-import dacite
 from pprint import pprint
 import logging
+import numpy as np
+from clients.compression import open_file
+from clients.dates import parse_date_range, parse_epochs
+from clients.matching import find_mentions
+from clients.parquet import read_parquet_records
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
 
 
 logger = logging.getLogger(__name__)
 
+GRAPH_FORMAT_VERSION = 2
+
+
+def _add_slots(cls):
+    """Décorateur recréant une dataclass avec des ``__slots__`` (sans ``__dict__`` par instance).
+    Equivalent de ``dataclass(slots=True)`` disponible à partir de python 3.10.
+
+    Args:
+        cls (__class__): dataclass à recréer
+
+    Returns:
+        __class__: dataclass avec ``__slots__``
+    """
+    field_names = tuple(f.name for f in dataclasses.fields(cls))
+    inherited_slots = {slot for base in cls.__mro__[1:] for slot in getattr(base, '__slots__', ())}
+    cls_dict = dict(cls.__dict__)
+    cls_dict['__slots__'] = tuple(name for name in field_names if name not in inherited_slots)
+    for name in field_names:
+        # defaults are kept by the generated __init__, class attributes would shadow the slots
+        cls_dict.pop(name, None)
+    cls_dict.pop('__dict__', None)
+    cls_dict.pop('__weakref__', None)
+
+    # the generated __init__ relies on class attributes for the defaults of init=False fields
+    init_false_defaults = {f.name: f.default for f in dataclasses.fields(cls)
+                           if not f.init and f.default is not dataclasses.MISSING}
+    if init_false_defaults:
+        dataclass_init = cls_dict['__init__']
+
+        @functools.wraps(dataclass_init)
+        def __init__(self, *args, **kwargs):
+            for name, value in init_false_defaults.items():
+                object.__setattr__(self, name, value)
+            dataclass_init(self, *args, **kwargs)
+        cls_dict['__init__'] = __init__
+
+    slotted_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+    slotted_cls.__qualname__ = cls.__qualname__
+    return slotted_cls
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    """Partage en mémoire les chaines de caractère répétées (noms, dates)
+
+    Args:
+        value (Optional[str]): chaine de caractère
+
+    Returns:
+        Optional[str]: chaine de caractère internée
+    """
+    if type(value) is str:
+        return sys.intern(value)
+    return value
 
+
+@_add_slots
 @dataclass
 class Node(ABC):
     """Classe abstraite représentant un noeud du graph
@@ -41,9 +108,10 @@ class Node(ABC):
         Returns:
             dict: clés: id, type
         """
-        return dataclasses.asdict(self)
+        return {f.name: getattr(self, f.name) for f in dataclasses.fields(self)}
 
 
+@_add_slots
 @dataclass
 class Drug(Node):
     """Noeud représentant une molécule hérité de Node
@@ -58,7 +126,7 @@ class Drug(Node):
 
     def __post_init__(self) -> None:
 
-        self.name = self.name.lower().strip()
+        self.name = _intern(self.name.lower().strip())
 
     def is_name_mentionned(self, content: str) -> bool:
         """Permet de tester si le nom de la molécule est
@@ -73,6 +141,7 @@ class Drug(Node):
         return self.name in content
 
 
+@_add_slots
 @dataclass
 class Publication(Node):
     """Noeud représentant une Publication hérité de Node
@@ -87,7 +156,11 @@ class Publication(Node):
     date: Optional[str] = None
     base_id: Optional[int] = None
 
+    def __post_init__(self) -> None:
+        self.date = _intern(self.date)
+
 
+@_add_slots
 @dataclass
 class ClinicalTrial(Node):
     """Noeud représentant un ClinicalTrial hérité de Node
@@ -102,7 +175,11 @@ class ClinicalTrial(Node):
     date: Optional[str] = None
     base_id: Optional[str] = None
 
+    def __post_init__(self) -> None:
+        self.date = _intern(self.date)
+
 
+@_add_slots
 @dataclass
 class Journal(Node):
     """Noeud représentant un Journal hérité de Node
@@ -113,7 +190,11 @@ class Journal(Node):
     type: int = field(default=Node.JOURNAL_NODE, init=False)
     name: str
 
+    def __post_init__(self) -> None:
+        self.name = _intern(self.name)
+
 
+@_add_slots
 @dataclass
 class Link(ABC):
     """Classe abstraite représentant une liaison entre deux noeuds
@@ -139,6 +220,7 @@ class Link(ABC):
     MENTIONNED_LINK: ClassVar[int] = 2
 
     def __post_init__(self):
+        self.date = _intern(self.date)
         self.build_id()
 
     def build_id(self) -> None:
@@ -169,6 +251,8 @@ class PublishedLink(Link):
         TypeError: node_b must be instance of Publication or ClinicalTrial
 
     """
+    __slots__ = ()
+
     node_a: Journal
     node_b: Union[ClinicalTrial, Publication]
 
@@ -189,24 +273,30 @@ class MentionnedLink(Link):
     Attributes:
         node_a (Drug): Noeud représentant la molécule mentionnée
         node_b (Union[ClinicalTrial, Publication, Journal]): Noeud de la mention
-        mention_type (str): détails de la mention (MENTION_*)
+        mention_type (int): détails de la mention (MENTION_*), égal au type du noeud B
 
-    |  MENTION_CLINICAL_TRIAL: clinical_trial, la molécule est mentionnée dans un essai clinique
-    |  MENTION_PUBLICATION: publication, la molécule est mentionnée dans une publication
-    |  MENTION_JOURNAL: journal, la molécule est mentionnée dans un journal
+    |  MENTION_PUBLICATION: 1, la molécule est mentionnée dans une publication
+    |  MENTION_CLINICAL_TRIAL: 2, la molécule est mentionnée dans un essai clinique
+    |  MENTION_JOURNAL: 3, la molécule est mentionnée dans un journal
 
     Raises:
         TypeError: node_a must be instance of Drug
         TypeError: node_b must be instance of Publication, ClinicalTrial or Journal
 
     """
+    __slots__ = ('mention_type',)
+
     node_a: Drug
     node_b: Union[ClinicalTrial, Publication, Journal]
-    mention_type: str = field(init=False)
+    mention_type: int
 
-    MENTION_CLINICAL_TRIAL: ClassVar[str] = "clinical_trial"
-    MENTION_PUBLICATION: ClassVar[str] = "publication"
-    MENTION_JOURNAL: ClassVar[str] = "journal"
+    MENTION_PUBLICATION: ClassVar[int] = Node.PUBLICATION_NODE
+    MENTION_CLINICAL_TRIAL: ClassVar[int] = Node.CLINICAL_TRIAL_NODE
+    MENTION_JOURNAL: ClassVar[int] = Node.JOURNAL_NODE
+    # names of the mention types on the command line
+    MENTION_TYPES: ClassVar[Dict[str, int]] = {'publication': MENTION_PUBLICATION,
+                                               'clinical_trial': MENTION_CLINICAL_TRIAL,
+                                               'journal': MENTION_JOURNAL}
 
     def __post_init__(self):
         if not isinstance(self.node_a, Drug):
@@ -224,6 +314,32 @@ class MentionnedLink(Link):
         return super().__post_init__()
 
 
+def _mention_order(node: Union[Publication, ClinicalTrial]) -> tuple:
+    """Ordre de construction des mentions : les publications avant les essais cliniques,
+    puis par identifiant de noeud.
+
+    Args:
+        node (Union[Publication, ClinicalTrial]): noeud de la mention
+
+    Returns:
+        tuple: clé de tri
+    """
+    return (node.type != Node.PUBLICATION_NODE, node.id)
+
+
+NODE_CLASSES: Dict[int, type] = {
+    Node.PUBLICATION_NODE: Publication,
+    Node.CLINICAL_TRIAL_NODE: ClinicalTrial,
+    Node.JOURNAL_NODE: Journal,
+    Node.DRUG_NODE: Drug
+}
+
+LINK_CLASSES: Dict[int, type] = {
+    Link.PUBLISHED_LINK: PublishedLink,
+    Link.MENTIONNED_LINK: MentionnedLink
+}
+
+
 @dataclass
 class Graph():
     """Classe représentant un graph composé de noeuds et de liaisons
@@ -233,14 +349,75 @@ class Graph():
         nodes (list): ensembe des noeuds du graph
         links (list): ensemble des liaisons du graph
         _journal_lookup (dict): attribut facilitant l'accès aux journaux par titre
-        _links_id (list): attribut listant les identifiants des liaisons
+
+    Les liaisons sont indexées (hors attributs de la dataclass, donc non exportées):
+
+    |  _links_position (dict): position de la liaison dans links par identifiant de liaison
+    |  _links_by_node (dict): positions des liaisons par identifiant de noeud (A ou B)
+    |  _links_by_type (dict): positions des liaisons par type de liaison
+    |  _journal_links_by_node (dict): liaison de publication par identifiant du noeud B
+    |  _drugs_by_journal (dict): noms des molécules mentionnées par (nom, identifiant) de journal,
+    |                            l'agrégat de :func:`~Graph.get_journals_drugs`
+    |  _links_epochs (np.ndarray): date epoch (ns) de chaque liaison, calculée à la première requête filtrée
+    |  _mentions_by_date (dict): dates epoch triées et positions des liaisons de mention par identifiant
+    |                            de molécule, construites à la première requête filtrée de la molécule
+
+    Les journaux sont également indexés par identifiant de journal de l'étape data (``journal_id``,
+    voir :func:`~clients.data.create_journal_df`) pendant la construction: ``_journals_by_id``.
+    Les molécules sont indexées par nom: ``_drugs_by_name``, positions des noeuds molécule dans nodes.
 
     """
     id_state: int = field(default=0, init=False)
     nodes: List[Union[Drug, Journal, Publication, ClinicalTrial]] = field(default_factory=list, init=False)
     links: List[Union[MentionnedLink, PublishedLink]] = field(default_factory=list, init=False)
     _journals_lookup: Dict[str, Journal] = field(default_factory=dict, init=False, repr=False)
-    _links_id: List[str] = field(default_factory=list, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._journals_by_id: Dict[int, Journal] = {}
+        self._build_drugs_index()
+        self._build_links_index()
+
+    def _build_drugs_index(self) -> None:
+        """Construit l'index des molécules par nom à partir de l'attribut nodes.
+        A appeler si l'attribut nodes est modifié sans passer par :func:`~Graph._build_nodes_from_list`.
+        """
+        self._drugs_by_name: Dict[str, List[int]] = {}
+        for position, node in enumerate(self.nodes):
+            if node.type == Node.DRUG_NODE:
+                self._drugs_by_name.setdefault(node.name, []).append(position)
+
+    def _build_links_index(self) -> None:
+        """Construit les index des liaisons à partir de l'attribut links.
+        A appeler si l'attribut links est modifié sans passer par :func:`~Graph._build_link`.
+        """
+        self._links_position: Dict[str, int] = {}
+        self._links_by_node: Dict[int, List[int]] = {}
+        self._links_by_type: Dict[int, List[int]] = {}
+        self._journal_links_by_node: Dict[int, PublishedLink] = {}
+        self._drugs_by_journal: Dict[Tuple[str, int], Set[str]] = {}
+        self._links_epochs: np.ndarray = np.empty(0, dtype=np.int64)
+        self._mentions_by_date: Dict[int, Tuple[np.ndarray, List[int]]] = {}
+        for position, link in enumerate(self.links):
+            self._index_link(position, link)
+
+    def _index_link(self, position: int, link: Link) -> None:
+        """Ajoute une liaison aux index
+
+        Args:
+            position (int): position de la liaison dans l'attribut links
+            link (Link): liaison à indexer
+        """
+        self._links_position[link.id] = position
+        self._links_by_node.setdefault(link.node_a.id, []).append(position)
+        if link.node_b.id != link.node_a.id:
+            self._links_by_node.setdefault(link.node_b.id, []).append(position)
+        self._links_by_type.setdefault(link.type, []).append(position)
+        if link.type == Link.PUBLISHED_LINK:
+            self._journal_links_by_node.setdefault(link.node_b.id, link)
+        else:
+            self._mentions_by_date.pop(link.node_a.id, None)
+            if link.mention_type == MentionnedLink.MENTION_JOURNAL:
+                self._drugs_by_journal.setdefault((link.node_b.name, link.node_b.id), set()).add(link.node_a.name)
 
     @property
     def journals_lookup(self) -> dict:
@@ -275,9 +452,10 @@ class Graph():
             names (List[str]): liste des noms de molécule
 
         Returns:
-            List[Drug]: list des objets Drug
+            List[Drug]: list des objets Drug, dans l'ordre des noeuds
         """
-        return [drug for drug in self.nodes if drug.type == Node.DRUG_NODE and drug.name in names]
+        positions = {position for name in set(names) for position in self._drugs_by_name.get(name, [])}
+        return [self.nodes[position] for position in sorted(positions)]
 
     def look_for_links_by_nodes(self, nodes: List[Node], link_type: int = None) -> List[Link]:
         """Retrouve les liaisons incluant les noeuds en paramètres
@@ -289,13 +467,25 @@ class Graph():
         Returns:
             List[Link]: list des liaisons retrouvées
         """
-        nodes_ids = [node.id for node in nodes]
-        results_links: List[Link] = []
-        results_links = [link for link in self.links if (link.node_a.id in nodes_ids or link.node_b.id in nodes_ids)]
+        positions = set()
+        for node in nodes:
+            positions.update(self._links_by_node.get(node.id, []))
+        results_links: List[Link] = [self.links[position] for position in sorted(positions)]
         if link_type:
             results_links = [link for link in results_links if link.type == link_type]
         return results_links
 
+    def look_for_links_by_type(self, link_type: int) -> List[Link]:
+        """Retrouve les liaisons d'un type donné
+
+        Args:
+            link_type (int): type de liaison à retrouver
+
+        Returns:
+            List[Link]: list des liaisons retrouvées
+        """
+        return [self.links[position] for position in self._links_by_type.get(link_type, [])]
+
     def look_for_journal(self, name: str) -> Optional[Journal]:
         """Retrouve un journal par son nom
 
@@ -311,22 +501,18 @@ class Graph():
             return self.journals_lookup[name]
         return
 
-    def look_for_journal_link(self, node_b: Union[Publication, ClinicalTrial]) -> Optional[Journal]:
+    def look_for_journal_link(self, node_b: Union[Publication, ClinicalTrial]) -> Optional[PublishedLink]:
         """Retrouve un journal par sa liaison de publication avec le noeud B,
         autrement dit, si une publication ou un essai clinique est publié dans un journal,
-        ce dernier est renvoyé. Recherche non optimisée.
+        la liaison de publication est renvoyée.
 
         Args:
             node_b (Union[Publication, ClinicalTrial]): noeud publication ou essai clinique
 
         Returns:
-            Optional[Journal]: le journal ou None sinon
+            Optional[PublishedLink]: la liaison de publication ou None sinon
         """
-        for journal_link in self.links:
-            if journal_link.type == Link.PUBLISHED_LINK:
-                if journal_link.node_b.id == node_b.id:
-                    return journal_link
-        return
+        return self._journal_links_by_node.get(node_b.id)
 
     def get_id_and_increment(self) -> int:
         """Retourne l'identifiant interne et l'incrémente ensuite.
@@ -339,9 +525,10 @@ class Graph():
         return self.id_state - 1
 
     def build_graph(self, drug_file: str, journal_file: str, pubmed_file: str,
-                    clinical_trial_file: str) -> "Graph":
+                    clinical_trial_file: str, workers: int = 1) -> "Graph":
         """Methode principale pour construire l'objet graph depuis les fichiers
         json formatté depuis l'étape data et en particulier la fonction :func:`~clients.data.export_dfs_to_json`.
+        Les fichiers parquet (extension ``.parquet``, voir :func:`~clients.data.export_dfs_to_parquet`) sont aussi acceptés.
         L'ordre de construction est important pour prendre en compte les liaisons avec les journaux.
 
         Args:
@@ -349,6 +536,7 @@ class Graph():
             journal_file (str): fichier json des journaux
             pubmed_file (str): fichier json des publications pubmeds
             clinical_trial_file (str): fichier json des essais cliniqquqes
+            workers (int, optional): nombre de processus pour la recherche des mentions. Defaults to 1.
 
         Returns:
             Graph: objet graph complet
@@ -366,27 +554,136 @@ class Graph():
         # -> ClinicalTrial
         clinical_trial_nodes: List[ClinicalTrial] = self._build_nodes_from_json_file_(clinical_trial_file, ClinicalTrial)
 
-        self._build_mentions(drug_nodes, publication_nodes, clinical_trial_nodes)
+        self._build_mentions(drug_nodes, publication_nodes, clinical_trial_nodes, workers=workers)
 
         return self
 
+    def extend_graph(self, drug_file: Optional[str] = None, journal_file: Optional[str] = None,
+                     pubmed_file: Optional[str] = None, clinical_trial_file: Optional[str] = None,
+                     workers: int = 1) -> "Graph":
+        """Methode pour compléter un graph existant avec les nouveaux enregistrements des fichiers json
+        (voir :func:`~Graph.build_graph`), sans reconstruire tout le graph.
+
+        Seuls les enregistrements absents du graph sont ajoutés, ainsi que leurs liaisons de publication
+        et de mention. Les titres existants ne sont parcourus que pour les nouvelles molécules.
+        Le fichier des journaux est nécessaire pour relier les nouvelles publications par identifiant de journal.
+        L'hypothèse est que les fichiers sont complétés par la fin (ajout seulement) : le graph obtenu
+        est alors identique à une reconstruction complète, aux identifiants des noeuds près.
+        Un fichier à None n'est pas relu.
+
+        Args:
+            drug_file (str, optional): fichier json des molécules. Defaults to None.
+            journal_file (str, optional): fichier json des journaux. Defaults to None.
+            pubmed_file (str, optional): fichier json des publications pubmeds. Defaults to None.
+            clinical_trial_file (str, optional): fichier json des essais cliniques. Defaults to None.
+            workers (int, optional): nombre de processus pour la recherche des mentions. Defaults to 1.
+
+        Returns:
+            Graph: objet graph complété
+        """
+        logger.info("Mise à jour du graph...")
+        drug_nodes: List[Drug] = [node for node in self.nodes if node.type == Node.DRUG_NODE]
+        nodes_with_title: List[Union[Publication, ClinicalTrial]] = \
+            [node for node in self.nodes if node.type == Node.PUBLICATION_NODE] + \
+            [node for node in self.nodes if node.type == Node.CLINICAL_TRIAL_NODE]
+
+        logger.info("Construction des nouveaux noeuds.")
+        new_nodes: Dict[type, List[Node]] = {}
+        for filename, cls in [(drug_file, Drug), (journal_file, Journal),
+                              (pubmed_file, Publication), (clinical_trial_file, ClinicalTrial)]:
+            new_nodes[cls] = []
+            if filename:
+                records = self._read_records(filename, cls)
+                if cls is Journal:
+                    self._index_journal_ids(records)
+                new_records = self._filter_new_records(records, cls)
+                new_nodes[cls] = self._build_nodes_from_list(new_records, cls)
+            logger.info(f"{len(new_nodes[cls])} nouveaux noeuds {cls.__name__}.")
+
+        logger.info("Construction des nouvelles mentions.")
+        # all drugs in the new titles, new drugs in the former titles
+        mention_links = self._build_title_mentions(
+            drug_nodes + new_nodes[Drug], new_nodes[Publication] + new_nodes[ClinicalTrial], workers=workers)
+        mention_links += self._build_title_mentions(new_nodes[Drug], nodes_with_title, workers=workers)
+        self._update_journal_mentions(mention_links)
+
+        return self
+
+    def _read_records(self, filename: str, cls) -> List[dict]:
+        """Methode privée de lecture des enregistrements d'un fichier json (compressé ou non)
+        ou parquet (extension ``.parquet``). Seules les colonnes utiles au type de noeud sont lues dans un fichier parquet.
+
+        Args:
+            filename (str): chemin du fichier json ou parquet
+            cls (__class__): classe du type de noeud (Drug, Publication, ClinicalTrial, Journal)
+
+        Returns:
+            List[dict]: list des enregistrements
+        """
+        if filename.endswith('.parquet'):
+            columns = [f.name for f in dataclasses.fields(cls) if f.init and f.name != 'id']
+            if cls in (Publication, ClinicalTrial):
+                columns += ['journal', 'journal_id']
+            elif cls is Journal:
+                columns.append('journal_id')
+            return read_parquet_records(filename, columns=columns)
+        with open_file(filename) as f:
+            return json.load(f)
+
+    def _index_journal_ids(self, content: List[dict]) -> None:
+        """Methode privée indexant les journaux existants du graph par identifiant de journal
+
+        Args:
+            content (List[dict]): enregistrements des journaux (nom et identifiant)
+        """
+        for infos in content:
+            journal_node = self.look_for_journal(infos.get('name'))
+            if journal_node is not None and infos.get('journal_id') is not None:
+                self._journals_by_id[infos['journal_id']] = journal_node
+
+    def _filter_new_records(self, content: List[dict], cls) -> List[dict]:
+        """Methode privée retournant les enregistrements qui ne sont pas encore des noeuds du graph.
+        Les enregistrements sont comparés aux noeuds sur leurs attributs (hors identifiants et journal),
+        en tenant compte des doublons.
+
+        Args:
+            content (List[dict]): list de dictionnaire
+            cls (__class__): classe du type de noeud (Drug, Publication, ClinicalTrial, Journal)
+
+        Returns:
+            List[dict]: enregistrements absents du graph
+        """
+        def node_key(node: Node) -> tuple:
+            return tuple(getattr(node, f.name) for f in dataclasses.fields(node) if f.name not in ('id', 'type'))
+
+        known_keys = Counter(node_key(node) for node in self.nodes if isinstance(node, cls))
+        new_records = []
+        for infos in content:
+            key = node_key(cls(id=None, **{k: v for k, v in infos.items() if k not in ('journal', 'journal_id')}))
+            if known_keys[key]:
+                known_keys[key] -= 1
+            else:
+                new_records.append(infos)
+        return new_records
+
     def _build_nodes_from_json_file_(self, filename: str, cls) -> List[Node]:
-        """Methode privée pour construire les noeuds à partir d'un fichier json
+        """Methode privée pour construire les noeuds à partir d'un fichier json ou parquet
 
         Args:
-            filename (str): chemin du fichier json
+            filename (str): chemin du fichier json ou parquet
             cls (__class__): classe du type de noeud (Drug, Publication, ClinicalTrial, Journal)
 
         Returns:
             List[Node]: list des noeuds construits
         """
-        with open(filename, 'r') as f:
-            json_content = json.load(f)
-        return self._build_nodes_from_list(json_content, cls)
+        return self._build_nodes_from_list(self._read_records(filename, cls), cls)
 
     def _build_nodes_from_list(self, content: List[dict], cls) -> List[Node]:
         """Methode privée pour construire les noeuds à partir d'un dictionnaire.
-        Les liens de publications sont également construits en même temps.
+        Les liens de publications sont également construits en même temps
+        et indexés par noeud publié (voir :func:`~Graph.look_for_journal_link`).
+        Le journal d'une publication est retrouvé par son identifiant ``journal_id`` s'il est présent,
+        sinon par son nom ``journal`` (fichiers produits avant les identifiants de journaux).
 
         Args:
             content (List[dict]): list de dictionnaire
@@ -399,11 +696,14 @@ class Graph():
 
         for infos in content:
             journal_node = None
-            journal_name = None
-            if cls.__name__ in ['Publication', 'ClinicalTrial'] and 'journal' in infos:
-                journal_name = infos.pop('journal')
+            journal_id = infos.pop('journal_id', None)
+            if cls.__name__ in ['Publication', 'ClinicalTrial']:
+                journal_name = infos.pop('journal', None)
                 # /!\ don't create journal node if doesn't exist
-                journal_node = self.look_for_journal(journal_name)
+                if journal_id is not None:
+                    journal_node = self._journals_by_id.get(journal_id)
+                else:
+                    journal_node = self.look_for_journal(journal_name)
 
             node = cls(
                 id=self.get_id_and_increment(),
@@ -413,33 +713,36 @@ class Graph():
 
             if journal_node:
                 self._build_link(journal_node, node, node.date, PublishedLink)
+            elif cls is Journal:
+                self.journals_lookup[node.name] = node
+                if journal_id is not None:
+                    self._journals_by_id[journal_id] = node
 
             current_nodes.append(node)
 
+        if cls is Drug:
+            for position, node in enumerate(current_nodes, len(self.nodes)):
+                self._drugs_by_name.setdefault(node.name, []).append(position)
         self.nodes += current_nodes
 
         return current_nodes
 
     def _build_mentions(self, drug_nodes: List[Drug], publication_nodes: List[Publication],
-                        clinical_trial_nodes: List[ClinicalTrial]) -> None:
+                        clinical_trial_nodes: List[ClinicalTrial], workers: int = 1) -> None:
         """Methode construisant les liens de mention des molécules.
 
         Args:
             drug_nodes (List[Drug]): liste des noeuds des molécules
             publication_nodes (List[Publication]): liste des noeuds des publications
             clinical_trial_nodes (List[ClinicalTrial]): liste des noeuds des essais cliniques
+            workers (int, optional): nombre de processus pour la recherche des mentions. Defaults to 1.
         """
         logger.info("Construction des mentions.")
         # build links with publications and clinical trials
-        for d_node in drug_nodes:
-            for node_with_title in publication_nodes + clinical_trial_nodes:
-                if d_node.is_name_mentionned(node_with_title.title):
-                    self._build_link(d_node, node_with_title, node_with_title.date, MentionnedLink)
+        self._build_title_mentions(drug_nodes, publication_nodes + clinical_trial_nodes, workers=workers)
 
         # build links with journals
-        for link in self.links:
-            if link.type != Link.MENTIONNED_LINK:
-                continue
+        for link in self.look_for_links_by_type(Link.MENTIONNED_LINK):
             if link.mention_type == MentionnedLink.MENTION_CLINICAL_TRIAL or \
                link.mention_type == MentionnedLink.MENTION_PUBLICATION:
                 journal_link = self.look_for_journal_link(link.node_b)
@@ -448,7 +751,87 @@ class Graph():
                 self._build_link(link.node_a, journal_link.node_a, journal_link.node_b.date, MentionnedLink)
         return
 
-    def _build_link(self, node_a: Node, node_b: Node, date: str, cls) -> None:
+    def _build_title_mentions(self, drug_nodes: List[Drug],
+                              nodes_with_title: List[Union[Publication, ClinicalTrial]],
+                              workers: int = 1) -> List[MentionnedLink]:
+        """Methode construisant les liens de mention des molécules dans les titres.
+        Chaque titre est parcouru une seule fois par l'automate, les titres pouvant être répartis
+        entre plusieurs processus (voir :func:`~clients.matching.find_mentions`).
+        Les liens sont ensuite créés dans l'ordre d'une boucle sur les molécules puis sur les titres,
+        quel que soit le nombre de processus.
+
+        Args:
+            drug_nodes (List[Drug]): liste des noeuds des molécules
+            nodes_with_title (List[Union[Publication, ClinicalTrial]]): liste des noeuds avec titre
+            workers (int, optional): nombre de processus pour la recherche des mentions. Defaults to 1.
+
+        Returns:
+            List[MentionnedLink]: liens de mention construits
+        """
+        mentions = find_mentions([d_node.name for d_node in drug_nodes],
+                                 [node_with_title.title for node_with_title in nodes_with_title], workers=workers)
+
+        links = []
+        for drug_position, node_position in mentions:
+            node_with_title = nodes_with_title[node_position]
+            links.append(self._build_link(drug_nodes[drug_position], node_with_title, node_with_title.date, MentionnedLink))
+        return links
+
+    def _update_journal_mentions(self, mention_links: List[MentionnedLink]) -> None:
+        """Methode mettant à jour les liens de mention des molécules dans les journaux
+        après l'ajout de liens de mention dans des publications ou essais cliniques.
+
+        Comme pour :func:`~Graph._build_mentions`, la date retenue pour un couple molécule / journal
+        est celle de la première mention : les publications avant les essais cliniques,
+        puis dans l'ordre des noeuds.
+
+        Args:
+            mention_links (List[MentionnedLink]): nouveaux liens de mention
+        """
+        updated_pairs = set()
+        updated_drugs: Dict[int, Drug] = {}
+        for link in mention_links:
+            journal_link = self.look_for_journal_link(link.node_b)
+            if journal_link:
+                updated_pairs.add((link.node_a.id, journal_link.node_a.id))
+                updated_drugs[link.node_a.id] = link.node_a
+
+        for drug in updated_drugs.values():
+            first_mentions: Dict[int, Union[Publication, ClinicalTrial]] = {}
+            for link in self.look_for_links_by_nodes([drug], Link.MENTIONNED_LINK):
+                if link.mention_type == MentionnedLink.MENTION_JOURNAL:
+                    continue
+                journal_link = self.look_for_journal_link(link.node_b)
+                if not journal_link:
+                    continue
+                current = first_mentions.get(journal_link.node_a.id)
+                if current is None or _mention_order(link.node_b) < _mention_order(current):
+                    first_mentions[journal_link.node_a.id] = link.node_b
+
+            for journal_id, node_with_title in first_mentions.items():
+                journal_link = self.look_for_journal_link(node_with_title)
+                if (drug.id, journal_id) not in updated_pairs:
+                    continue
+                link = self._build_link(drug, journal_link.node_a, node_with_title.date, MentionnedLink)
+                if link.date != node_with_title.date:
+                    self._update_link_date(link, node_with_title.date)
+
+    def _update_link_date(self, link: Link, date: Optional[str]) -> None:
+        """Modifie la date d'une liaison existante et les index qui en dépendent
+        (date epoch de la liaison, mentions de la molécule triées par date)
+
+        Args:
+            link (Link): liaison du graph
+            date (Optional[str]): nouvelle date
+        """
+        link.date = _intern(date)
+        position = self._links_position[link.id]
+        if position < len(self._links_epochs):
+            self._links_epochs[position] = parse_epochs([link.date])[0]
+        if link.type == Link.MENTIONNED_LINK:
+            self._mentions_by_date.pop(link.node_a.id, None)
+
+    def _build_link(self, node_a: Node, node_b: Node, date: str, cls) -> Link:
         """Methode générique pour construire une liaison entre deux noeuds sachant la classe
 
         Args:
@@ -456,16 +839,21 @@ class Graph():
             node_b (Node): noeud B de la liaison
             date (str): date de la liaison
             cls (__class__): PublishedLink, MentionnedLink
+
+        Returns:
+            Link: la liaison construite, ou la liaison existante de même identifiant
         """
 
         current_link = cls(node_a, node_b, date)
         logger.debug(f'Création du lien {current_link}')
-        if current_link.id not in self._links_id:
-            self.links.append(current_link)
-            self._links_id.append(current_link.id)
-        return
-
-    def get_drugs_mentions(self, drug_names: List[str], verbose: bool = True) -> Dict[str, List[MentionnedLink]]:
+        if current_link.id in self._links_position:
+            return self.links[self._links_position[current_link.id]]
+        self._index_link(len(self.links), current_link)
+        self.links.append(current_link)
+        return current_link
+
+    def get_drugs_mentions(self, drug_names: List[str], verbose: bool = True,
+                           **filters) -> Dict[str, List[MentionnedLink]]:
         """Retourne les liaisons de mention d'une liste de molécule.
         Le format de retour correspond à un dictionnaire:
 
@@ -496,18 +884,14 @@ class Graph():
         Args:
             drug_names (List[str]): liste des molécules
             verbose (bool, optional): Defaults to True.
+            filters: filtres date_from, date_to, mention_type et journal de :func:`~Graph.look_for_drugs_mentions`
 
         Returns:
             Dict[str, MentionnedLink]: retourne le dictionnaire de résultats
         """
-        drug_mentions: Dict[str, List[MentionnedLink]] = {}
+        drug_mentions = self.look_for_drugs_mentions(drug_names, **filters)
         pretty_drug_mentions = {}
 
-        drug_nodes = self.look_for_drug_by_names(drug_names)
-        for drug_node in drug_nodes:
-            links = self.look_for_links_by_nodes([drug_node], Link.MENTIONNED_LINK)
-            drug_mentions.update({drug_node.name: links})
-
         if verbose:
             for drug_name, drug_links in drug_mentions.items():
                 pretty_drug_mentions.update({
@@ -517,6 +901,146 @@ class Graph():
 
         return drug_mentions
 
+    def look_for_drugs_mentions(self, drug_names: List[str], date_from: Optional[str] = None,
+                                date_to: Optional[str] = None, mention_type: Optional[int] = None,
+                                journal: Optional[str] = None) -> Dict[str, List[MentionnedLink]]:
+        """Retrouve en un seul passage les liaisons de mention d'un lot de molécules.
+        Les molécules sont retrouvées par l'index des noms et leurs liaisons par l'index des liaisons
+        par noeud: la durée dépend du nombre de molécules demandées et de liaisons retournées,
+        pas de la taille du graph.
+
+        Avec une période (`date_from`, `date_to`), les mentions d'une molécule sont retrouvées par recherche
+        dichotomique dans ses mentions triées par date (voir :func:`~Graph._look_for_mentions_by_date`),
+        les mentions sans date sont alors exclues. Les filtres `mention_type` et `journal`
+        ne sont appliqués qu'aux mentions de la période.
+
+        Args:
+            drug_names (List[str]): liste des molécules (les noms absents du graph sont ignorés)
+            date_from (str, optional): date de début de la période, incluse. Defaults to None.
+            date_to (str, optional): date de fin de la période, incluse (jusqu'à la fin du jour
+                                     si sans heure). Defaults to None.
+            mention_type (int, optional): type de mention (MentionnedLink.MENTION_*). Defaults to None.
+            journal (str, optional): nom du journal mentionnant la molécule ou publiant la publication
+                                     ou l'essai clinique qui la mentionne. Defaults to None.
+
+        Raises:
+            ValueError: date illisible
+
+        Returns:
+            Dict[str, List[MentionnedLink]]: liaisons de mention par nom de molécule, dans l'ordre des noeuds
+                                             et des liaisons du graph
+        """
+        date_range = parse_date_range(date_from, date_to)
+        return {drug_name: list(self._iter_drug_mentions(drug_node, date_range, mention_type, journal))
+                for drug_name, drug_node in self._drugs_by_names(drug_names).items()}
+
+    def iter_drugs_mentions(self, drug_names: List[str], date_from: Optional[str] = None,
+                            date_to: Optional[str] = None, mention_type: Optional[int] = None,
+                            journal: Optional[str] = None) -> Iterator[Tuple[str, MentionnedLink]]:
+        """Itère sur les liaisons de mention d'un lot de molécules, une à la fois: mêmes liaisons,
+        filtres et ordre que :func:`~Graph.look_for_drugs_mentions`, sans construire les listes de résultats.
+
+        Raises:
+            ValueError: date illisible
+
+        Returns:
+            Iterator[Tuple[str, MentionnedLink]]: nom de la molécule et liaison de mention
+        """
+        date_range = parse_date_range(date_from, date_to)
+        return ((drug_name, link) for drug_name, drug_node in self._drugs_by_names(drug_names).items()
+                for link in self._iter_drug_mentions(drug_node, date_range, mention_type, journal))
+
+    def _drugs_by_names(self, drug_names: List[str]) -> Dict[str, Drug]:
+        """Molécules par nom, la dernière dans l'ordre des noeuds pour un nom en double
+
+        Args:
+            drug_names (List[str]): liste des molécules
+
+        Returns:
+            Dict[str, Drug]: noeud molécule par nom
+        """
+        return {drug_node.name: drug_node for drug_node in self.look_for_drug_by_names(drug_names)}
+
+    def _iter_drug_mentions(self, drug_node: Drug, date_range: Optional[Tuple[int, int]],
+                            mention_type: Optional[int], journal: Optional[str]) -> Iterator[MentionnedLink]:
+        """Itère sur les liaisons de mention filtrées d'une molécule, voir :func:`~Graph.look_for_drugs_mentions`
+
+        Args:
+            drug_node (Drug): noeud molécule
+            date_range (Optional[Tuple[int, int]]): période en dates epoch (ns), voir :func:`~clients.dates.parse_date_range`
+            mention_type (Optional[int]): type de mention
+            journal (Optional[str]): nom du journal
+
+        Yields:
+            Iterator[MentionnedLink]: liaisons de mention, dans l'ordre des liaisons du graph
+        """
+        if date_range is None:
+            # a drug is only the node A of its links, its positions are unique and sorted
+            positions = self._links_by_node.get(drug_node.id, [])
+        else:
+            positions = self._look_for_mentions_by_date(drug_node, *date_range)
+        for position in positions:
+            link = self.links[position]
+            if link.type != Link.MENTIONNED_LINK:
+                continue
+            if mention_type is not None and link.mention_type != mention_type:
+                continue
+            if journal is not None and self._mention_journal_name(link) != journal:
+                continue
+            yield link
+
+    def _look_for_mentions_by_date(self, drug: Drug, start: int, end: int) -> List[int]:
+        """Positions des liaisons de mention d'une molécule datées dans l'intervalle [start, end].
+        Les mentions de la molécule triées par date sont construites à la première requête
+        puis conservées jusqu'à l'ajout d'une nouvelle mention de la molécule.
+
+        Args:
+            drug (Drug): noeud molécule
+            start (int): date epoch (ns) de début, incluse
+            end (int): date epoch (ns) de fin, incluse
+
+        Returns:
+            List[int]: positions des liaisons dans l'attribut links, dans l'ordre des liaisons
+        """
+        index = self._mentions_by_date.get(drug.id)
+        if index is None:
+            if len(self._links_epochs) < len(self.links):
+                new_dates = [link.date for link in self.links[len(self._links_epochs):]]
+                self._links_epochs = np.concatenate([self._links_epochs, parse_epochs(new_dates)])
+            positions = [position for position in self._links_by_node.get(drug.id, [])
+                         if self.links[position].type == Link.MENTIONNED_LINK]
+            epochs = self._links_epochs[positions] if positions else np.empty(0, dtype=np.int64)
+            order = np.argsort(epochs, kind='stable')
+            index = self._mentions_by_date[drug.id] = (epochs[order], [positions[i] for i in order])
+        epochs, positions = index
+        low, high = np.searchsorted(epochs, start, side='left'), np.searchsorted(epochs, end, side='right')
+        return sorted(positions[low:high])
+
+    def _mention_journal_name(self, link: MentionnedLink) -> Optional[str]:
+        """Nom du journal d'une mention: le journal mentionnant la molécule,
+        ou celui qui publie la publication ou l'essai clinique mentionnant la molécule
+
+        Args:
+            link (MentionnedLink): liaison de mention
+
+        Returns:
+            Optional[str]: nom du journal ou None si la publication n'est liée à aucun journal
+        """
+        if link.mention_type == MentionnedLink.MENTION_JOURNAL:
+            return link.node_b.name
+        journal_link = self.look_for_journal_link(link.node_b)
+        return journal_link.node_a.name if journal_link else None
+
+    def get_journals_drugs(self) -> Dict[Tuple[str, int], Set[str]]:
+        """Retourne les molécules distinctes mentionnées par journal.
+        L'agrégat est tenu à jour à chaque liaison de mention de journal ajoutée (construction,
+        extension ou lecture du graph): il n'est pas recalculé à partir des liaisons.
+
+        Returns:
+            Dict[Tuple[str, int], Set[str]]: noms des molécules par (nom, identifiant) de journal
+        """
+        return self._drugs_by_journal
+
     def to_dict(self) -> List[dict]:
         """Convertir l'objet graph en dictionnaire en utilisant dataclasses.asdict()
 
@@ -525,18 +1049,66 @@ class Graph():
         """
         return dataclasses.asdict(self)
 
-    def to_json(self, output_file: str) -> None:
-        """Sauvegarde l'objet graph en json
+    def to_json(self, output_file: str, version: int = GRAPH_FORMAT_VERSION, compression: Optional[str] = None) -> None:
+        """Sauvegarde l'objet graph en json.
+
+        |  version 1: dictionnaire de :func:`~Graph.to_dict`, les liaisons contiennent les noeuds A et B
+        |  version 2: les liaisons référencent les noeuds par identifiant, le fichier est écrit
+        |             au fil de l'eau, une ligne par noeud et par liaison:
+
+        |  {
+        |   "version": 2,
+        |   "id_state": 36,
+        |   "nodes": [
+        |    {"id": 0, "type": 4, "name": "diphenhydramine", "atccode": "A04AD"},
+        |    ...
+        |   ],
+        |   "links": [
+        |    {"id": "12_17", "type": 1, "node_a": 12, "node_b": 17, "date": "2020-01-01T00:00:00.000Z"},
+        |    ...
+        |   ]
+        |  }
+
+        Le fichier est compressé au fil de l'écriture avec une compression gzip ou zstd
+        (voir :func:`~clients.compression.open_file`).
 
         Args:
             output_file (str): chemin du fichier json de sortie
+            version (int, optional): version du format. Defaults to GRAPH_FORMAT_VERSION.
+            compression (str, optional): gzip ou zstd. Defaults to None, d'après l'extension du fichier (``.gz``, ``.zst``).
+
+        Raises:
+            ValueError: version de format inconnue
+        """
+        if version not in (1, 2):
+            raise ValueError(f"Graph: version de format inconnue {version}")
+        with open_file(output_file, 'w', compression) as f:
+            if version == 1:
+                json.dump(self.to_dict(), f, indent=True)
+            else:
+                self._write_json_v2(f)
+
+    def _write_json_v2(self, f) -> None:
+        """Ecriture au fil de l'eau du graph au format version 2, sans copie du graph
+
+        Args:
+            f (file): fichier texte ouvert en écriture
         """
-        with open(output_file, 'w') as f:
-            json.dump(self.to_dict(), f, indent=True)
+        f.write('{\n "version": 2,\n "id_state": %d,\n "nodes": [' % self.id_state)
+        for position, node in enumerate(self.nodes):
+            f.write(',\n  ' if position else '\n  ')
+            f.write(json.dumps(node.to_dict()))
+        f.write('\n ],\n "links": [')
+        for position, link in enumerate(self.links):
+            f.write(',\n  ' if position else '\n  ')
+            f.write(json.dumps({'id': link.id, 'type': link.type, 'node_a': link.node_a.id,
+                                'node_b': link.node_b.id, 'date': link.date}))
+        f.write('\n ]\n}\n')
 
     @staticmethod
     def from_dict(graph_dict: dict) -> "Graph":
-        """Instancier l'objet graph à partir d'un dictionnaire
+        """Instancier l'objet graph à partir d'un dictionnaire (format version 1 ou 2).
+        Voir :class:`~GraphDecoder`.
 
         Args:
             graph_dict (dict): dictionnaire du graph
@@ -544,11 +1116,11 @@ class Graph():
         Returns:
             Graph: objet graph instancié
         """
-        return dacite.from_dict(Graph, graph_dict)
+        return GraphDecoder().decode(graph_dict)
 
     @staticmethod
     def from_json(input_file: str) -> "Graph":
-        """Instancier l'objet graph à partir d'un fichier json
+        """Instancier l'objet graph à partir d'un fichier json (format version 1 ou 2), compressé ou non
 
         Args:
             input_file (str): chemin du fichier json d'entrée
@@ -557,6 +1129,115 @@ class Graph():
             Graph: obket graph instancié
         """
         graph_dict = {}
-        with open(input_file, 'r') as f:
-            graph_dict = json.load(f)
+        if orjson is not None:
+            with open_file(input_file, 'rb') as f:
+                graph_dict = orjson.loads(f.read())
+        else:
+            with open_file(input_file) as f:
+                graph_dict = json.load(f)
         return Graph.from_dict(graph_dict)
+
+
+class GraphDecoder():
+    """Décodeur du dictionnaire d'un graph (format version 1 ou 2).
+
+    Chaque noeud est construit une seule fois et les liaisons sont résolues par identifiant
+    de noeud, y compris pour le format version 1 qui embarque une copie des noeuds A et B.
+    Le contenu du fichier étant produit par :func:`~Graph.to_json`, les objets sont
+    construits sans passer par ``__init__`` ni ``__post_init__`` (pas de validation).
+    """
+
+    def __init__(self) -> None:
+        self._nodes_fields: Dict[int, List[tuple]] = {
+            node_type: [(f.name, f.default) for f in dataclasses.fields(cls) if f.name != 'type']
+            for node_type, cls in NODE_CLASSES.items()
+        }
+
+    def decode(self, graph_dict: dict) -> Graph:
+        """Instancier l'objet graph à partir de son dictionnaire
+
+        Args:
+            graph_dict (dict): dictionnaire du graph
+
+        Returns:
+            Graph: objet graph instancié
+        """
+        version = graph_dict.get('version', 1)
+        if version not in (1, 2):
+            raise ValueError(f"Graph: version de format inconnue {version}")
+
+        graph = Graph()
+        graph.id_state = graph_dict['id_state']
+        nodes_by_id: Dict[int, Node] = {}
+        for infos in graph_dict['nodes']:
+            node = self.decode_node(infos)
+            nodes_by_id[node.id] = node
+            graph.nodes.append(node)
+
+        for infos in graph_dict['links']:
+            node_a, node_b = infos['node_a'], infos['node_b']
+            if version == 1:
+                node_a, node_b = self._resolve_node(node_a, nodes_by_id), self._resolve_node(node_b, nodes_by_id)
+            else:
+                node_a, node_b = nodes_by_id[node_a], nodes_by_id[node_b]
+            graph.links.append(self.decode_link(infos, node_a, node_b))
+
+        graph._build_drugs_index()
+        graph._build_links_index()
+        return graph
+
+    def decode_node(self, infos: dict) -> Node:
+        """Construit un noeud à partir de son dictionnaire
+
+        Args:
+            infos (dict): dictionnaire du noeud, la clé type détermine la classe
+
+        Returns:
+            Node: Drug, Journal, Publication ou ClinicalTrial
+        """
+        node_type = infos['type']
+        node = NODE_CLASSES[node_type].__new__(NODE_CLASSES[node_type])
+        node.type = node_type
+        for name, default in self._nodes_fields[node_type]:
+            value = infos.get(name, default)
+            if name in ('name', 'date'):
+                value = _intern(value)
+            setattr(node, name, value)
+        return node
+
+    def decode_link(self, infos: dict, node_a: Node, node_b: Node) -> Link:
+        """Construit une liaison à partir de son dictionnaire et de ses noeuds
+
+        Args:
+            infos (dict): dictionnaire de la liaison, la clé type détermine la classe
+            node_a (Node): noeud A de la liaison
+            node_b (Node): noeud B de la liaison
+
+        Returns:
+            Link: PublishedLink ou MentionnedLink
+        """
+        link_type = infos['type']
+        link = LINK_CLASSES[link_type].__new__(LINK_CLASSES[link_type])
+        link.id = infos['id']
+        link.type = link_type
+        link.node_a = node_a
+        link.node_b = node_b
+        link.date = _intern(infos.get('date'))
+        if link_type == Link.MENTIONNED_LINK:
+            link.mention_type = node_b.type
+        return link
+
+    def _resolve_node(self, infos: dict, nodes_by_id: Dict[int, Node]) -> Node:
+        """Retrouve le noeud embarqué dans une liaison (format version 1) parmi les noeuds du graph
+
+        Args:
+            infos (dict): dictionnaire du noeud embarqué
+            nodes_by_id (Dict[int, Node]): noeuds du graph par identifiant
+
+        Returns:
+            Node: noeud du graph, ou construit si absent des noeuds du graph
+        """
+        node = nodes_by_id.get(infos['id'])
+        if node is None:
+            node = self.decode_node(infos)
+        return node
@@ -0,0 +1,180 @@
+"""Module de lecture incrémentale d'un fichier json contenant une liste d'enregistrements.
+
+Le fichier est lu par blocs et les enregistrements sont décodés un à un
+(``json.JSONDecoder.raw_decode``), la mémoire utilisée est donc bornée par la taille
+d'un bloc et d'un lot d'enregistrements. Les virgules en fin de liste ou d'objet
+(``[{"a": 1,},]``) sont tolérées, sans modifier le contenu des chaines de caractère.
+"""
+
+from typing import Any, Iterator, List, Optional, TextIO
+import json
+import re
+
+from clients.compression import open_file
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_STRUCTURE = re.compile(r'["{}\[\]]')
+_STRING_END = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_TRAILING_COMMA = re.compile(r'("[^"\\]*(?:\\.[^"\\]*)*")|,([ \t\n\r]*[}\]])', re.DOTALL)
+
+
+def _record_end(content: str, start: int) -> Optional[int]:
+    """Retourne la fin de l'objet ou de la liste json qui commence à la position `start`,
+    sans le décoder (seules les chaines de caractère et les délimiteurs sont parcourus).
+
+    Args:
+        content (str): chaine de caractère
+        start (int): position du premier caractère ('{' ou '[')
+
+    Returns:
+        Optional[int]: position suivant le dernier caractère, None si l'objet est incomplet
+    """
+    depth = 0
+    position = start
+    while True:
+        match = _STRUCTURE.search(content, position)
+        if not match:
+            return None
+        char = match.group()
+        if char == '"':
+            string_match = _STRING_END.match(content, match.end())
+            if not string_match:
+                return None
+            position = string_match.end()
+            continue
+        depth += 1 if char in '{[' else -1
+        position = match.end()
+        if depth == 0:
+            return position
+
+
+def _strip_trailing_commas(content: str) -> str:
+    """Supprime les virgules suivies d'une fin d'objet ou de liste, hors chaines de caractère
+
+    Args:
+        content (str): chaine de caractère du json
+
+    Returns:
+        str: json sans virgule inutile
+    """
+    return _TRAILING_COMMA.sub(lambda match: match.group(1) or match.group(2), content)
+
+
+class JsonRecordsReader():
+    """Lecteur incrémental des enregistrements d'une liste json
+
+    Args:
+        f (TextIO): fichier ouvert en lecture
+        block_size (int, optional): nombre de caractères lus à chaque bloc. Defaults to 1 << 20.
+    """
+
+    def __init__(self, f: TextIO, block_size: int = 1 << 20) -> None:
+        self._file = f
+        self.block_size = block_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._position = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """Lit un nouveau bloc du fichier, en oubliant la partie déjà décodée du tampon
+
+        Returns:
+            bool: False si la fin du fichier est atteinte
+        """
+        if self._eof:
+            return False
+        block = self._file.read(self.block_size)
+        self._buffer = self._buffer[self._position:] + block
+        self._position = 0
+        self._eof = not block
+        return not self._eof
+
+    def _next_char(self) -> Optional[str]:
+        """Passe les espaces et retourne le prochain caractère sans le consommer
+
+        Returns:
+            Optional[str]: caractère ou None en fin de fichier
+        """
+        while True:
+            self._position = _WHITESPACE.match(self._buffer, self._position).end()
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._fill():
+                return None
+
+    def _decode_record(self) -> Any:
+        """Décode l'enregistrement commençant à la position courante
+
+        Raises:
+            ValueError: JSON: enregistrement invalide
+
+        Returns:
+            Any: enregistrement décodé
+        """
+        while True:
+            try:
+                record, end = self._decoder.raw_decode(self._buffer, self._position)
+                if end < len(self._buffer) or self._eof:
+                    self._position = end
+                    return record
+            except json.JSONDecodeError:
+                end = None
+                if self._buffer[self._position] in '{[':
+                    end = _record_end(self._buffer, self._position)
+                if end is not None:
+                    record = json.loads(_strip_trailing_commas(self._buffer[self._position:end]))
+                    self._position = end
+                    return record
+                if self._eof:
+                    raise ValueError(f"JSON: enregistrement invalide à partir de {self._buffer[self._position:][:50]!r}")
+            self._fill()
+
+    def __iter__(self) -> Iterator[Any]:
+        """Itère sur les enregistrements de la liste json
+
+        Raises:
+            ValueError: JSON: une liste d'enregistrements est attendue
+            ValueError: JSON: ',' ou ']' attendu
+
+        Yields:
+            Iterator[Any]: enregistrements
+        """
+        if self._next_char() != '[':
+            raise ValueError("JSON: une liste d'enregistrements est attendue")
+        self._position += 1
+        while True:
+            char = self._next_char()
+            if char == ']':
+                return
+            if char is None:
+                raise ValueError("JSON: ',' ou ']' attendu")
+            yield self._decode_record()
+            char = self._next_char()
+            if char == ',':
+                self._position += 1
+            elif char != ']':
+                raise ValueError("JSON: ',' ou ']' attendu")
+
+
+def iter_json_records(filename: str, batch_size: Optional[int] = None,
+                      block_size: int = 1 << 20) -> Iterator[List[Any]]:
+    """Lit les enregistrements d'un fichier json (une liste) par lots
+
+    Args:
+        filename (str): chemin du fichier json, compressé ou non (voir :func:`~clients.compression.open_file`)
+        batch_size (int, optional): nombre d'enregistrements par lot. Defaults to None, un seul lot.
+        block_size (int, optional): nombre de caractères lus à chaque bloc. Defaults to 1 << 20.
+
+    Yields:
+        Iterator[List[Any]]: lots d'enregistrements
+    """
+    batch: List[Any] = []
+    with open_file(filename) as f:
+        for record in JsonRecordsReader(f, block_size):
+            batch.append(record)
+            if batch_size and len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
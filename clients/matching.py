@@ -0,0 +1,191 @@
+"""Module de recherche des mentions de molécules dans les titres.
+
+Les noms des molécules sont compilés en un seul automate (Aho-Corasick) afin
+de parcourir chaque titre une seule fois, quel que soit le nombre de molécules.
+Les titres peuvent être répartis entre plusieurs processus (voir :func:`~find_mentions`).
+"""
+
+from typing import Dict, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import logging
+
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover
+    ahocorasick = None
+
+logger = logging.getLogger(__name__)
+
+
+class MentionMatcher():
+    """Automate d'Aho-Corasick construit à partir d'une liste de motifs.
+
+    Le résultat est identique à un test ``pattern in content`` pour chaque motif :
+    les occurrences qui se chevauchent sont toutes retrouvées.
+    Si le package ``pyahocorasick`` est installé, il est utilisé comme moteur,
+    sinon l'automate est construit en pur python.
+
+    Args:
+        patterns (List[str]): liste des motifs recherchés (noms des molécules)
+        use_backend (bool, optional): utiliser ``pyahocorasick`` si disponible. Defaults to True.
+    """
+
+    def __init__(self, patterns: List[str], use_backend: bool = True) -> None:
+        self.patterns = list(patterns)
+        self._empty_patterns: Tuple[int, ...] = tuple(i for i, p in enumerate(self.patterns) if p == "")
+        self._automaton = None
+        if use_backend and ahocorasick is not None and any(self.patterns):
+            self._build_backend()
+        else:
+            self._build()
+
+    def _build(self) -> None:
+        """Construction de l'automate en pur python:
+        le trie des motifs, les liens d'échec et les sorties de chaque état.
+        """
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[int]] = [[]]
+
+        for position, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(position)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(char, 0)
+                outputs[next_state] = outputs[next_state] + outputs[fail[next_state]]
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = [tuple(output) for output in outputs]
+
+    def _build_backend(self) -> None:
+        """Construction de l'automate avec ``pyahocorasick``.
+        Un même nom peut correspondre à plusieurs motifs (doublons).
+        """
+        positions_by_pattern: Dict[str, List[int]] = {}
+        for position, pattern in enumerate(self.patterns):
+            if pattern:
+                positions_by_pattern.setdefault(pattern, []).append(position)
+
+        automaton = ahocorasick.Automaton()
+        for pattern, positions in positions_by_pattern.items():
+            automaton.add_word(pattern, tuple(positions))
+        automaton.make_automaton()
+        self._automaton = automaton
+
+    def search(self, content: str) -> List[int]:
+        """Retourne les positions des motifs contenus dans la chaine de caractère
+
+        Args:
+            content (str): chaine de caractère à parcourir
+
+        Returns:
+            List[int]: positions (triées, sans doublon) des motifs retrouvés
+        """
+        if not isinstance(content, str):
+            raise TypeError("content must be instance of str")
+
+        found = set(self._empty_patterns)
+        if self._automaton is not None:
+            for _, positions in self._automaton.iter(content):
+                found.update(positions)
+            return sorted(found)
+
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        state = 0
+        for char in content:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return sorted(found)
+
+
+# matcher of a worker process, built once by the pool initializer
+_worker_matcher: Optional[MentionMatcher] = None
+
+
+def _init_worker(patterns: List[str]) -> None:
+    """Initialisation d'un processus de la pool: construction de son automate
+
+    Args:
+        patterns (List[str]): liste des motifs recherchés
+    """
+    global _worker_matcher
+    _worker_matcher = MentionMatcher(patterns)
+
+
+def _search_chunk(matcher: MentionMatcher, offset: int, contents: List[str]) -> List[Tuple[int, int]]:
+    """Recherche des motifs dans une partie des chaines de caractère
+
+    Args:
+        matcher (MentionMatcher): automate des motifs
+        offset (int): position de la première chaine de caractère de la partie
+        contents (List[str]): chaines de caractère à parcourir
+
+    Returns:
+        List[Tuple[int, int]]: couples (position du motif, position de la chaine de caractère)
+    """
+    return [(pattern_position, offset + position)
+            for position, content in enumerate(contents)
+            for pattern_position in matcher.search(content)]
+
+
+def _search_worker_chunk(offset: int, contents: List[str]) -> List[Tuple[int, int]]:
+    """Recherche des motifs dans une partie des chaines de caractère avec l'automate du processus"""
+    return _search_chunk(_worker_matcher, offset, contents)
+
+
+def find_mentions(patterns: List[str], contents: List[str], workers: int = 1,
+                  chunk_size: Optional[int] = None) -> List[Tuple[int, int]]:
+    """Retourne les couples (motif, chaine de caractère) tels que le motif est contenu
+    dans la chaine de caractère, triés par position du motif puis de la chaine.
+
+    Avec plusieurs workers, les chaines de caractère sont découpées en parties réparties
+    dans une pool de processus, chacun construisant son automate une seule fois.
+    Le tri final rend le résultat identique au parcours séquentiel.
+
+    Args:
+        patterns (List[str]): liste des motifs recherchés (noms des molécules)
+        contents (List[str]): chaines de caractère à parcourir (titres)
+        workers (int, optional): nombre de processus. Defaults to 1.
+        chunk_size (int, optional): nombre de chaines par partie.
+                                    Defaults to None, 4 parties par processus.
+
+    Returns:
+        List[Tuple[int, int]]: couples (position du motif, position de la chaine de caractère)
+    """
+    if workers <= 1 or len(contents) < 2:
+        mentions = _search_chunk(MentionMatcher(patterns), 0, contents)
+    else:
+        chunk_size = chunk_size or -(-len(contents) // (workers * 4))
+        offsets = list(range(0, len(contents), chunk_size))
+        logger.debug(f"Recherche des mentions avec {workers} processus, {len(offsets)} parties.")
+        mentions = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(list(patterns),)) as executor:
+            chunks = executor.map(_search_worker_chunk, offsets,
+                                  [contents[offset:offset + chunk_size] for offset in offsets])
+            for chunk_mentions in chunks:
+                mentions += chunk_mentions
+    mentions.sort()
+    return mentions
@@ -0,0 +1,100 @@
+"""Module d'écriture des résultats des requêtes (``clients mentions``, ``clients query``).
+
+En plus de l'affichage lisible historique (``pretty``), les résultats peuvent être écrits en JSON Lines
+(un objet json par ligne) ou en CSV, un enregistrement à la fois: la mémoire utilisée ne dépend pas
+du nombre d'enregistrements. Les résultats sont écrits sur la sortie standard ou dans un fichier,
+compressé d'après son extension (voir :func:`~clients.compression.open_file`).
+"""
+
+from typing import IO, Iterable, Iterator, Optional, Sequence, Tuple
+import contextlib
+import csv
+import dataclasses
+import json
+import sys
+
+from clients.compression import open_file
+from clients.graph import MentionnedLink
+
+RESULT_FORMATS = ('pretty', 'jsonl', 'csv')
+# columns of a mention record: the mentioned drug, then the attributes of the mentioning node
+MENTION_FIELDS = ('drug', 'type', 'id', 'name', 'title', 'base_id', 'date')
+# columns of a journal record, see clients.server.series_to_records
+JOURNAL_FIELDS = ('node_b_name', 'node_b_id', 'node_a_name')
+
+
+def mention_record(drug_name: str, link: MentionnedLink) -> dict:
+    """Enregistrement d'une mention: la molécule et les attributs du noeud qui la mentionne,
+    avec la date de la mention (mêmes attributs que ``get_drugs_mentions(verbose=True)``)
+
+    Args:
+        drug_name (str): nom de la molécule
+        link (MentionnedLink): liaison de mention
+
+    Returns:
+        dict: enregistrement de la mention
+    """
+    return {'drug': drug_name, **dataclasses.asdict(link.node_b), 'date': link.date}
+
+
+def mention_records(drug_mentions: Iterable[Tuple[str, MentionnedLink]]) -> Iterator[dict]:
+    """Enregistrements des mentions, au fil de l'itération des liaisons
+
+    Args:
+        drug_mentions (Iterable[Tuple[str, MentionnedLink]]): nom de la molécule et liaison de mention,
+                                                              voir :func:`~clients.graph.Graph.iter_drugs_mentions`
+
+    Yields:
+        Iterator[dict]: enregistrement de chaque mention
+    """
+    for drug_name, link in drug_mentions:
+        yield mention_record(drug_name, link)
+
+
+@contextlib.contextmanager
+def open_output(output_file: Optional[str] = None) -> Iterator[IO]:
+    """Ouvre le fichier de sortie en écriture, ou la sortie standard (qui n'est pas fermée)
+
+    Args:
+        output_file (str, optional): chemin du fichier, compressé d'après son extension. Defaults to None.
+
+    Yields:
+        Iterator[IO]: fichier texte ouvert en écriture
+    """
+    if output_file is None:
+        yield sys.stdout
+        return
+    with open_file(output_file, 'w') as f:
+        yield f
+
+
+def write_records(records: Iterable[dict], output_format: str, fields: Sequence[str], f: IO) -> int:
+    """Ecrit les enregistrements un à un en JSON Lines ou en CSV
+
+    Args:
+        records (Iterable[dict]): enregistrements
+        output_format (str): jsonl ou csv
+        fields (Sequence[str]): colonnes du CSV (les attributs absents d'un enregistrement sont vides)
+        f (IO): fichier texte ouvert en écriture
+
+    Raises:
+        ValueError: format inconnu
+
+    Returns:
+        int: nombre d'enregistrements écrits
+    """
+    if output_format not in ('jsonl', 'csv'):
+        raise ValueError(f"format de sortie inconnu {output_format}")
+    count = 0
+    if output_format == 'jsonl':
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write('\n')
+            count += 1
+    else:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore', lineterminator='\n')
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record)
+            count += 1
+    return count
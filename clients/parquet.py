@@ -0,0 +1,153 @@
+"""Module de lecture et d'écriture des données formatées au format parquet (colonnes typées et compressées).
+
+Le format parquet est une alternative aux fichiers json de l'étape data (voir :func:`~clients.data.export_dfs_to_parquet`).
+Les enregistrements relus sont identiques à ceux des fichiers json: en particulier les dates
+sont restituées au format iso de ``DataFrame.to_json(date_format='iso')``.
+Le package ``pyarrow`` est nécessaire.
+"""
+
+from typing import List, Optional
+import logging
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.compute
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+PARQUET_COMPRESSION = 'zstd'
+
+
+def _check_pyarrow() -> None:
+    """Vérifie que pyarrow est installé
+
+    Raises:
+        ImportError: pyarrow est nécessaire pour le format parquet
+    """
+    if pyarrow is None:
+        raise ImportError("pyarrow est nécessaire pour le format parquet")
+
+
+def write_parquet(df: pd.DataFrame, filename: str) -> None:
+    """Ecrit un tableau de données en parquet (sans index)
+
+    Args:
+        df (pd.DataFrame): tableau de données
+        filename (str): chemin du fichier parquet
+    """
+    _check_pyarrow()
+    df.to_parquet(filename, engine='pyarrow', index=False, compression=PARQUET_COMPRESSION)
+
+
+class ParquetRecordsWriter():
+    """Ecriture incrémentale d'un fichier parquet, morceau par morceau (un groupe de lignes par morceau).
+    Le schéma est celui du premier morceau, les suivants y sont convertis.
+    Une colonne entièrement vide dans le premier morceau est typée en chaine de caractère.
+    Même interface que :class:`~clients.data.JsonRecordsWriter`.
+
+    Args:
+        filename (str): chemin du fichier parquet
+    """
+
+    def __init__(self, filename: str) -> None:
+        _check_pyarrow()
+        self.filename = filename
+        self.count = 0
+        self._writer = None
+        self._schema: Optional["pyarrow.Schema"] = None
+        self._empty: Optional[pd.DataFrame] = None
+
+    def __enter__(self) -> "ParquetRecordsWriter":
+        return self
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Ajoute les lignes du tableau au fichier
+
+        Args:
+            df (pd.DataFrame): morceau du tableau de données
+        """
+        if df.empty:
+            self._empty = df if self._empty is None else self._empty
+            return
+        if self._writer is None:
+            table = pyarrow.Table.from_pandas(df, preserve_index=False)
+            for position, field in enumerate(table.schema):
+                if pyarrow.types.is_null(field.type):
+                    table = table.set_column(position, field.name, table.column(position).cast(pyarrow.string()))
+            self._schema = table.schema
+            self._writer = pyarrow.parquet.ParquetWriter(self.filename, self._schema, compression=PARQUET_COMPRESSION)
+        else:
+            table = pyarrow.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+        self._writer.write_table(table)
+        self.count += len(df)
+
+    def __exit__(self, *exc_info) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        elif self._empty is not None:
+            write_parquet(self._empty, self.filename)
+
+
+def _iso_dates(column: "pyarrow.ChunkedArray") -> List[Optional[str]]:
+    """Formate une colonne de dates comme ``DataFrame.to_json(date_format='iso')``:
+    précision à la milliseconde, suffixe Z si la date a un fuseau horaire.
+    Seules les dates distinctes sont formatées.
+
+    Args:
+        column (pyarrow.ChunkedArray): colonne de type timestamp
+
+    Returns:
+        List[Optional[str]]: dates au format iso, None si absente
+    """
+    timezone = column.type.tz
+    column = pyarrow.compute.cast(column, pyarrow.timestamp('ms', tz=timezone), safe=False)
+    encoded = column.combine_chunks().dictionary_encode()
+    dates = pyarrow.compute.strftime(encoded.dictionary, format='%Y-%m-%dT%H:%M:%S')
+    if timezone:
+        dates = pyarrow.compute.binary_join_element_wise(dates, pyarrow.scalar('Z'), '')
+    dates = dates.to_pylist() + [None]
+    # missing dates point to the trailing None
+    indices = pyarrow.compute.fill_null(encoded.indices, len(dates) - 1)
+    return [dates[index] for index in indices.to_numpy()]
+
+
+def _column_values(column: "pyarrow.ChunkedArray") -> list:
+    """Convertit une colonne en liste de valeurs python, les dates au format iso
+
+    Args:
+        column (pyarrow.ChunkedArray): colonne
+
+    Returns:
+        list: valeurs, None si absente
+    """
+    if pyarrow.types.is_timestamp(column.type):
+        return _iso_dates(column)
+    if pyarrow.types.is_string(column.type) or pyarrow.types.is_large_string(column.type):
+        # faster than to_pylist for strings
+        return column.to_pandas().tolist()
+    return column.to_pylist()
+
+
+def read_parquet_records(filename: str, columns: Optional[List[str]] = None) -> List[dict]:
+    """Lit les enregistrements d'un fichier parquet, en ne lisant que les colonnes demandées
+
+    Args:
+        filename (str): chemin du fichier parquet
+        columns (List[str], optional): colonnes à lire, celles absentes du fichier sont ignorées.
+                                       Defaults to None, toutes.
+
+    Returns:
+        List[dict]: enregistrements
+    """
+    _check_pyarrow()
+    if columns is not None:
+        schema_names = pyarrow.parquet.read_schema(filename).names
+        columns = [column for column in columns if column in schema_names]
+    table = pyarrow.parquet.read_table(filename, columns=columns)
+    names = table.column_names
+    values = [_column_values(column) for column in table.columns]
+    return [dict(zip(names, row)) for row in zip(*values)]
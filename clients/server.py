@@ -0,0 +1,384 @@
+"""Module du serveur de requêtes sur le graph (``clients serve``) et de son client.
+
+Le graph est chargé une seule fois puis les requêtes (mentions des molécules, nombre de molécules
+distinctes par journal) sont servies en HTTP, sur un port local ou une socket Unix, par un thread
+par connexion. Le fichier du graph est surveillé: quand il change, le nouveau graph est chargé
+en arrière-plan puis remplace l'ancien d'un seul coup. Les requêtes en cours terminent sur l'ancien
+graph, aucune n'est refusée pendant le rechargement; un fichier illisible (en cours d'écriture)
+est ignoré jusqu'à sa prochaine modification.
+
+|  GET /mentions?drug=atropine&drug=ethanol   mentions des molécules (format de ``clients mentions``)
+|  POST /mentions {"drugs": [...]}            mentions d'un lot de molécules (liste trop longue pour l'url)
+|  GET /journals                              nombre de molécules distinctes par journal
+|  GET /health                                état du serveur et du graph chargé
+
+Les mentions acceptent les filtres date_from, date_to, mention_type (publication, clinical_trial, journal)
+et journal, en paramètres de l'url ou dans le corps json (voir :data:`~MENTION_FILTERS`).
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+import dataclasses
+import http.client
+import json
+import logging
+import os
+import socket
+import threading
+import pandas as pd
+
+from clients.columnar import ColumnarGraph
+from clients.graph import Graph, MentionnedLink
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_POLL_INTERVAL = 1.0
+UNIX_PREFIX = 'unix:'
+MENTION_FILTERS = ('date_from', 'date_to', 'mention_type', 'journal')
+
+
+def journals_distinct_mentions(g: Union[Graph, ColumnarGraph]) -> pd.Series:
+    """Nombre distinct de molécules mentionnées par journal,
+    voir :func:`~clients.tasks.export_journals_with_distinct_mention`
+
+    Args:
+        g (Union[Graph, ColumnarGraph]): graph chargé
+
+    Returns:
+        pd.Series: nombre de molécules distinctes indexé par (node_b_name, node_b_id)
+    """
+    if isinstance(g, ColumnarGraph):
+        return g.get_journals_distinct_mentions()
+    return journals_drugs_to_series(g.get_journals_drugs())
+
+
+def journals_drugs_to_series(drugs_by_journal: Dict[Tuple[str, int], Set[str]]) -> pd.Series:
+    """Nombre distinct de molécules par journal à partir de l'agrégat des molécules par journal
+    (voir :func:`~clients.graph.Graph.get_journals_drugs`), sans parcourir les liaisons
+
+    Args:
+        drugs_by_journal (Dict[Tuple[str, int], Set[str]]): noms des molécules par (nom, identifiant) de journal
+
+    Returns:
+        pd.Series: nombre de molécules distinctes indexé par (node_b_name, node_b_id),
+                   dans l'ordre du regroupement pandas (groupby puis tri décroissant)
+    """
+    keys = sorted(drugs_by_journal)
+    index = pd.MultiIndex.from_tuples(keys, names=['node_b_name', 'node_b_id'])
+    counts = pd.Series([len(drugs_by_journal[key]) for key in keys], index=index, name='node_a_name', dtype='int64')
+    return counts.sort_values(ascending=False)
+
+
+def pretty_drug_mentions(g: Union[Graph, ColumnarGraph], drug_names: List[str], **filters) -> Dict[str, List[dict]]:
+    """Mentions des molécules au format affiché par ``get_drugs_mentions(verbose=True)``
+
+    Args:
+        g (Union[Graph, ColumnarGraph]): graph chargé
+        drug_names (List[str]): liste des molécules
+        filters: filtres de :func:`~clients.graph.Graph.look_for_drugs_mentions`
+
+    Returns:
+        Dict[str, List[dict]]: attributs des noeuds qui mentionnent chaque molécule, avec la date de la mention
+    """
+    return {
+        drug_name: [{**dataclasses.asdict(drug_mention.node_b), **{'date': drug_mention.date}} for drug_mention in drug_links]
+        for drug_name, drug_links in g.get_drugs_mentions(drug_names, verbose=False, **filters).items()
+    }
+
+
+def series_to_records(series: pd.Series) -> List[dict]:
+    """Convertit le résultat de :func:`~journals_distinct_mentions` en enregistrements json"""
+    return [{'node_b_name': name, 'node_b_id': int(node_id), 'node_a_name': int(count)}
+            for (name, node_id), count in series.items()]
+
+
+def records_to_series(records: List[dict]) -> pd.Series:
+    """Reconstruit le résultat de :func:`~journals_distinct_mentions` à partir de ses enregistrements json"""
+    index = pd.MultiIndex.from_arrays([[record['node_b_name'] for record in records],
+                                       [record['node_b_id'] for record in records]],
+                                      names=['node_b_name', 'node_b_id'])
+    return pd.Series([record['node_a_name'] for record in records], index=index, name='node_a_name', dtype='int64')
+
+
+class GraphService():
+    """Graph résident, rechargé quand son fichier change.
+
+    Le graph courant et ses résultats mémorisés sont remplacés ensemble par une seule affectation:
+    une requête lit une génération cohérente même pendant un rechargement.
+
+    Args:
+        json_graph_file (str, optional): chemin du fichier json du graph. Defaults to None.
+        snapshot_file (str, optional): chemin du snapshot binaire du graph (prioritaire). Defaults to None.
+
+    Raises:
+        ValueError: un fichier du graph est nécessaire
+    """
+
+    def __init__(self, json_graph_file: Optional[str] = None, snapshot_file: Optional[str] = None) -> None:
+        if not (json_graph_file or snapshot_file):
+            raise ValueError("Serveur: un fichier du graph est nécessaire")
+        self.filename = snapshot_file or json_graph_file
+        self._load: Callable[[str], Any] = ColumnarGraph.from_snapshot if snapshot_file else Graph.from_json
+        self._reload_lock = threading.Lock()
+        self._generation: Tuple[Union[Graph, ColumnarGraph], Dict[str, Any]] = (None, {})
+        self._signature = None
+        self.reloads = 0
+        if not self.reload_if_changed():
+            raise ValueError(f"Serveur: le graph {self.filename} n'a pas pu être chargé")
+
+    def _file_signature(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    @property
+    def graph(self) -> Union[Graph, ColumnarGraph]:
+        """Graph courant"""
+        return self._generation[0]
+
+    def reload_if_changed(self) -> bool:
+        """Recharge le graph si son fichier a changé depuis le dernier chargement
+
+        Returns:
+            bool: True si un nouveau graph est chargé
+        """
+        with self._reload_lock:
+            signature = self._file_signature()
+            if signature is None or signature == self._signature:
+                return False
+            try:
+                graph = self._load(self.filename)
+            except Exception:
+                logger.exception(f"Serveur: le graph {self.filename} n'a pas pu être rechargé, l'ancien est conservé.")
+                return False
+            self._generation = (graph, {})
+            self._signature = signature
+            self.reloads += 1
+            logger.info(f"Serveur: graph {self.filename} chargé ({self.reloads}).")
+            return True
+
+    def watch(self, stop: threading.Event, poll_interval: float = DEFAULT_POLL_INTERVAL) -> None:
+        """Surveille le fichier du graph jusqu'à l'arrêt (à exécuter dans un thread)
+
+        Args:
+            stop (threading.Event): événement d'arrêt
+            poll_interval (float, optional): intervalle de surveillance en secondes. Defaults to 1.0.
+        """
+        while not stop.wait(poll_interval):
+            self.reload_if_changed()
+
+    def mentions(self, drug_names: List[str], **filters) -> Dict[str, List[dict]]:
+        """Mentions des molécules, voir :func:`~pretty_drug_mentions`"""
+        return pretty_drug_mentions(self.graph, drug_names, **filters)
+
+    def journals(self) -> List[dict]:
+        """Nombre distinct de molécules par journal, calculé une fois par graph chargé,
+        voir :func:`~journals_distinct_mentions`"""
+        graph, results = self._generation
+        if 'journals' not in results:
+            results['journals'] = series_to_records(journals_distinct_mentions(graph))
+        return results['journals']
+
+    def health(self) -> dict:
+        """Etat du serveur"""
+        return {'status': 'ok', 'graph_file': self.filename, 'reloads': self.reloads}
+
+
+class GraphRequestHandler(BaseHTTPRequestHandler):
+    """Requêtes HTTP/1.1 (connexions persistantes) sur le :class:`~GraphService` du serveur"""
+
+    protocol_version = 'HTTP/1.1'
+    # small responses on persistent connections, not delayed by the Nagle algorithm
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        service: GraphService = self.server.service
+        if url.path == '/mentions':
+            self._send_mentions(query.get('drug', []), {name: query[name][0] for name in MENTION_FILTERS if name in query})
+        elif url.path == '/journals':
+            self._send_json(200, service.journals())
+        elif url.path == '/health':
+            self._send_json(200, service.health())
+        else:
+            self._send_json(404, {'error': f"chemin inconnu {url.path}"})
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if url.path != '/mentions':
+            self._send_json(404, {'error': f"chemin inconnu {url.path}"})
+            return
+        try:
+            content = json.loads(body or b'{}')
+            drug_names = content.get('drugs', [])
+        except (ValueError, AttributeError):
+            self._send_json(400, {'error': "corps json invalide"})
+            return
+        if not isinstance(drug_names, list) or not all(isinstance(name, str) for name in drug_names):
+            self._send_json(400, {'error': "drugs doit être une liste de noms de molécules"})
+            return
+        filters = {name: content[name] for name in MENTION_FILTERS if content.get(name) is not None}
+        invalid = [name for name, value in filters.items() if not isinstance(value, str)]
+        if invalid:
+            self._send_json(400, {'error': f"filtres qui doivent être des chaines de caractère: {invalid}"})
+            return
+        self._send_mentions(drug_names, filters)
+
+    def _send_mentions(self, drug_names: List[str], filters: Dict[str, str]) -> None:
+        if not drug_names:
+            self._send_json(400, {'error': "paramètre drug manquant"})
+            return
+        if 'mention_type' in filters:
+            if filters['mention_type'] not in MentionnedLink.MENTION_TYPES:
+                self._send_json(400, {'error': f"type de mention inconnu {filters['mention_type']}"})
+                return
+            filters['mention_type'] = MentionnedLink.MENTION_TYPES[filters['mention_type']]
+        try:
+            mentions = self.server.service.mentions(drug_names, **filters)
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        self._send_json(200, mentions)
+
+    def _send_json(self, status: int, content: Any) -> None:
+        body = json.dumps(content).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self) -> str:
+        # unix socket clients have no (host, port) address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+class UnixGraphRequestHandler(GraphRequestHandler):
+    """Requêtes sur une socket Unix (sans option TCP)"""
+
+    disable_nagle_algorithm = False
+
+
+class GraphHTTPServer(ThreadingHTTPServer):
+    """Serveur HTTP sur un port local, un thread par connexion"""
+
+    request_queue_size = 128
+
+
+class ThreadingUnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    """Serveur HTTP sur une socket Unix, un thread par connexion"""
+
+    daemon_threads = True
+    request_queue_size = GraphHTTPServer.request_queue_size
+
+
+def make_server(service: GraphService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                unix_socket: Optional[str] = None) -> Union[GraphHTTPServer, ThreadingUnixHTTPServer]:
+    """Crée le serveur HTTP (port local ou socket Unix) du graph
+
+    Args:
+        service (GraphService): graph résident
+        host (str, optional): adresse d'écoute. Defaults to DEFAULT_HOST.
+        port (int, optional): port d'écoute (0 pour un port libre). Defaults to DEFAULT_PORT.
+        unix_socket (str, optional): chemin de la socket Unix, utilisée à la place du port. Defaults to None.
+
+    Returns:
+        Union[GraphHTTPServer, ThreadingUnixHTTPServer]: serveur prêt à servir
+    """
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        server = ThreadingUnixHTTPServer(unix_socket, UnixGraphRequestHandler)
+    else:
+        server = GraphHTTPServer((host, port), GraphRequestHandler)
+    server.service = service
+    return server
+
+
+def server_address(server: Union[GraphHTTPServer, ThreadingUnixHTTPServer]) -> str:
+    """Adresse du serveur au format de :class:`~GraphClient` (``http://host:port`` ou ``unix:/chemin``)"""
+    if isinstance(server.server_address, tuple):
+        host, port = server.server_address[:2]
+        return f"http://{host}:{port}"
+    return f"{UNIX_PREFIX}{server.server_address}"
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """Connexion HTTP sur une socket Unix"""
+
+    def __init__(self, path: str, timeout: Optional[float] = None) -> None:
+        super().__init__('localhost', timeout=timeout)
+        self.path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+class GraphClient():
+    """Client d'un serveur ``clients serve``, sur une connexion persistante (un client par thread)
+
+    Args:
+        address (str): adresse du serveur, ``http://host:port``, ``host:port`` ou ``unix:/chemin/de/la/socket``
+        timeout (float, optional): délai maximal d'une requête en secondes. Defaults to 60.
+
+    Raises:
+        ConnectionError: Serveur: erreur de la requête
+    """
+
+    def __init__(self, address: str, timeout: float = 60) -> None:
+        if address.startswith(UNIX_PREFIX):
+            self._connection = UnixHTTPConnection(address[len(UNIX_PREFIX):].replace('//', '/', 1), timeout=timeout)
+        else:
+            url = urlsplit(address if '://' in address else f"http://{address}")
+            self._connection = http.client.HTTPConnection(url.hostname, url.port or DEFAULT_PORT, timeout=timeout)
+
+    def _request(self, method: str, path: str, content: Any = None) -> Any:
+        body, headers = None, {}
+        if content is not None:
+            body, headers = json.dumps(content).encode('utf-8'), {'Content-Type': 'application/json'}
+        for attempt in range(2):
+            try:
+                self._connection.request(method, path, body, headers)
+                response = self._connection.getresponse()
+                body = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # persistent connection closed by the server, retried once on a new connection
+                self._connection.close()
+                if attempt:
+                    raise
+        content = json.loads(body)
+        if response.status != 200:
+            raise ConnectionError(f"Serveur: erreur {response.status} {content.get('error')}")
+        return content
+
+    def mentions(self, drug_names: List[str], **filters) -> Dict[str, List[dict]]:
+        """Mentions des molécules, voir :func:`~pretty_drug_mentions`.
+        La liste est envoyée dans le corps de la requête, sans limite de taille d'url.
+        Les filtres sont ceux de :data:`~MENTION_FILTERS`, le type de mention par son nom (publication, ...)."""
+        return self._request('POST', '/mentions', {'drugs': list(drug_names), **filters})
+
+    def journals(self) -> pd.Series:
+        """Nombre distinct de molécules par journal, voir :func:`~journals_distinct_mentions`"""
+        return records_to_series(self._request('GET', '/journals'))
+
+    def health(self) -> dict:
+        """Etat du serveur"""
+        return self._request('GET', '/health')
+
+    def close(self) -> None:
+        self._connection.close()
@@ -1,59 +1,282 @@
 """Module des jobs pour le cli"""
 
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+import contextlib
+import json
 import logging
 import os
+import uuid
 from clients.data import (read_and_format_pubmed, read_and_format_clinical_trials,
-                          read_and_format_drugs, create_journal_df, export_dfs_to_json)
-from clients.graph import Graph, MentionnedLink
-import dataclasses
+                          read_and_format_drugs, create_journal_df, encode_journal_ids, export_dfs_to_json,
+                          export_dfs_to_parquet, export_formatted_data_by_chunks, export_near_duplicates_report)
+from clients.cache import DEFAULT_CACHE_MAX_SIZE, FragmentCache, file_sha256
+from clients.cleaning import NORMALIZERS, TextCleaner
+from clients.columnar import ColumnarGraph
+from clients.compression import compression_from_extension, find_file, open_file, strip_compression_extension
+from clients.dedupe import NearDuplicateIndex, drop_near_duplicates
+from clients.graph import GRAPH_FORMAT_VERSION, Graph, MentionnedLink
+from clients.server import (DEFAULT_HOST, DEFAULT_POLL_INTERVAL, DEFAULT_PORT, GraphClient, GraphService,
+                            journals_distinct_mentions, journals_drugs_to_series, make_server, pretty_drug_mentions,
+                            series_to_records, server_address)
+from clients.output import JOURNAL_FIELDS, MENTION_FIELDS, mention_records, open_output, write_records
+import functools
+import threading
+from pprint import pprint
 import pandas as pd
 
 logger = logging.getLogger(__name__)
 
 
 def read_and_format_data(pubmed_files: List[str], clinical_trials_file: str, drug_file: str,
-                         output_directory: str) -> None:
+                         output_directory: str, chunk_size: Optional[int] = None,
+                         normalizers: Optional[List[str]] = None, arrow_strings: bool = False, workers: int = 1,
+                         output_format: str = 'json', cache_directory: Optional[str] = None,
+                         cache_max_size: int = DEFAULT_CACHE_MAX_SIZE, no_cache: bool = False,
+                         near_duplicates_threshold: Optional[float] = None, compression: Optional[str] = None) -> None:
     """Job data de lecture et format des données à partir des fichiers bruts.
-    Sauvegarde les données sous format json dans `output_directory`:
+    Sauvegarde les données sous format json (ou parquet) dans `output_directory`:
 
     * pubmeds.json
     * clinical_trials.json
     * drugs.json
     * journals.json
 
+    Les publications et les essais cliniques référencent leur journal par son identifiant ``journal_id``
+    (voir :func:`~clients.data.create_journal_df`).
+
     Cette étape peut être découpée si besoin. L'hypothèse est que les données bruts doivent
     être nettoyées et consolider afin d'être exploitées par la suite.
     Dans la réalité, les données bruts sont souvent déversés dans un datalake puis structurer
     (nettoyage, création d'identifiant, base relationnel, ...) dans un stockage adapté et requêtable.
 
+    Les fichiers bruts nettoyés sont conservés dans un cache (voir :class:`~clients.cache.FragmentCache`):
+    à l'exécution suivante, seuls les fichiers nouveaux ou modifiés sont relus et nettoyés.
+
     Args:
-        pubmed_files (List[str]): chemins des données bruts
+        pubmed_files (List[str]): chemins des données bruts, des répertoires ou motifs (glob) de fichiers
         clinical_trials_file (str): chemin des données bruts
         drug_file (str): chemin des données bruts
         output_directory (str): répertoire de sauvegarde des données json
+        chunk_size (int, optional): lire et exporter les données par morceaux de `chunk_size` lignes,
+                                    voir :func:`~clients.data.export_formatted_data_by_chunks`. Defaults to None.
+        normalizers (List[str], optional): normalisations des chaines de caractère, voir :data:`~clients.cleaning.NORMALIZERS`.
+                                           Defaults to None, toutes.
+        arrow_strings (bool, optional): nettoyer les chaines de caractère avec Arrow. Defaults to False.
+        workers (int, optional): nombre de processus pour lire et formater les fichiers pubmed. Defaults to 1.
+        output_format (str, optional): format des fichiers exportés, json ou parquet (colonnes typées
+                                       et compressées, nécessite ``pyarrow``). Defaults to 'json'.
+        cache_directory (str, optional): répertoire du cache. Defaults to None, `<output_directory>/.cache`.
+        cache_max_size (int, optional): taille maximale du cache en octets. Defaults to DEFAULT_CACHE_MAX_SIZE (1 Go).
+        no_cache (bool, optional): relire tous les fichiers bruts, sans lire ni écrire le cache. Defaults to False.
+        near_duplicates_threshold (float, optional): supprimer aussi les titres quasi identiques à un titre précédent
+                                                     (similarité au-delà du seuil, voir :mod:`~clients.dedupe`).
+                                                     Les lignes supprimées sont listées dans `near_duplicates.json`.
+                                                     Defaults to None, doublons exacts seulement.
+        compression (str, optional): compression des fichiers json exportés, gzip ou zstd (``pubmeds.json.gz``, ...),
+                                     au fil de l'écriture. Les fichiers bruts compressés (``.gz``, ``.zst``)
+                                     sont toujours acceptés. Defaults to None, sans compression.
     """
+    if compression and output_format == 'parquet':
+        logger.warning("Les fichiers parquet sont déjà compressés, l'option compression est ignorée.")
+        compression = None
+    cleaner = TextCleaner(NORMALIZERS if normalizers is None else normalizers, use_arrow=arrow_strings)
+    cache = None
+    if not no_cache:
+        cache = FragmentCache(cache_directory or os.path.join(output_directory, '.cache'), cache_max_size)
+    if chunk_size:
+        try:
+            export_formatted_data_by_chunks(pubmed_files, clinical_trials_file, drug_file, output_directory, chunk_size,
+                                            cleaner=cleaner, workers=workers, output_format=output_format, cache=cache,
+                                            near_duplicates_threshold=near_duplicates_threshold, compression=compression)
+        except Exception:
+            logger.error("Une erreur est survenue pendant le formattage des données.")
+            raise
+        if cache is not None:
+            cache.evict()
+        return
+
     try:
-        pubmeds = read_and_format_pubmed(pubmed_files)
-        clinical_trials = read_and_format_clinical_trials(clinical_trials_file)
+        pubmeds = read_and_format_pubmed(pubmed_files, cleaner, workers=workers, cache=cache)
+        clinical_trials = read_and_format_clinical_trials(clinical_trials_file, cleaner, cache=cache)
+        if near_duplicates_threshold:
+            pubmeds, pubmed_report = drop_near_duplicates(pubmeds, NearDuplicateIndex(near_duplicates_threshold), 'pubmed')
+            clinical_trials, clinical_trials_report = drop_near_duplicates(
+                clinical_trials, NearDuplicateIndex(near_duplicates_threshold), 'clinical_trials')
         journals = create_journal_df(clinical_trials, pubmeds)
-        drugs = read_and_format_drugs(drug_file)
+        journal_ids = dict(zip(journals.name, journals.journal_id))
+        pubmeds = encode_journal_ids(pubmeds, journal_ids)
+        clinical_trials = encode_journal_ids(clinical_trials, journal_ids)
+        drugs = read_and_format_drugs(drug_file, cleaner, cache=cache)
     except Exception:
         logger.error("Une erreur est survenue pendant le formattage des données.")
         raise
+    if output_format == 'parquet':
+        export_dfs = export_dfs_to_parquet
+    else:
+        export_dfs = functools.partial(export_dfs_to_json, compression=compression)
     try:
-        export_dfs_to_json(output_directory, {
+        export_dfs(output_directory, {
             'pubmeds': pubmeds,
             'clinical_trials': clinical_trials,
             'journals': journals,
             'drugs': drugs
         })
+        if near_duplicates_threshold:
+            export_near_duplicates_report(output_directory, [pubmed_report, clinical_trials_report], compression)
     except Exception:
         logger.error("Une erreur est survenue pendant la sauvegarde des données.")
         raise
+    if cache is not None:
+        cache.evict()
+
+
+GRAPH_INPUT_FILES: Dict[str, str] = {
+    'drug_file': 'drugs',
+    'journal_file': 'journals',
+    'pubmed_file': 'pubmeds',
+    'clinical_trial_file': 'clinical_trials'
+}
+MANIFEST_VERSION = 1
+JOURNALS_AGGREGATE_VERSION = 1
+
+
+def _default_manifest_file(json_graph_file: str) -> str:
+    """Chemin par défaut du manifeste d'un graph: à côté du fichier json du graph
+
+    Args:
+        json_graph_file (str): chemin du fichier json du graph
+
+    Returns:
+        str: chemin du manifeste
+    """
+    return os.path.splitext(strip_compression_extension(json_graph_file))[0] + '.manifest.json'
+
+
+def _read_manifest(manifest_file: str) -> Optional[dict]:
+    """Lecture du manifeste des fichiers déjà intégrés au graph
+
+    Args:
+        manifest_file (str): chemin du manifeste
+
+    Returns:
+        Optional[dict]: manifeste ou None s'il n'existe pas ou n'est pas d'une version connue
+    """
+    if not os.path.exists(manifest_file):
+        return
+    with open(manifest_file, 'r') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+        logger.warning(f"Version du manifeste {manifest_file} inconnue, il est ignoré.")
+        return
+    return manifest
+
+
+def _write_manifest(manifest_file: str, input_files: Dict[str, str]) -> None:
+    """Ecriture du manifeste des fichiers intégrés au graph
+
+    Args:
+        manifest_file (str): chemin du manifeste
+        input_files (Dict[str, str]): chemins des fichiers json par paramètre de :func:`~clients.graph.Graph.build_graph`
+    """
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'inputs': {os.path.basename(filename): {'sha256': file_sha256(filename)}
+                   for filename in input_files.values()}
+    }
+    with _replaced_file(manifest_file) as tmp_file:
+        with open(tmp_file, 'w') as f:
+            json.dump(manifest, f, indent=True)
+
+
+def _default_journals_file(json_graph_file: str) -> str:
+    """Chemin par défaut de l'agrégat des molécules par journal d'un graph: à côté du fichier json du graph
+
+    Args:
+        json_graph_file (str): chemin du fichier json du graph
+
+    Returns:
+        str: chemin de l'agrégat
+    """
+    return os.path.splitext(strip_compression_extension(json_graph_file))[0] + '.journals.json'
+
+
+def _graph_file_signature(json_graph_file: str) -> dict:
+    """Signature (taille, date de modification) du fichier du graph, enregistrée avec l'agrégat
+    pour détecter un graph remplacé depuis
+    """
+    stat = os.stat(json_graph_file)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _write_journals_aggregate(journals_file: str, g: Graph, json_graph_file: str) -> None:
+    """Ecriture de l'agrégat des molécules distinctes par journal (voir :func:`~clients.graph.Graph.get_journals_drugs`)
+
+    Args:
+        journals_file (str): chemin de l'agrégat
+        g (Graph): graph construit
+        json_graph_file (str): chemin du fichier json du graph, déjà écrit
+    """
+    drugs_by_journal = g.get_journals_drugs()
+    aggregate = {
+        'version': JOURNALS_AGGREGATE_VERSION,
+        'graph': _graph_file_signature(json_graph_file),
+        'journals': [{'name': name, 'id': journal_id, 'drugs': sorted(drugs_by_journal[(name, journal_id)])}
+                     for name, journal_id in sorted(drugs_by_journal)]
+    }
+    with _replaced_file(journals_file) as tmp_file:
+        with open(tmp_file, 'w') as f:
+            json.dump(aggregate, f, indent=True, ensure_ascii=False)
+
+
+def _read_journals_aggregate(journals_file: str, json_graph_file: str) -> Optional[Dict[Tuple[str, int], Set[str]]]:
+    """Lecture de l'agrégat des molécules distinctes par journal
+
+    Args:
+        journals_file (str): chemin de l'agrégat
+        json_graph_file (str): chemin du fichier json du graph
+
+    Returns:
+        Optional[Dict[Tuple[str, int], Set[str]]]: noms des molécules par (nom, identifiant) de journal,
+                                                   None si l'agrégat n'existe pas, n'est pas d'une version connue
+                                                   ou ne correspond pas au fichier du graph
+    """
+    if not os.path.exists(journals_file) or not os.path.exists(json_graph_file):
+        return
+    with open(journals_file, 'r') as f:
+        aggregate = json.load(f)
+    if aggregate.get('version') != JOURNALS_AGGREGATE_VERSION:
+        logger.warning(f"Version de l'agrégat {journals_file} inconnue, il est ignoré.")
+        return
+    if aggregate.get('graph') != _graph_file_signature(json_graph_file):
+        logger.warning(f"L'agrégat {journals_file} ne correspond pas au graph {json_graph_file}, il est ignoré.")
+        return
+    return {(journal['name'], journal['id']): set(journal['drugs']) for journal in aggregate['journals']}
+
+
+@contextlib.contextmanager
+def _replaced_file(filename: str) -> Iterator[str]:
+    """Fichier temporaire remplaçant `filename` une fois écrit: un serveur (voir :func:`~serve_graph`)
+    ne lit jamais un graph à moitié écrit, et un snapshot déjà projeté en mémoire reste valide
+
+    Args:
+        filename (str): chemin du fichier à écrire
+
+    Yields:
+        Iterator[str]: chemin du fichier temporaire à écrire
+    """
+    tmp_file = f"{filename}.{uuid.uuid4().hex}.tmp"
+    try:
+        yield tmp_file
+        os.replace(tmp_file, filename)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
 
 
-def export_graph(input_directory: str, json_graph_file: str) -> None:
+def export_graph(input_directory: str, json_graph_file: str, format_version: int = GRAPH_FORMAT_VERSION,
+                 snapshot_file: Optional[str] = None, incremental: bool = False,
+                 manifest_file: Optional[str] = None, workers: int = 1, input_format: str = 'json',
+                 compression: Optional[str] = None, journals_file: Optional[str] = None) -> None:
     """Job de création et export du graph des liaisons entre les différentes entités
     (molécules, publications, essais cliniques, journaux).
 
@@ -69,67 +292,273 @@ def export_graph(input_directory: str, json_graph_file: str) -> None:
     L'object Graph grâce à dataclasses peut être exporté et importé facilement sous forme de dictionnaire
     (et donc json)
 
+    En mode incrémental, le graph existant est complété avec les nouveaux enregistrements
+    (voir :func:`~clients.graph.Graph.extend_graph`). Les fichiers dont l'empreinte n'a pas changé
+    depuis le manifeste ne sont pas relus. Sans graph ou sans manifeste, le graph est construit entièrement.
+    Les fichiers json sont supposés complétés par la fin : une suppression ou une modification
+    d'enregistrement nécessite une construction complète.
+
+    Les molécules distinctes mentionnées par journal sont exportées à côté du graph
+    (``<json_graph_file>.journals.json``), lues par :func:`~export_journals_with_distinct_mention`
+    sans charger le graph. Le graph tient cet agrégat à jour à la construction comme à l'extension.
+
     Args:
         input_directory (str): répertoire de sauvegarde des données json du job :func:`~read_and_format_data`
         json_graph_file (str): chemin du fichier json du graph
+        format_version (int, optional): version du format du fichier json. Defaults to GRAPH_FORMAT_VERSION.
+        snapshot_file (str, optional): chemin du snapshot binaire du graph à exporter également,
+                                       voir :func:`~clients.columnar.ColumnarGraph.to_snapshot`. Defaults to None.
+        incremental (bool, optional): compléter le graph existant. Defaults to False.
+        manifest_file (str, optional): chemin du manifeste des fichiers intégrés au graph.
+                                       Defaults to None, `<json_graph_file>.manifest.json`.
+        workers (int, optional): nombre de processus pour la recherche des mentions. Defaults to 1.
+        input_format (str, optional): format des données du job :func:`~read_and_format_data`, json ou parquet.
+                                      Seules les colonnes utiles sont lues dans les fichiers parquet. Defaults to 'json'.
+                                      Les fichiers json compressés (``pubmeds.json.gz``, ...) sont utilisés s'ils existent.
+        compression (str, optional): compression du fichier json du graph, gzip ou zstd, au fil de l'écriture.
+                                     Defaults to None, d'après l'extension du fichier (``.gz``, ``.zst``).
+        journals_file (str, optional): chemin de l'agrégat des molécules par journal.
+                                       Defaults to None, `<json_graph_file>.journals.json`.
     """
+    input_files = {param: find_file(os.path.join(input_directory, f"{name}.{input_format}"))
+                   for param, name in GRAPH_INPUT_FILES.items()}
+    manifest_file = manifest_file or _default_manifest_file(json_graph_file)
+    manifest = _read_manifest(manifest_file) if incremental and os.path.exists(json_graph_file) else None
     try:
-        g = Graph()
-        g.build_graph(
-            drug_file=os.path.join(input_directory, 'drugs.json'),
-            journal_file=os.path.join(input_directory, 'journals.json'),
-            pubmed_file=os.path.join(input_directory, 'pubmeds.json'),
-            clinical_trial_file=os.path.join(input_directory, 'clinical_trials.json')
-        )
+        if manifest is not None:
+            g = Graph.from_json(json_graph_file)
+            inputs = manifest.get('inputs', {})
+            changed_files = {
+                param: filename for param, filename in input_files.items()
+                if inputs.get(os.path.basename(filename), {}).get('sha256') != file_sha256(filename)
+            }
+            if not changed_files:
+                logger.info("Aucun nouveau fichier à intégrer au graph.")
+            elif 'journal_file' not in changed_files:
+                # the new publications refer to their journal by journal_id
+                changed_files['journal_file'] = input_files['journal_file']
+            g.extend_graph(workers=workers, **changed_files)
+        else:
+            g = Graph()
+            g.build_graph(workers=workers, **input_files)
     except Exception:
         logger.error("Une erreur est survenue pendant la création des données.\
                           Activer le mode debug pour plus d'informations.")
         raise
 
     try:
-        g.to_json(json_graph_file)
+        with _replaced_file(json_graph_file) as tmp_file:
+            g.to_json(tmp_file, version=format_version, compression=compression or compression_from_extension(json_graph_file))
+        _write_manifest(manifest_file, input_files)
+        _write_journals_aggregate(journals_file or _default_journals_file(json_graph_file), g, json_graph_file)
+        if snapshot_file:
+            with _replaced_file(snapshot_file) as tmp_file:
+                ColumnarGraph.from_graph(g).to_snapshot(tmp_file)
     except Exception:
         logger.error("Une erreur est survenue pendant la sauvegarde du graph.")
         raise
 
 
-def print_drug_mention(json_graph_file: str, drug_names: List[str]) -> None:
-    """Afficher les liaisons d'une molécule. Voir :func:`~clients.graph.Graph.get_drugs_mentions`.
+def _read_graph(json_graph_file: Optional[str] = None,
+                snapshot_file: Optional[str] = None) -> Union[Graph, ColumnarGraph]:
+    """Lecture du graph depuis son fichier json ou son snapshot binaire (prioritaire)
 
-    Cette étape correspond à l'exploitation d'une base graph. C'est à dire l'usage de python pour
-    requêter en un language adapté la base de données graph (ex cypher pour Neo4j, comme SQL pour le relationnel)
+    Args:
+        json_graph_file (str, optional): chemin du fichier json du graph. Defaults to None.
+        snapshot_file (str, optional): chemin du snapshot binaire du graph. Defaults to None.
+
+    Returns:
+        Union[Graph, ColumnarGraph]: graph chargé, ou ouvert par projection mémoire si snapshot
+    """
+    try:
+        if snapshot_file:
+            return ColumnarGraph.from_snapshot(snapshot_file)
+        return Graph.from_json(json_graph_file)
+    except Exception:
+        logger.error("Une erreur est survenue pendant la lecture du graph")
+        raise
+
+
+def convert_graph(json_graph_file: str, output_file: str, format_version: int = GRAPH_FORMAT_VERSION,
+                  compression: Optional[str] = None) -> None:
+    """Job de conversion d'un fichier json du graph d'une version de format à une autre.
+    Voir :func:`~clients.graph.Graph.to_json`.
 
     Args:
-        json_graph_file (str): chemin du fichier json du graph
-        drug_names (List[str]): liste des molécules
+        json_graph_file (str): chemin du fichier json du graph à convertir
+        output_file (str): chemin du fichier json converti
+        format_version (int, optional): version du format de sortie. Defaults to GRAPH_FORMAT_VERSION.
+        compression (str, optional): compression du fichier converti, gzip ou zstd.
+                                     Defaults to None, d'après l'extension du fichier (``.gz``, ``.zst``).
     """
     try:
-        g = Graph().from_json(json_graph_file)
+        g = Graph.from_json(json_graph_file)
     except Exception:
         logger.error("Une erreur est survenue pendant la lecture du graph")
         raise
-    g.get_drugs_mentions(drug_names, verbose=True)
+    try:
+        g.to_json(output_file, version=format_version, compression=compression)
+    except Exception:
+        logger.error("Une erreur est survenue pendant la sauvegarde du graph.")
+        raise
+
+
+def read_drug_names(drug_names_file: str) -> List[str]:
+    """Lit une liste de molécules, une par ligne (les lignes vides sont ignorées)
 
+    Args:
+        drug_names_file (str): chemin du fichier texte, compressé ou non
+
+    Returns:
+        List[str]: liste des molécules
+    """
+    with open_file(drug_names_file) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def print_drug_mention(json_graph_file: Optional[str], drug_names: Optional[List[str]] = None,
+                       snapshot_file: Optional[str] = None, server: Optional[str] = None,
+                       drug_names_file: Optional[str] = None, date_from: Optional[str] = None,
+                       date_to: Optional[str] = None, mention_type: Optional[str] = None,
+                       journal: Optional[str] = None, output_format: str = 'pretty',
+                       output_file: Optional[str] = None) -> None:
+    """Afficher les liaisons d'une molécule. Voir :func:`~clients.graph.Graph.get_drugs_mentions`.
+
+    Cette étape correspond à l'exploitation d'une base graph. C'est à dire l'usage de python pour
+    requêter en un language adapté la base de données graph (ex cypher pour Neo4j, comme SQL pour le relationnel)
+
+    Args:
+        json_graph_file (str, optional): chemin du fichier json du graph
+        drug_names (List[str], optional): liste des molécules. Defaults to None.
+        snapshot_file (str, optional): chemin du snapshot binaire du graph, utilisé à la place du json. Defaults to None.
+        server (str, optional): adresse d'un serveur :func:`~serve_graph` interrogé à la place
+                                du fichier du graph. Defaults to None.
+        drug_names_file (str, optional): fichier des molécules, une par ligne (voir :func:`~read_drug_names`),
+                                         ajoutées à drug_names. Defaults to None.
+        date_from (str, optional): mentions datées à partir de cette date, incluse. Defaults to None.
+        date_to (str, optional): mentions datées jusqu'à cette date, incluse (jusqu'à la fin du jour
+                                 si sans heure). Defaults to None.
+        mention_type (str, optional): type de mention, publication, clinical_trial ou journal
+                                      (voir MentionnedLink.MENTION_TYPES). Defaults to None.
+        journal (str, optional): mentions d'un journal, ou des publications et essais cliniques
+                                 qu'il publie. Defaults to None.
+        output_format (str, optional): pretty (affichage lisible), jsonl ou csv: une mention par ligne,
+                                       écrite au fil de la recherche (voir :mod:`~clients.output`). Defaults to 'pretty'.
+        output_file (str, optional): fichier de sortie, compressé d'après son extension.
+                                     Defaults to None, la sortie standard.
+    """
+    drug_names = list(drug_names or [])
+    if drug_names_file:
+        drug_names += read_drug_names(drug_names_file)
+    filters = {'date_from': date_from, 'date_to': date_to, 'mention_type': mention_type, 'journal': journal}
+    if server:
+        client = GraphClient(server)
+        try:
+            mentions = client.mentions(drug_names, **filters)
+        finally:
+            client.close()
+        with open_output(output_file) as f:
+            if output_format == 'pretty':
+                pprint(mentions, stream=f)
+            else:
+                records = ({'drug': drug_name, **mention} for drug_name, drug_mentions in mentions.items()
+                           for mention in drug_mentions)
+                write_records(records, output_format, MENTION_FIELDS, f)
+        return
+    if mention_type is not None:
+        filters['mention_type'] = MentionnedLink.MENTION_TYPES[mention_type]
+    g = _read_graph(json_graph_file, snapshot_file)
+    if output_format == 'pretty' and output_file is None:
+        g.get_drugs_mentions(drug_names, verbose=True, **filters)
+        return
+    with open_output(output_file) as f:
+        if output_format == 'pretty':
+            pprint(pretty_drug_mentions(g, drug_names, **filters), stream=f)
+        else:
+            write_records(mention_records(g.iter_drugs_mentions(drug_names, **filters)), output_format, MENTION_FIELDS, f)
 
-def export_journals_with_distinct_mention(json_graph_file: str) -> Optional[pd.DataFrame]:
+
+def export_journals_with_distinct_mention(json_graph_file: Optional[str], snapshot_file: Optional[str] = None,
+                                          server: Optional[str] = None, journals_file: Optional[str] = None,
+                                          output_format: str = 'pretty',
+                                          output_file: Optional[str] = None) -> Optional[pd.DataFrame]:
     """Retourne une tableau de données des journaux avec le nombre distinct de molécules mentionnées.
 
     Correspond à une étape d'exploitation d'une base prête à l'emploi également.
+    Le résultat est lu dans l'agrégat exporté avec le graph par :func:`~export_graph`, sans charger le graph.
+    Sans agrégat, ou si le graph a été remplacé depuis, il est calculé à partir du graph.
 
     Args:
-        json_graph_file (str): chemin du fichier json du graph
+        json_graph_file (str, optional): chemin du fichier json du graph
+        snapshot_file (str, optional): chemin du snapshot binaire du graph, utilisé à la place du json. Defaults to None.
+        server (str, optional): adresse d'un serveur :func:`~serve_graph` interrogé à la place
+                                du fichier du graph. Defaults to None.
+        journals_file (str, optional): chemin de l'agrégat des molécules par journal.
+                                       Defaults to None, `<json_graph_file>.journals.json`.
+        output_format (str, optional): pretty (tableau retourné), jsonl ou csv: un journal par ligne
+                                       (voir :mod:`~clients.output`). Defaults to 'pretty'.
+        output_file (str, optional): fichier de sortie, compressé d'après son extension.
+                                     Defaults to None, la sortie standard (jsonl, csv) ou le tableau retourné (pretty).
 
     Returns:
-        Optional[pd.DataFrame]: Tableau de données
+        Optional[pd.DataFrame]: Tableau de données, None s'il est écrit
     """
-    try:
-        g = Graph().from_json(json_graph_file)
-    except Exception:
-        logger.exception("Une erreur est survenue pendant la lecture du graph")
-        raise
-    journal_mention_links = [dataclasses.asdict(link) for link in g.links
-                             if isinstance(link, MentionnedLink) and link.mention_type == MentionnedLink.MENTION_JOURNAL]
-    journal_links_df = pd.DataFrame.from_dict(pd.json_normalize(journal_mention_links, sep="_"))
-    results = journal_links_df.groupby(['node_b_name', 'node_b_id']).node_a_name.nunique().sort_values(ascending=False)
+    journals = _journals_distinct_mentions(json_graph_file, snapshot_file, server, journals_file)
+    if output_format == 'pretty' and output_file is None:
+        return journals
+    with open_output(output_file) as f:
+        if output_format == 'pretty':
+            f.write(f"{journals}\n")
+        else:
+            write_records(series_to_records(journals), output_format, JOURNAL_FIELDS, f)
+
 
-    return results
+def _journals_distinct_mentions(json_graph_file: Optional[str], snapshot_file: Optional[str],
+                                server: Optional[str], journals_file: Optional[str]) -> pd.Series:
+    """Nombre distinct de molécules par journal, lu sur le serveur, dans l'agrégat ou calculé à partir du graph,
+    voir :func:`~export_journals_with_distinct_mention`
+    """
+    if server:
+        client = GraphClient(server)
+        try:
+            return client.journals()
+        finally:
+            client.close()
+    if json_graph_file and not snapshot_file:
+        drugs_by_journal = _read_journals_aggregate(journals_file or _default_journals_file(json_graph_file),
+                                                    json_graph_file)
+        if drugs_by_journal is not None:
+            return journals_drugs_to_series(drugs_by_journal)
+    g = _read_graph(json_graph_file, snapshot_file)
+    return journals_distinct_mentions(g)
+
+
+def serve_graph(json_graph_file: Optional[str] = None, snapshot_file: Optional[str] = None, host: str = DEFAULT_HOST,
+                port: int = DEFAULT_PORT, unix_socket: Optional[str] = None,
+                poll_interval: float = DEFAULT_POLL_INTERVAL) -> None:
+    """Job de service du graph: le graph est chargé une fois et les requêtes des commandes
+    ``clients mentions`` et ``clients query`` (option ``--server``) sont servies en HTTP jusqu'à l'interruption
+    du processus. Le graph est rechargé quand son fichier change, sans interrompre les requêtes.
+    Voir :mod:`~clients.server`.
+
+    Args:
+        json_graph_file (str, optional): chemin du fichier json du graph. Defaults to None.
+        snapshot_file (str, optional): chemin du snapshot binaire du graph, utilisé à la place du json. Defaults to None.
+        host (str, optional): adresse d'écoute. Defaults to DEFAULT_HOST (127.0.0.1).
+        port (int, optional): port d'écoute. Defaults to DEFAULT_PORT (8765).
+        unix_socket (str, optional): chemin d'une socket Unix, utilisée à la place du port. Defaults to None.
+        poll_interval (float, optional): intervalle de surveillance du fichier du graph en secondes. Defaults to 1.0.
+    """
+    service = GraphService(json_graph_file, snapshot_file)
+    server = make_server(service, host, port, unix_socket)
+    stop = threading.Event()
+    watcher = threading.Thread(target=service.watch, args=(stop, poll_interval), daemon=True)
+    watcher.start()
+    logger.info(f"Serveur: en écoute sur {server_address(server)}")
+    try:
+        server.serve_forever()
+    finally:
+        stop.set()
+        server.server_close()
+        if unix_socket and os.path.exists(unix_socket):
+            os.remove(unix_socket)
@@ -2,8 +2,34 @@
 
 """Tests pour les classes entities dans le package clients"""
 
+import io
+import json
+import os
+import random
+import tempfile
+import threading
 import unittest
-from clients.graph import ClinicalTrial, Drug, Graph, Journal, MentionnedLink, Publication, PublishedLink
+from unittest import mock
+import dataclasses
+import numpy as np
+import pandas as pd
+import clients.data
+import clients.tasks
+from clients.cache import FragmentCache
+from clients.cleaning import TextCleaner, pyarrow
+from clients.data import encode_journal_ids, expand_pubmed_files, read_and_format_pubmed
+from clients.columnar import ColumnarGraph
+from clients.compression import detect_compression, open_file, zstandard
+from clients.dates import DAY, NO_DATE, normalize_dates, parse_date_range, parse_epochs
+from clients.dedupe import NearDuplicateIndex
+from clients.graph import ClinicalTrial, Drug, Graph, Journal, Link, MentionnedLink, Node, Publication, PublishedLink
+from clients.json_records import iter_json_records
+from clients.matching import MentionMatcher, find_mentions
+from clients.output import MENTION_FIELDS, mention_records
+from clients.parquet import read_parquet_records
+from clients.server import GraphClient, GraphService, make_server, server_address
+from clients.tasks import (convert_graph, export_graph, export_journals_with_distinct_mention, print_drug_mention,
+                           read_and_format_data)
 
 
 class TestNode(unittest.TestCase):
@@ -31,6 +57,18 @@ class TestNode(unittest.TestCase):
         publish_link = PublishedLink(node_2, node_3)
         self.assertEqual(publish_link.id, '2_3')
 
+    def test_compact_nodes_and_links(self):
+        journal = Journal(id=0, name=''.join(["journal ", "a"]))
+        publication = Publication(id=1, title="publication A", date=''.join(["2022/03/01"]))
+        clinical_trial = ClinicalTrial(id=2, title="clinical trial A", date=''.join(["2022/03/01"]))
+        links = [PublishedLink(journal, publication), MentionnedLink(Drug(id=3, name="drug A", atccode="A"), clinical_trial)]
+        for obj in [journal, publication, clinical_trial] + links:
+            self.assertFalse(hasattr(obj, '__dict__'))
+        self.assertIs(publication.date, clinical_trial.date)
+        self.assertIs(journal.name, Journal(id=4, name="journal a").name)
+        self.assertEqual(links[1].mention_type, MentionnedLink.MENTION_CLINICAL_TRIAL)
+        self.assertEqual(clinical_trial.type, ClinicalTrial.CLINICAL_TRIAL_NODE)
+
 
 class GraphTest(unittest.TestCase):
     @classmethod
@@ -66,3 +104,1111 @@ class GraphTest(unittest.TestCase):
         # deux mentions clinical_trials
         tmp = [link for link in res['diphenhydramine'] if link.mention_type == MentionnedLink.MENTION_CLINICAL_TRIAL]
         self.assertEqual(len(tmp), 2)
+
+    def test_links_index(self):
+        g = self.graph
+        self.assertEqual(len(g._links_position), len(g.links))
+        for node in g.nodes:
+            for link_type in [None, Link.PUBLISHED_LINK, Link.MENTIONNED_LINK]:
+                expected = [link for link in g.links if node.id in (link.node_a.id, link.node_b.id)]
+                if link_type:
+                    expected = [link for link in expected if link.type == link_type]
+                self.assertEqual(g.look_for_links_by_nodes([node], link_type), expected)
+
+    def test_from_json_rebuilds_links_index(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            graph_file = os.path.join(tmp_dir, 'graph.json')
+            self.graph.to_json(graph_file)
+            g = Graph.from_json(graph_file)
+        self.assertEqual(list(g._links_position), [link.id for link in self.graph.links])
+        self.assertEqual(len(g.look_for_links_by_type(Link.PUBLISHED_LINK)),
+                         len(self.graph.look_for_links_by_type(Link.PUBLISHED_LINK)))
+        res = g.get_drugs_mentions(drug_names=['diphenhydramine'], verbose=False)
+        self.assertEqual(len(res['diphenhydramine']), 4)
+
+    def test_journal_mentions_same_as_links_scan(self):
+        drug_infos = [{"atccode": "A", "name": "ethanol"}, {"atccode": "B", "name": "atropine"}]
+        journal_infos = [{"name": "journal a"}, {"name": "journal b"}]
+        pubmed_infos = [{"title": "ethanol and atropine", "date": "2020-01-02", "journal": "journal a"},
+                        {"title": "ethanol", "date": "2020-01-01", "journal": "journal a"},
+                        {"title": "atropine", "date": "2020-01-03", "journal": "unknown journal"}]
+        clinical_trials_infos = [{"title": "atropine", "date": "2019-01-01", "journal": "journal b"},
+                                 {"title": "ethanol", "date": "2018-01-01", "journal": "journal a"}]
+        g = Graph()
+        drug_nodes = g._build_nodes_from_list(drug_infos, Drug)
+        g._build_nodes_from_list(journal_infos, Journal)
+        publication_nodes = g._build_nodes_from_list(pubmed_infos, Publication)
+        clinical_trial_nodes = g._build_nodes_from_list(clinical_trials_infos, ClinicalTrial)
+        g._build_mentions(drug_nodes, publication_nodes, clinical_trial_nodes)
+
+        # former derivation: linear scan of the links for each mention
+        expected = {}
+        for link in g.links:
+            if link.type != Link.MENTIONNED_LINK or link.mention_type == MentionnedLink.MENTION_JOURNAL:
+                continue
+            for journal_link in g.links:
+                if journal_link.type == Link.PUBLISHED_LINK and journal_link.node_b.id == link.node_b.id:
+                    link_id = f"{link.node_a.id}_{journal_link.node_a.id}"
+                    expected.setdefault(link_id, journal_link.node_b.date)
+                    break
+
+        journal_mentions = [link for link in g.look_for_links_by_type(Link.MENTIONNED_LINK)
+                            if link.mention_type == MentionnedLink.MENTION_JOURNAL]
+        self.assertEqual([(link.id, link.date) for link in journal_mentions], list(expected.items()))
+        self.assertEqual(len(journal_mentions), 3)
+
+    def test_batch_mentions_same_as_links_scan(self):
+        drug_infos = [{"atccode": "A", "name": "ethanol"}, {"atccode": "B", "name": "atropine"},
+                      {"atccode": "C", "name": "ethanol"}]
+        journal_infos = [{"name": "journal a"}]
+        pubmed_infos = [{"title": "ethanol and atropine", "date": "2020-01-02", "journal": "journal a"},
+                        {"title": "atropine", "date": "2020-01-03", "journal": "journal a"}]
+        g = Graph()
+        drug_nodes = g._build_nodes_from_list(drug_infos, Drug)
+        g._build_nodes_from_list(journal_infos, Journal)
+        publication_nodes = g._build_nodes_from_list(pubmed_infos, Publication)
+        g._build_mentions(drug_nodes, publication_nodes, [])
+        # drug added after the first mentions, as in extend_graph
+        g._build_mentions(g._build_nodes_from_list([{"atccode": "D", "name": "epinephrine"}], Drug), publication_nodes, [])
+
+        drug_names = ['atropine', 'epinephrine', 'ethanol', 'unknown', 'atropine']
+        expected = {}
+        for drug in g.nodes:
+            if drug.type == Node.DRUG_NODE and drug.name in drug_names:
+                expected[drug.name] = [link for link in g.links
+                                       if link.type == Link.MENTIONNED_LINK and link.node_a.id == drug.id]
+        self.assertEqual(g.look_for_drugs_mentions(drug_names), expected)
+        self.assertEqual(list(g.look_for_drugs_mentions(drug_names)), ['ethanol', 'atropine', 'epinephrine'])
+        self.assertEqual([drug.atccode for drug in g.look_for_drug_by_names(['ethanol'])], ['A', 'C'])
+        self.assertEqual(g.look_for_drugs_mentions(['unknown']), {})
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            graph_file = os.path.join(tmp_dir, 'graph.json')
+            g.to_json(graph_file)
+            self.assertEqual(Graph.from_json(graph_file).get_drugs_mentions(drug_names, verbose=False), expected)
+
+            drug_names_file = os.path.join(tmp_dir, 'drugs.txt')
+            with open(drug_names_file, 'w') as f:
+                f.write("atropine\n\n ethanol \n")
+            with mock.patch('clients.graph.pprint') as mock_pprint:
+                print_drug_mention(graph_file, ['epinephrine'], drug_names_file=drug_names_file)
+                print_drug_mention(graph_file, ['epinephrine', 'atropine', 'ethanol'])
+            self.assertEqual(mock_pprint.call_args_list[0], mock_pprint.call_args_list[1])
+
+    def test_json_v2_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            graph_file = os.path.join(tmp_dir, 'graph.json')
+            self.graph.to_json(graph_file, version=2)
+            with open(graph_file) as f:
+                graph_dict = json.load(f)
+            g = Graph.from_json(graph_file)
+        self.assertEqual(graph_dict['version'], 2)
+        self.assertEqual(graph_dict['links'][0], {'id': '2_3', 'type': Link.PUBLISHED_LINK, 'node_a': 2, 'node_b': 3,
+                                                  'date': "2019-01-01T00:00:00.000Z"})
+        self.assertEqual(g.id_state, self.graph.id_state)
+        self.assertEqual(g.nodes, self.graph.nodes)
+        self.assertEqual(g.links, self.graph.links)
+        # links share the nodes of the graph
+        self.assertIs(g.links[0].node_b, g.nodes[3])
+
+    def test_convert_graph(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            v1_file = os.path.join(tmp_dir, 'graph_v1.json')
+            v2_file = os.path.join(tmp_dir, 'graph_v2.json')
+            v1_converted_file = os.path.join(tmp_dir, 'graph_v1_converted.json')
+            self.graph.to_json(v1_file, version=1)
+            convert_graph(v1_file, v2_file, format_version=2)
+            convert_graph(v2_file, v1_converted_file, format_version=1)
+            self.assertEqual(Graph.from_json(v2_file).links, self.graph.links)
+            with open(v1_file) as f, open(v1_converted_file) as f_converted:
+                self.assertEqual(json.load(f_converted)['links'], json.load(f)['links'])
+            with self.assertRaises(ValueError):
+                self.graph.to_json(v1_file, version=3)
+
+    def test_from_json_v1_and_v2(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            v1_file = os.path.join(tmp_dir, 'graph_v1.json')
+            v2_file = os.path.join(tmp_dir, 'graph_v2.json')
+            self.graph.to_json(v1_file, version=1)
+            self.graph.to_json(v2_file, version=2)
+            graphs = [Graph.from_json(v1_file), Graph.from_json(v2_file)]
+            with mock.patch('clients.graph.orjson', None):
+                graphs += [Graph.from_json(v1_file), Graph.from_json(v2_file)]
+        for g in graphs:
+            self.assertEqual(g.nodes, self.graph.nodes)
+            self.assertEqual(g.links, self.graph.links)
+            self.assertEqual([type(link) for link in g.links], [type(link) for link in self.graph.links])
+            self.assertEqual([link.mention_type for link in g.look_for_links_by_type(Link.MENTIONNED_LINK)],
+                             [link.mention_type for link in self.graph.look_for_links_by_type(Link.MENTIONNED_LINK)])
+            # embedded nodes of the links are resolved to the nodes of the graph
+            for link in g.links:
+                self.assertIs(link.node_a, g.nodes[link.node_a.id])
+                self.assertIs(link.node_b, g.nodes[link.node_b.id])
+
+
+class IncrementalGraphTest(unittest.TestCase):
+    drug_infos = [{"atccode": "A", "name": "ethanol"}, {"atccode": "B", "name": "atropine"}]
+    journal_infos = [{"name": "journal a"}, {"name": "journal b"}]
+    pubmed_infos = [{"title": "ethanol and atropine", "date": "2020-01-02", "journal": "journal a"},
+                    {"title": "betamethasone and ethanol", "date": "2015-01-01", "journal": "journal b"},
+                    {"title": "betamethasone and ethanol", "date": "2015-01-01", "journal": "journal b"}]
+    clinical_trials_infos = [{"title": "atropine", "date": "2019-01-01", "journal": "journal b"},
+                             {"title": "ethanol", "date": "2018-01-01", "journal": "journal a"}]
+    # records appended by the next ingestion
+    new_infos = {
+        'drugs': [{"atccode": "C", "name": "Betamethasone "}],
+        'journals': [{"name": "journal c"}],
+        'pubmeds': [{"title": "ethanol", "date": "2021-01-01", "journal": "journal a"},
+                    {"title": "atropine", "date": "2017-01-01", "journal": "journal b"},
+                    {"title": "betamethasone and ethanol", "date": "2015-01-01", "journal": "journal b"}],
+        'clinical_trials': [{"title": "betamethasone", "date": "2016-01-01", "journal": "journal c"}]
+    }
+
+    def _write_inputs(self, input_directory, with_new_records, journal_ids=False):
+        inputs = {'drugs': self.drug_infos, 'journals': self.journal_infos,
+                  'pubmeds': self.pubmed_infos, 'clinical_trials': self.clinical_trials_infos}
+        for name, records in inputs.items():
+            if with_new_records:
+                records = records + self.new_infos[name]
+            if journal_ids:
+                records = [self._with_journal_id(infos) for infos in records]
+            with open(os.path.join(input_directory, f'{name}.json'), 'w') as f:
+                json.dump(records, f)
+
+    @staticmethod
+    def _with_journal_id(infos):
+        """Format of the data stage: journals refered by journal_id"""
+        infos = dict(infos)
+        if 'atccode' not in infos:
+            name = infos['name'] if 'journal' not in infos else infos.pop('journal')
+            infos['journal_id'] = 'abc'.index(name[-1])
+        return infos
+
+    @staticmethod
+    def _canonical(g):
+        def node_key(node):
+            return tuple((key, value) for key, value in node.to_dict().items() if key != 'id')
+        nodes = sorted(node_key(node) for node in g.nodes)
+        links = sorted((link.type, node_key(link.node_a), node_key(link.node_b), link.date) for link in g.links)
+        return nodes, links
+
+    @staticmethod
+    def _journals_scan(g):
+        """Former derivation of export_journals_with_distinct_mention: scan of the links"""
+        journal_mention_links = [dataclasses.asdict(link) for link in g.look_for_links_by_type(Link.MENTIONNED_LINK)
+                                 if link.mention_type == MentionnedLink.MENTION_JOURNAL]
+        journal_links_df = pd.DataFrame.from_dict(pd.json_normalize(journal_mention_links, sep="_"))
+        return journal_links_df.groupby(['node_b_name', 'node_b_id']).node_a_name.nunique().sort_values(ascending=False)
+
+    def _check_journals_aggregate(self, graph_file):
+        g = Graph.from_json(graph_file)
+        with mock.patch.object(Graph, 'from_json') as from_json:
+            journals = export_journals_with_distinct_mention(graph_file)
+        from_json.assert_not_called()
+        pd.testing.assert_series_equal(journals, self._journals_scan(g))
+        return journals
+
+    def test_journals_aggregate_outdated(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            graph_file = os.path.join(tmp_dir, 'graph.json')
+            self._write_inputs(tmp_dir, with_new_records=True)
+            export_graph(tmp_dir, graph_file)
+            self._check_journals_aggregate(graph_file)
+            # graph replaced without its aggregate: computed from the graph
+            g = Graph.from_json(graph_file)
+            g.links = [link for link in g.links if getattr(link.node_b, 'name', None) != 'journal c']
+            g._build_links_index()
+            g.to_json(graph_file)
+            with self.assertLogs('clients.tasks', level='WARNING'):
+                journals = export_journals_with_distinct_mention(graph_file)
+            pd.testing.assert_series_equal(journals, self._journals_scan(g))
+            self.assertNotIn('journal c', journals.index.get_level_values('node_b_name'))
+
+    def test_filtered_mentions_after_extend(self):
+        filters_list = [{'date_from': '2018-01-01', 'date_to': '2019-12-31'}, {'date_from': '2017-01-01', 'date_to': '2017-12-31'},
+                        {'date_from': '2015-01-01', 'mention_type': MentionnedLink.MENTION_JOURNAL}]
+
+        def filtered_mentions(g):
+            return [{drug_name: sorted((link.node_b.type, getattr(link.node_b, 'name', None) or link.node_b.title, link.date or '')
+                                       for link in links)
+                     for drug_name, links in g.look_for_drugs_mentions(['atropine', 'ethanol'], **filters).items()}
+                    for filters in filters_list]
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            input_files = {param: os.path.join(tmp_dir, f'{name}.json') for param, name in
+                           [('drug_file', 'drugs'), ('journal_file', 'journals'), ('pubmed_file', 'pubmeds'),
+                            ('clinical_trial_file', 'clinical_trials')]}
+            self._write_inputs(tmp_dir, with_new_records=False)
+            g = Graph().build_graph(**input_files)
+            # date indexes built before the extension
+            filtered_mentions(g)
+            self._write_inputs(tmp_dir, with_new_records=True)
+            g.extend_graph(**input_files)
+            full_graph = Graph().build_graph(**input_files)
+        self.assertEqual(filtered_mentions(g), filtered_mentions(full_graph))
+        journal_b = [link.date for link in g.look_for_drugs_mentions(['atropine'], date_from='2017-01-01',
+                                                                     date_to='2017-12-31')['atropine']
+                     if link.mention_type == MentionnedLink.MENTION_JOURNAL]
+        self.assertEqual(journal_b, ['2017-01-01'])
+
+    def test_extend_graph_same_as_full_build(self):
+        self._check_extend_graph(journal_ids=False)
+
+    def test_extend_graph_with_journal_ids(self):
+        g = self._check_extend_graph(journal_ids=True)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self._write_inputs(tmp_dir, with_new_records=True)
+            names_graph = Graph().build_graph(*[os.path.join(tmp_dir, f'{name}.json')
+                                                for name in ['drugs', 'journals', 'pubmeds', 'clinical_trials']])
+        self.assertEqual(self._canonical(g), self._canonical(names_graph))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            graph_file = os.path.join(tmp_dir, 'graph.json')
+            self._write_inputs(tmp_dir, with_new_records=True, journal_ids=True)
+            export_graph(tmp_dir, graph_file, incremental=True)
+            # only the publications change, the journals are found by journal_id
+            pubmeds_file = os.path.join(tmp_dir, 'pubmeds.json')
+            with open(pubmeds_file) as f:
+                pubmeds = json.load(f)
+            with open(pubmeds_file, 'w') as f:
+                json.dump(pubmeds + [{"title": "atropine", "date": "2014-01-01", "journal_id": 2}], f)
+            export_graph(tmp_dir, graph_file, incremental=True)
+            mentions = Graph.from_json(graph_file).get_drugs_mentions(['atropine'], verbose=False)['atropine']
+            self.assertIn(('journal c', '2014-01-01'), [(link.node_b.name, link.date) for link in mentions
+                                                        if link.mention_type == MentionnedLink.MENTION_JOURNAL])
+
+    def test_manifest_replaced_atomically(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            graph_file = os.path.join(tmp_dir, 'graph.json')
+            manifest_file = os.path.join(tmp_dir, 'graph.manifest.json')
+            self._write_inputs(tmp_dir, with_new_records=False)
+            export_graph(tmp_dir, graph_file, incremental=True)
+            with open(manifest_file) as f:
+                manifest = json.load(f)
+            self._write_inputs(tmp_dir, with_new_records=True)
+            with mock.patch('clients.tasks.json.dump', side_effect=OSError('disk full')):
+                with self.assertRaises(OSError):
+                    clients.tasks._write_manifest(manifest_file, {'pubmed_file': os.path.join(tmp_dir, 'pubmeds.json')})
+            with open(manifest_file) as f:
+                self.assertEqual(json.load(f), manifest)
+            self.assertFalse([filename for filename in os.listdir(tmp_dir) if filename.endswith('.tmp')])
+
+    def _check_extend_graph(self, journal_ids):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            graph_file = os.path.join(tmp_dir, 'graph.json')
+            full_graph_file = os.path.join(tmp_dir, 'full_graph.json')
+            self._write_inputs(tmp_dir, with_new_records=False, journal_ids=journal_ids)
+            export_graph(tmp_dir, graph_file, incremental=True)
+            self.assertTrue(os.path.exists(os.path.join(tmp_dir, 'graph.manifest.json')))
+
+            self._write_inputs(tmp_dir, with_new_records=True, journal_ids=journal_ids)
+            with mock.patch.object(Graph, 'build_graph') as build_graph:
+                export_graph(tmp_dir, graph_file, incremental=True)
+            build_graph.assert_not_called()
+            export_graph(tmp_dir, full_graph_file)
+
+            g = Graph.from_json(graph_file)
+            full_graph = Graph.from_json(full_graph_file)
+            self.assertEqual(self._canonical(g), self._canonical(full_graph))
+            # aggregate kept up to date by the extension
+            journals = self._check_journals_aggregate(graph_file)
+            full_journals = self._check_journals_aggregate(full_graph_file)
+            self.assertEqual(journals.droplevel('node_b_id').sort_index().to_dict(),
+                             full_journals.droplevel('node_b_id').sort_index().to_dict())
+            self.assertEqual(len(g.nodes), len(full_graph.nodes))
+
+            # new publication before the former clinical trial for atropine in journal b
+            mentions = g.get_drugs_mentions(['atropine', 'betamethasone'], verbose=False)
+            journal_b_dates = [link.date for link in mentions['atropine']
+                               if link.mention_type == MentionnedLink.MENTION_JOURNAL and link.node_b.name == 'journal b']
+            self.assertEqual(journal_b_dates, ['2017-01-01'])
+            # new drug rescanned against the former titles
+            self.assertEqual(len([link for link in mentions['betamethasone']
+                                  if link.mention_type == MentionnedLink.MENTION_PUBLICATION]), 3)
+
+            # nothing new to ingest
+            export_graph(tmp_dir, graph_file, incremental=True)
+            self.assertEqual(self._canonical(Graph.from_json(graph_file)), self._canonical(full_graph))
+        return full_graph
+
+
+class DatesTest(unittest.TestCase):
+    def test_normalize_dates_as_read_csv(self):
+        lines = ['date', '01/02/2020', '1 January 2020', '2020-01-01', '', '27 April 2020', '01/02/2020']
+        csv = io.StringIO('\n'.join(lines))
+        expected = pd.read_csv(csv, parse_dates=['date'])['date']
+        csv.seek(0)
+        res = normalize_dates(pd.read_csv(csv, dtype={'date': str})['date'])
+        pd.testing.assert_series_equal(res, expected)
+
+    def test_normalize_dates_unreadable(self):
+        col = pd.Series(['2020-01-01', 'not a date', None], index=[3, 5, 7], name='date')
+        pd.testing.assert_series_equal(normalize_dates(col), col)
+
+    def test_parse_epochs(self):
+        dates = ['2020-01-01T00:00:00.000Z', None, 'not a date', '2020-01-01T00:00:00.000Z', '2019-01-02']
+        expected = [pd.Timestamp('2020-01-01', tz='UTC').value, NO_DATE, NO_DATE,
+                    pd.Timestamp('2020-01-01', tz='UTC').value, pd.Timestamp('2019-01-02', tz='UTC').value]
+        self.assertEqual(parse_epochs(dates).tolist(), expected)
+        self.assertEqual(parse_epochs([]).tolist(), [])
+
+
+class DateRangeTest(unittest.TestCase):
+    def test_date_to_until_end_of_day(self):
+        day = pd.Timestamp('2019-12-31', tz='UTC').value
+        for date_to in ['2019-12-31', ' 2019-12-31', '12/31/2019', '31 December 2019']:
+            with self.subTest(date_to=date_to):
+                self.assertEqual(parse_date_range(None, date_to)[1], day + DAY - 1)
+        # time without colon: exact bound, not the next day
+        self.assertEqual(parse_date_range(None, '2019-12-31T10')[1], pd.Timestamp('2019-12-31T10', tz='UTC').value)
+        self.assertEqual(parse_date_range(None, '2019-12-31T10:00:00.000Z')[1], day + 10 * 3600 * 10 ** 9)
+        self.assertEqual(parse_date_range('2019-12-31', None)[0], day)
+        self.assertIsNone(parse_date_range(None, None))
+
+    def test_unreadable_bounds(self):
+        for date_from, date_to in [(None, 20191231), (20191231, None), (None, ['2019-12-31']), ('not a date', None)]:
+            with self.subTest(date_from=date_from, date_to=date_to), self.assertRaisesRegex(ValueError, 'date illisible'):
+                parse_date_range(date_from, date_to)
+
+
+class MentionFiltersTest(unittest.TestCase):
+    drug_names = ['ethanol', 'atropine', 'betamethasone', 'unknown']
+    journal_names = ['journal a', 'journal b', 'journal c']
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        rng = random.Random(0)
+        dates = [None, '2019-12-31', '2019-12-31T10:00:00.000Z', '2020-01-01', '2020-01-01T00:00:00.000Z', '2020-01-02',
+                 '2020-03-15', '2021-06-01']
+
+        def records(n_records):
+            return [{"title": ' '.join(rng.sample(cls.drug_names + ['word'] * 4, 3)), "date": rng.choice(dates),
+                     "journal": rng.choice(cls.journal_names + ['unknown journal'])} for _ in range(n_records)]
+
+        g = Graph()
+        drug_nodes = g._build_nodes_from_list([{"atccode": str(i), "name": name}
+                                               for i, name in enumerate(cls.drug_names[:3])], Drug)
+        g._build_nodes_from_list([{"name": name} for name in cls.journal_names], Journal)
+        g._build_mentions(drug_nodes, g._build_nodes_from_list(records(60), Publication),
+                          g._build_nodes_from_list(records(40), ClinicalTrial))
+        cls.graph = g
+        cls.columnar_graph = ColumnarGraph.from_graph(g)
+        return super().setUpClass()
+
+    @classmethod
+    def _brute_force(cls, date_from=None, date_to=None, mention_type=None, journal=None):
+        def epoch(date):
+            return pd.Timestamp(date, tz='UTC') if date else None
+
+        def journal_name(link):
+            if link.mention_type == MentionnedLink.MENTION_JOURNAL:
+                return link.node_b.name
+            for journal_link in cls.graph.links:
+                if journal_link.type == Link.PUBLISHED_LINK and journal_link.node_b.id == link.node_b.id:
+                    return journal_link.node_a.name
+
+        expected = {}
+        for drug in cls.graph.nodes:
+            if drug.type != Node.DRUG_NODE or drug.name not in cls.drug_names:
+                continue
+            links = [link for link in cls.graph.links
+                     if link.type == Link.MENTIONNED_LINK and link.node_a.id == drug.id]
+            if date_from or date_to:
+                links = [link for link in links if link.date is not None]
+            if date_from:
+                links = [link for link in links if epoch(link.date) >= epoch(date_from)]
+            if date_to:
+                end = epoch(date_to) + pd.Timedelta(days=1) - pd.Timedelta(1) if len(date_to) == 10 else epoch(date_to)
+                links = [link for link in links if epoch(link.date) <= end]
+            if mention_type:
+                links = [link for link in links if link.mention_type == mention_type]
+            if journal:
+                links = [link for link in links if journal_name(link) == journal]
+            expected[drug.name] = links
+        return expected
+
+    def test_same_as_brute_force(self):
+        filters_list = [{}, {'date_from': '2020-01-01'}, {'date_to': '2020-01-01'}, {'date_to': '2019-12-31'},
+                        {'date_to': '2019-12-31T00:00:00.000Z'}, {'date_to': '2019-12-31T10'},
+                        {'date_to': '2019-12-31T09'}, {'date_from': '2019-12-31', 'date_to': '2019-12-31'},
+                        {'date_from': '2020-01-01', 'date_to': '2020-03-15'}, {'date_from': '2022-01-01'},
+                        {'mention_type': MentionnedLink.MENTION_CLINICAL_TRIAL}, {'journal': 'journal b'},
+                        {'journal': 'unknown journal'},
+                        {'date_from': '2019-12-31', 'date_to': '2020-01-02', 'mention_type': MentionnedLink.MENTION_JOURNAL,
+                         'journal': 'journal a'}]
+        for filters in filters_list:
+            with self.subTest(**filters):
+                expected = self._brute_force(**filters)
+                self.assertEqual(self.graph.get_drugs_mentions(self.drug_names, verbose=False, **filters), expected)
+                self.assertEqual(self.columnar_graph.get_drugs_mentions(self.drug_names, verbose=False, **filters),
+                                 expected)
+        self.assertTrue(any(self._brute_force(date_from='2020-01-01', date_to='2020-03-15').values()))
+        # date without time: until the end of the day
+        self.assertIn('2019-12-31T10:00:00.000Z', [link.date for links in self.graph.look_for_drugs_mentions(
+            self.drug_names, date_to='2019-12-31').values() for link in links])
+        for filters in [{'date_from': 'not a date'}, {'date_to': 20191231}, {'date_from': ['2019-12-31']}]:
+            for graph in [self.graph, self.columnar_graph]:
+                with self.subTest(graph=type(graph).__name__, **filters), self.assertRaises(ValueError):
+                    graph.look_for_drugs_mentions(self.drug_names, **filters)
+
+    def test_date_index_updated_with_new_mentions(self):
+        g = Graph.from_dict(self.graph.to_dict())
+        g.look_for_drugs_mentions(['ethanol'], date_from='2020-01-01')
+        publication = g._build_nodes_from_list([{"title": "ethanol", "date": "2020-02-01", "journal": "journal a"}],
+                                               Publication)[0]
+        g._build_mentions(g.look_for_drug_by_names(['ethanol']), [publication], [])
+        after = g.look_for_drugs_mentions(['ethanol'], date_from='2020-01-01')['ethanol']
+        self.assertIn(publication, [link.node_b for link in after])
+        expected = [link for link in g.links if link.type == Link.MENTIONNED_LINK and link.node_a.name == 'ethanol']
+        self.assertEqual(after, [link for link in expected
+                                 if link.date and pd.Timestamp(link.date, tz='UTC') >= pd.Timestamp('2020-01-01', tz='UTC')])
+
+
+class OutputTest(unittest.TestCase):
+    drug_names = MentionFiltersTest.drug_names
+
+    def setUp(self) -> None:
+        MentionFiltersTest.setUpClass()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.graph_file = os.path.join(self.tmp_dir.name, 'graph.json')
+        MentionFiltersTest.graph.to_json(self.graph_file)
+        self.snapshot_file = os.path.join(self.tmp_dir.name, 'graph.bin')
+        MentionFiltersTest.columnar_graph.to_snapshot(self.snapshot_file)
+        with mock.patch('clients.graph.pprint') as mock_pprint:
+            Graph.from_json(self.graph_file).get_drugs_mentions(self.drug_names, verbose=True, mention_type=1)
+        self.expected = [{'drug': drug_name, **mention} for drug_name, mentions in mock_pprint.call_args[0][0].items()
+                         for mention in mentions]
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_mentions_jsonl_and_csv(self):
+        self.assertTrue(self.expected)
+        for kwargs in [{'json_graph_file': self.graph_file}, {'json_graph_file': None, 'snapshot_file': self.snapshot_file}]:
+            for output_file in ['mentions.jsonl', 'mentions.jsonl.gz']:
+                output_file = os.path.join(self.tmp_dir.name, output_file)
+                print_drug_mention(drug_names=self.drug_names, mention_type='publication', output_format='jsonl',
+                                   output_file=output_file, **kwargs)
+                with open_file(output_file) as f:
+                    self.assertEqual([json.loads(line) for line in f], self.expected)
+
+            with mock.patch('sys.stdout', new_callable=io.StringIO) as stdout:
+                print_drug_mention(drug_names=self.drug_names, mention_type='publication', output_format='csv', **kwargs)
+            records = pd.read_csv(io.StringIO(stdout.getvalue()), dtype=str, keep_default_na=False).to_dict('records')
+            self.assertEqual(records, [{field: '' if record.get(field) is None else str(record[field])
+                                        for field in MENTION_FIELDS} for record in self.expected])
+
+    def test_mentions_streamed(self):
+        mentions = Graph.from_json(self.graph_file).iter_drugs_mentions(self.drug_names, mention_type=1)
+        self.assertNotIsInstance(mentions, (list, dict))
+        self.assertEqual(list(mention_records(mentions)), self.expected)
+
+    def test_pretty_output_file(self):
+        output_file = os.path.join(self.tmp_dir.name, 'mentions.txt')
+        print_drug_mention(self.graph_file, self.drug_names, output_file=output_file)
+        with mock.patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            print_drug_mention(self.graph_file, self.drug_names)
+        with open(output_file) as f:
+            self.assertEqual(f.read(), stdout.getvalue())
+
+    def test_journals_csv(self):
+        output_file = os.path.join(self.tmp_dir.name, 'journals.csv')
+        self.assertIsNone(export_journals_with_distinct_mention(self.graph_file, output_format='csv',
+                                                                output_file=output_file))
+        expected = export_journals_with_distinct_mention(self.graph_file)
+        res = pd.read_csv(output_file, index_col=['node_b_name', 'node_b_id'])['node_a_name']
+        pd.testing.assert_series_equal(res, expected)
+
+
+class ColumnarGraphTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        GraphTest.setUpClass()
+        cls.graph = GraphTest.graph
+        cls.columnar_graph = ColumnarGraph.from_graph(cls.graph)
+        return super().setUpClass()
+
+    def test_nodes_views(self):
+        for position, node in enumerate(self.graph.nodes):
+            self.assertEqual(self.columnar_graph.node(position), node)
+            self.assertEqual(self.columnar_graph.position_of(node.id), position)
+        self.assertIsNone(self.columnar_graph.position_of(self.graph.id_state))
+
+    def test_drugs_mentions(self):
+        drug_names = ['diphenhydramine', 'tetracycline', 'unknown']
+        expected = self.graph.get_drugs_mentions(drug_names, verbose=False)
+        res = self.columnar_graph.get_drugs_mentions(drug_names, verbose=False)
+        self.assertEqual(list(res), list(expected))
+        for drug_name, links in expected.items():
+            self.assertEqual([(link.id, link.date, link.mention_type, dataclasses.asdict(link.node_b)) for link in res[drug_name]],
+                             [(link.id, link.date, link.mention_type, dataclasses.asdict(link.node_b)) for link in links])
+
+    def test_journals_distinct_mentions(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            graph_file = os.path.join(tmp_dir, 'graph.json')
+            self.graph.to_json(graph_file)
+            expected = export_journals_with_distinct_mention(graph_file)
+        pd.testing.assert_series_equal(self.columnar_graph.get_journals_distinct_mentions(), expected)
+
+    def test_epoch_dates(self):
+        adjacency = self.columnar_graph.adjacency[Link.MENTIONNED_LINK]
+        self.assertEqual(len(adjacency.indices), len(self.graph.look_for_links_by_type(Link.MENTIONNED_LINK)))
+        self.assertTrue((adjacency.dates == pd.Timestamp("2020-01-01", tz='UTC').value).any())
+
+    def test_snapshot(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            snapshot_file = os.path.join(tmp_dir, 'graph.bin')
+            self.columnar_graph.to_snapshot(snapshot_file)
+            snapshot = ColumnarGraph.from_snapshot(snapshot_file)
+            for name, array in self.columnar_graph._arrays().items():
+                np.testing.assert_array_equal(snapshot._arrays()[name], array)
+            self.assertEqual(snapshot.id_state, self.graph.id_state)
+            drug_names = ['diphenhydramine', 'tetracycline']
+            self.assertEqual(snapshot.get_drugs_mentions(drug_names, verbose=False),
+                             self.columnar_graph.get_drugs_mentions(drug_names, verbose=False))
+            pd.testing.assert_series_equal(snapshot.get_journals_distinct_mentions(),
+                                           self.columnar_graph.get_journals_distinct_mentions())
+            pd.testing.assert_series_equal(export_journals_with_distinct_mention(None, snapshot_file=snapshot_file),
+                                           self.columnar_graph.get_journals_distinct_mentions())
+            del snapshot
+
+            graph_file = os.path.join(tmp_dir, 'graph.json')
+            self.graph.to_json(graph_file)
+            with self.assertRaises(ValueError):
+                ColumnarGraph.from_snapshot(graph_file)
+
+
+class ServerTest(unittest.TestCase):
+    drug_names = ['diphenhydramine', 'tetracycline', 'unknown']
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.graph_file = os.path.join(self.tmp_dir.name, 'graph.json')
+        GraphTest.setUpClass()
+        GraphTest.graph.to_json(self.graph_file)
+        self.service = GraphService(self.graph_file)
+        self.servers = []
+
+    def tearDown(self) -> None:
+        for server, thread in self.servers:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+        self.tmp_dir.cleanup()
+
+    def _serve(self, **kwargs) -> str:
+        server = make_server(self.service, port=0, **kwargs)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        self.servers.append((server, thread))
+        return server_address(server)
+
+    def _expected_mentions(self, graph_file):
+        with mock.patch('clients.graph.pprint') as mock_pprint:
+            Graph.from_json(graph_file).get_drugs_mentions(self.drug_names, verbose=True)
+        return mock_pprint.call_args[0][0]
+
+    def test_same_as_local_queries(self):
+        for address in [self._serve(), self._serve(unix_socket=os.path.join(self.tmp_dir.name, 'graph.sock'))]:
+            client = GraphClient(address)
+            self.assertEqual(client.mentions(self.drug_names), self._expected_mentions(self.graph_file))
+            pd.testing.assert_series_equal(client.journals(), export_journals_with_distinct_mention(self.graph_file))
+            self.assertEqual(client.health()['reloads'], 1)
+            with self.assertRaises(ConnectionError):
+                client.mentions([])
+            with mock.patch('clients.graph.pprint') as mock_pprint:
+                Graph.from_json(self.graph_file).get_drugs_mentions(
+                    self.drug_names, verbose=True, date_from='2020-01-01', mention_type=MentionnedLink.MENTION_CLINICAL_TRIAL)
+            self.assertEqual(client.mentions(self.drug_names, date_from='2020-01-01', mention_type='clinical_trial'),
+                             mock_pprint.call_args[0][0])
+            with self.assertRaises(ConnectionError):
+                client.mentions(self.drug_names, mention_type='unknown')
+            for drugs in ['atropine', ['atropine', 1], {'atropine': 1}]:
+                with self.subTest(drugs=drugs), self.assertRaisesRegex(ConnectionError, 'erreur 400'):
+                    client._request('POST', '/mentions', {'drugs': drugs})
+            for filters in [{'mention_type': ['journal']}, {'date_to': 20191231}, {'date_from': {}}, {'journal': 1}]:
+                with self.subTest(**filters), self.assertRaisesRegex(ConnectionError, 'erreur 400'):
+                    client._request('POST', '/mentions', {'drugs': self.drug_names, **filters})
+            # server still answering
+            self.assertEqual(client.mentions(self.drug_names), self._expected_mentions(self.graph_file))
+            records = []
+            for kwargs in [{'json_graph_file': None, 'server': address}, {'json_graph_file': self.graph_file}]:
+                output_file = os.path.join(self.tmp_dir.name, 'mentions.jsonl')
+                print_drug_mention(drug_names=self.drug_names, output_format='jsonl', output_file=output_file, **kwargs)
+                with open(output_file) as f:
+                    records.append(f.read())
+            self.assertEqual(records[0], records[1])
+            query = '&'.join(f"drug={name}" for name in self.drug_names)
+            self.assertEqual(client._request('GET', f"/mentions?{query}"), self._expected_mentions(self.graph_file))
+            client.close()
+
+    def test_hot_reload_under_load(self):
+        address = self._serve()
+        new_graph = Graph.from_json(self.graph_file)
+        drug = new_graph.look_for_drug_by_names(['tetracycline'])[0]
+        publication = Publication(id=new_graph.get_id_and_increment(), title="tetracycline", date="2021-01-01")
+        new_graph.nodes.append(publication)
+        new_graph._build_link(drug, publication, publication.date, MentionnedLink)
+        new_graph_file = os.path.join(self.tmp_dir.name, 'new_graph.json')
+        new_graph.to_json(new_graph_file)
+        expected = [self._expected_mentions(self.graph_file), self._expected_mentions(new_graph_file)]
+
+        errors, answers = [], []
+
+        def query():
+            client = GraphClient(address)
+            try:
+                for _ in range(20):
+                    answers.append(client.mentions(self.drug_names))
+            except Exception as e:  # pragma: no cover
+                errors.append(e)
+            finally:
+                client.close()
+
+        threads = [threading.Thread(target=query) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        # a partially written file is ignored, the previous graph is kept
+        with open(self.graph_file, 'w') as f:
+            f.write('{"version": 2, "nodes": [')
+        self.assertFalse(self.service.reload_if_changed())
+        os.replace(new_graph_file, self.graph_file)
+        self.assertTrue(self.service.reload_if_changed())
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(answers), 80)
+        self.assertTrue(all(answer in expected for answer in answers))
+        client = GraphClient(address)
+        self.assertEqual(client.mentions(self.drug_names), expected[1])
+        client.close()
+        self.assertEqual(self.service.reloads, 2)
+        self.assertFalse(self.service.reload_if_changed())
+
+
+class DataTest(unittest.TestCase):
+    pubmed_csv = (
+        'id,title,date,journal\n'
+        '1,Ethanol and Atropine,01/01/2019,Journal A\n'
+        '2,  ,02/01/2019,Journal B\n'
+        '3,ETHANOL AND ATROPINE ,03/01/2019,Journal C\n'
+        '4,Atropine,1 January 2020,\n'
+        '5,,04/01/2019,Journal D\n'
+    )
+    pubmed_json = (
+        '[{"id": 6, "title": "Atropine", "date": "01/01/2021", "journal": "Journal E"},\n'
+        ' {"id": 7, "title": "Betamethasone", "date": "01/01/2021", "journal": "Journal A"},\n]'
+    )
+    clinical_trials_csv = (
+        'id,scientific_title,date,journal\n'
+        'NCT1,Ethanol \\xc3\\xb1,1 January 2020,Journal B\n'
+        'NCT2,,1 January 2020,Journal F\n'
+        'NCT3,Ethanol \\xc3\\xb1,2 January 2020,Journal C\n'
+        'NCT4,Atropine,3 January 2020,Journal A\n'
+    )
+    drugs_csv = 'atccode,drug\nA,ETHANOL\nB,Atropine\nC,ethanol\n'
+
+    def test_chunks_same_as_in_memory(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            raw_files = {}
+            for name, content in [('pubmed.csv', self.pubmed_csv), ('pubmed.json', self.pubmed_json),
+                                  ('clinical_trials.csv', self.clinical_trials_csv), ('drugs.csv', self.drugs_csv)]:
+                raw_files[name] = os.path.join(tmp_dir, name)
+                with open(raw_files[name], 'w') as f:
+                    f.write(content)
+
+            outputs = {}
+            for chunk_size in [None, 1, 2, 100]:
+                output_directory = os.path.join(tmp_dir, str(chunk_size))
+                os.mkdir(output_directory)
+                read_and_format_data([raw_files['pubmed.csv'], raw_files['pubmed.json']], raw_files['clinical_trials.csv'],
+                                     raw_files['drugs.csv'], output_directory, chunk_size=chunk_size)
+                outputs[chunk_size] = {}
+                for name in ['pubmeds', 'clinical_trials', 'journals', 'drugs']:
+                    with open(os.path.join(output_directory, f'{name}.json'), 'rb') as f:
+                        outputs[chunk_size][name] = f.read()
+
+        for chunk_size in [1, 2, 100]:
+            self.assertEqual(outputs[chunk_size], outputs[None])
+        pubmeds = json.loads(outputs[None]['pubmeds'])
+        self.assertEqual([pubmed['base_id'] for pubmed in pubmeds], ['1', '2', '4', '7'])
+
+    def test_json_chunks_without_json_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pubmed_file = os.path.join(tmp_dir, 'pubmed.json')
+            with open(pubmed_file, 'w') as f:
+                f.write(self.pubmed_json)
+            with mock.patch('pandas.read_json') as read_json:
+                chunks = list(clients.data._read_pubmed_chunks(pubmed_file, chunk_size=1))
+            read_json.assert_not_called()
+            self.assertEqual([chunk['id'].tolist() for chunk in chunks], [['6'], ['7']])
+            self.assertEqual(str(chunks[0]['date'].dtype), 'datetime64[ns]')
+
+            # no readable date at all
+            with open(pubmed_file, 'w') as f:
+                json.dump([{"id": 1, "title": "Atropine", "date": None, "journal": None}], f)
+            chunk, = clients.data._read_pubmed_chunks(pubmed_file)
+            self.assertTrue(chunk['date'].isna().all())
+            self.assertEqual(chunk[['id', 'title']].values.tolist(), [['1', 'Atropine']])
+
+    def test_parallel_pubmed_shards(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            shards_directory = os.path.join(tmp_dir, 'shards')
+            os.mkdir(shards_directory)
+            shards = []
+            for i in range(5):
+                shards.append(os.path.join(shards_directory, f'pubmed_{i:02d}.csv'))
+                with open(shards[-1], 'w') as f:
+                    f.write('id,title,date,journal\n')
+                    f.writelines(f'{i}{j},Title {(i + j) % 7},0{j + 1}/01/2020,Journal {j}\n' for j in range(4))
+            with open(os.path.join(shards_directory, 'README.txt'), 'w') as f:
+                f.write('not a shard')
+
+            self.assertEqual(expand_pubmed_files([shards_directory]), shards)
+            self.assertEqual(expand_pubmed_files([os.path.join(shards_directory, 'pubmed_0[0-2].csv'), shards[4]]),
+                             shards[:3] + shards[4:])
+            with self.assertRaises(ValueError):
+                expand_pubmed_files([os.path.join(tmp_dir, '*.json')])
+
+            expected = read_and_format_pubmed(shards)
+            pd.testing.assert_frame_equal(read_and_format_pubmed([shards_directory], workers=3), expected)
+            pd.testing.assert_frame_equal(read_and_format_pubmed([os.path.join(shards_directory, '*.csv')], workers=2), expected)
+            self.assertEqual(expected.title.tolist(), [f'title {i}' for i in [0, 1, 2, 3, 4, 5, 6]])
+
+            outputs = []
+            for workers in [1, 3]:
+                output_directory = os.path.join(tmp_dir, str(workers))
+                os.mkdir(output_directory)
+                read_and_format_data([shards_directory], self._write(tmp_dir, 'clinical_trials.csv', self.clinical_trials_csv),
+                                     self._write(tmp_dir, 'drugs.csv', self.drugs_csv), output_directory,
+                                     chunk_size=2, workers=workers)
+                with open(os.path.join(output_directory, 'pubmeds.json')) as f:
+                    outputs.append(f.read())
+                with open(os.path.join(output_directory, 'journals.json')) as f:
+                    journal_ids = {journal['name']: journal['journal_id'] for journal in json.load(f)}
+            self.assertEqual(outputs[1], outputs[0])
+            expected = encode_journal_ids(expected, journal_ids)
+            self.assertEqual(json.loads(outputs[0]), json.loads(expected.to_json(orient='records', date_format='iso')))
+
+    @unittest.skipIf(pyarrow is None, "pyarrow n'est pas installé")
+    def test_parquet_same_as_json(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # the graph needs the publications titles
+            pubmed_csv = ''.join(line for line in self.pubmed_csv.splitlines(True) if not line.startswith(('2,', '5,')))
+            raw_files = [self._write(tmp_dir, 'pubmed.csv', pubmed_csv), self._write(tmp_dir, 'pubmed.json', self.pubmed_json),
+                         self._write(tmp_dir, 'clinical_trials.csv', self.clinical_trials_csv),
+                         self._write(tmp_dir, 'drugs.csv', self.drugs_csv)]
+            graphs = {}
+            for output_format, chunk_size in [('json', None), ('parquet', None), ('parquet', 2)]:
+                output_directory = os.path.join(tmp_dir, f'{output_format}_{chunk_size}')
+                os.mkdir(output_directory)
+                read_and_format_data(raw_files[:2], raw_files[2], raw_files[3], output_directory,
+                                     chunk_size=chunk_size, output_format=output_format)
+                if output_format == 'parquet':
+                    for name in ['pubmeds', 'clinical_trials', 'journals', 'drugs']:
+                        with open(os.path.join(tmp_dir, f'json_None/{name}.json')) as f:
+                            self.assertEqual(read_parquet_records(os.path.join(output_directory, f'{name}.parquet')),
+                                             json.load(f))
+                graph_file = os.path.join(output_directory, 'graph.json')
+                export_graph(output_directory, graph_file, input_format=output_format)
+                with open(graph_file) as f:
+                    graphs[(output_format, chunk_size)] = json.load(f)
+
+        self.assertEqual(graphs[('parquet', None)], graphs[('json', None)])
+        self.assertEqual(graphs[('parquet', 2)], graphs[('json', None)])
+
+    @staticmethod
+    def _write(directory, name, content):
+        filename = os.path.join(directory, name)
+        with open(filename, 'w') as f:
+            f.write(content)
+        return filename
+
+
+class TestFragmentCache(unittest.TestCase):
+    def test_data_reuses_unchanged_files(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            raw_files = [DataTest._write(tmp_dir, 'pubmed.csv', DataTest.pubmed_csv),
+                         DataTest._write(tmp_dir, 'pubmed.json', DataTest.pubmed_json),
+                         DataTest._write(tmp_dir, 'clinical_trials.csv', DataTest.clinical_trials_csv),
+                         DataTest._write(tmp_dir, 'drugs.csv', DataTest.drugs_csv)]
+            outputs = {}
+            for run, chunk_size in [('no_cache', None), ('cold', None), ('warm', None), ('chunks', 2), ('chunks_warm', 2)]:
+                output_directory = os.path.join(tmp_dir, run)
+                os.mkdir(output_directory)
+                with mock.patch('clients.data._read_pubmed_chunks', side_effect=clients.data._read_pubmed_chunks) as read:
+                    read_and_format_data(raw_files[:2], raw_files[2], raw_files[3], output_directory, chunk_size=chunk_size,
+                                         cache_directory=os.path.join(tmp_dir, 'cache'), no_cache=run == 'no_cache')
+                outputs[run] = {}
+                for name in ['pubmeds', 'clinical_trials', 'journals', 'drugs']:
+                    with open(os.path.join(output_directory, f'{name}.json')) as f:
+                        outputs[run][name] = f.read()
+                self.assertEqual(read.call_count, 0 if run.endswith('warm') else 2)
+            self.assertEqual(os.path.exists(os.path.join(tmp_dir, 'no_cache', '.cache')), False)
+            for run in ['cold', 'warm', 'chunks', 'chunks_warm']:
+                self.assertEqual(outputs[run], outputs['no_cache'])
+
+            # only the modified file is read again
+            DataTest._write(tmp_dir, 'pubmed.json', DataTest.pubmed_json.replace('Betamethasone', 'Ethanol'))
+            with mock.patch('clients.data._read_pubmed_chunks', side_effect=clients.data._read_pubmed_chunks) as read:
+                pubmeds = read_and_format_pubmed(raw_files[:2], cache=FragmentCache(os.path.join(tmp_dir, 'cache')))
+            read.assert_called_once_with(raw_files[1], None)
+            self.assertIn('ethanol', pubmeds.title.tolist())
+
+    def test_evict_least_recently_used(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = FragmentCache(os.path.join(tmp_dir, 'cache'))
+            filenames = [DataTest._write(tmp_dir, f'{i}.csv', f'a\n{i}\n') for i in range(3)]
+            for mtime, filename in enumerate(filenames):
+                list(cache.fragments(filename, {}, lambda: [pd.DataFrame({'a': range(100)})]))
+                os.utime(os.path.join(cache.directory, cache.key(filename, {})), (mtime, mtime))
+            size = cache.size()
+            # reading a fragment makes it the most recently used
+            list(cache.fragments(filenames[0], {}, lambda: self.fail("fragment absent du cache")))
+            self.assertEqual(cache.evict(size * 2 // 3), [cache.key(filenames[1], {})])
+            self.assertEqual(cache.evict(0), [cache.key(filenames[2], {}), cache.key(filenames[0], {})])
+            self.assertEqual(cache.size(), 0)
+
+
+class TestNearDuplicates(unittest.TestCase):
+    titles = [
+        'Use of diphenhydramine as an adjunctive sedative for colonoscopy',
+        'Use of Diphenhydramine, as an adjunctive sedative for colonoscopy.',
+        'Tetracycline resistance patterns of Lactobacillus buchneri group strains',
+        'use of diphenhydramine as adjunctive sedative for colonoscopy',
+        'Preemptive infiltration with betamethasone and ropivacaine for postoperative pain',
+        'Tetracycline resistance patterns of lactobacillus buchneri group strains!',
+    ]
+
+    def test_index(self):
+        index = NearDuplicateIndex(threshold=0.8)
+        matches = [index.add(title, position) for position, title in enumerate(self.titles)]
+        self.assertEqual([match and match[0] for match in matches], [None, 0, None, 0, None, 2])
+        self.assertEqual(matches[1][1], 1.0)
+        self.assertEqual(index.labels, [0, 2, 4])
+        with self.assertRaises(ValueError):
+            NearDuplicateIndex(threshold=0)
+
+    def test_same_as_pairwise_comparison(self):
+        rng = np.random.RandomState(0)
+        words = [''.join(rng.choice(list('abcdefghij'), size=6)) for _ in range(200)]
+        titles = []
+        for _ in range(300):
+            title = ' '.join(rng.choice(words, size=8))
+            titles.append(title)
+            if rng.rand() < 0.3:
+                titles.append(title.upper() + ' .')
+        index = NearDuplicateIndex(threshold=0.7)
+        signatures = [index.signature(title) for title in titles]
+        kept = []
+        for position, title in enumerate(titles):
+            # brute force: every kept signature is compared
+            similarities = [np.mean(signatures[k] == signatures[position]) for k in kept]
+            expected = max(similarities, default=0) >= 0.7
+            self.assertEqual(index.add(title, position) is not None, expected)
+            if not expected:
+                kept.append(position)
+
+    def test_data_report(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pubmed_csv = 'id,title,date,journal\n' + ''.join(
+                f'{i},"{title}",01/01/2020,Journal {i}\n' for i, title in enumerate(self.titles))
+            raw_files = [DataTest._write(tmp_dir, 'pubmed.csv', pubmed_csv),
+                         DataTest._write(tmp_dir, 'clinical_trials.csv', DataTest.clinical_trials_csv),
+                         DataTest._write(tmp_dir, 'drugs.csv', DataTest.drugs_csv)]
+            outputs = []
+            for chunk_size in [None, 2]:
+                output_directory = os.path.join(tmp_dir, str(chunk_size))
+                os.mkdir(output_directory)
+                read_and_format_data(raw_files[:1], raw_files[1], raw_files[2], output_directory,
+                                     chunk_size=chunk_size, near_duplicates_threshold=0.8, no_cache=True)
+                outputs.append({})
+                for name in ['pubmeds', 'clinical_trials', 'journals', 'near_duplicates']:
+                    with open(os.path.join(output_directory, f'{name}.json')) as f:
+                        outputs[-1][name] = json.load(f)
+        self.assertEqual(outputs[1], outputs[0])
+        self.assertEqual([pubmed['base_id'] for pubmed in outputs[0]['pubmeds']], ['0', '2', '4'])
+        self.assertEqual([(duplicate['source'], duplicate['base_id'], duplicate['duplicate_of'])
+                          for duplicate in outputs[0]['near_duplicates']],
+                         [('pubmed', '1', '0'), ('pubmed', '3', '0'), ('pubmed', '5', '2')])
+        self.assertNotIn('journal 1', [journal['name'] for journal in outputs[0]['journals']])
+
+
+class TestTextCleaner(unittest.TestCase):
+    values = pd.Series([" Ethanol ", "ATROPINE \\xc3\\xb1", "  ", "", np.NaN, None, "\\x1", "Élan\t", "a\\xzz b"],
+                       index=range(10, 19), name='title', dtype=object)
+
+    @staticmethod
+    def _historical_clean(col):
+        return col.str.lower().str.strip().str.replace(r'\\x\w{2}', '', regex=True).replace(r'^\s*$', np.NaN, regex=True)
+
+    def test_same_as_historical_chain(self):
+        expected = self._historical_clean(self.values)
+        pd.testing.assert_series_equal(TextCleaner().clean(self.values), expected)
+        df = pd.DataFrame({'title': self.values, 'journal': self.values.iloc[::-1].values})
+        expected_df = df.apply(self._historical_clean, axis=1)
+        pd.testing.assert_frame_equal(TextCleaner().clean_columns(df.copy(), ['title', 'journal']), expected_df)
+
+    @unittest.skipIf(pyarrow is None, "pyarrow n'est pas installé")
+    def test_arrow_same_as_historical_chain(self):
+        pd.testing.assert_series_equal(TextCleaner(use_arrow=True).clean(self.values).isna(),
+                                       self._historical_clean(self.values).isna())
+        self.assertEqual(TextCleaner(use_arrow=True).clean(self.values).dropna().tolist(),
+                         self._historical_clean(self.values).dropna().tolist())
+
+    def test_normalizers(self):
+        for use_arrow in [False, True]:
+            cleaner = TextCleaner(['strip', 'blank_to_nan'], use_arrow=use_arrow)
+            self.assertEqual(cleaner.clean(self.values).fillna('NaN').tolist(),
+                             ["Ethanol", "ATROPINE \\xc3\\xb1", "NaN", "NaN", "NaN", "NaN", "\\x1", "Élan", "a\\xzz b"])
+        self.assertIs(TextCleaner([]).clean(self.values), self.values)
+        with self.assertRaises(ValueError):
+            TextCleaner(['upper'])
+
+    def test_values_without_str(self):
+        cleaner = TextCleaner()
+        mixed = cleaner.clean(pd.Series([" Ethanol ", 3, None, np.NaN, 4.5], dtype=object))
+        self.assertEqual(mixed.fillna('NaN').tolist(), ["ethanol", "NaN", "NaN", "NaN", "NaN"])
+        self.assertEqual(mixed.dtype, object)
+        for col in [pd.Series([1, 2]), pd.Series([np.NaN, np.NaN]), pd.Series([], dtype=object)]:
+            with self.subTest(dtype=col.dtype):
+                res = cleaner.clean(col)
+                self.assertEqual(res.dtype, object)
+                self.assertTrue(res.isna().all())
+
+
+class TestJsonRecords(unittest.TestCase):
+    records = [{"id": 1, "title": "ethanol, } and ], atropine \\\" \u00e9", "date": "01/01/2020"},
+               {"id": 2, "tags": ["a", "b"], "nested": {"x": 1.5, "y": None}}, 3, "end"]
+
+    def _read(self, content, **kwargs):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, 'records.json')
+            with open(filename, 'w') as f:
+                f.write(content)
+            return list(iter_json_records(filename, **kwargs))
+
+    def test_same_as_json_loads(self):
+        content = json.dumps(self.records, indent=2)
+        for block_size in [1, 3, 7, 1 << 20]:
+            self.assertEqual(self._read(content, block_size=block_size), [self.records])
+        self.assertEqual(self._read(content, batch_size=3, block_size=5), [self.records[:3], self.records[3:]])
+        self.assertEqual(self._read(" [ ] "), [])
+
+    def test_trailing_commas(self):
+        content = '[{"id": 1, "title": "a, }",\n }, {"id": 2, "tags": ["x",],},\n]'
+        for block_size in [1, 4, 1 << 20]:
+            self.assertEqual(self._read(content, block_size=block_size),
+                             [[{"id": 1, "title": "a, }"}, {"id": 2, "tags": ["x"]}]])
+
+    def test_invalid(self):
+        for content in ['{"id": 1}', '[{"id": 1} {"id": 2}]', '[{"id": 1}', '[{"id": }]']:
+            with self.assertRaises(ValueError):
+                self._read(content, block_size=4)
+
+
+class TestCompression(unittest.TestCase):
+    compressions = ['gzip'] + (['zstd'] if zstandard is not None else [])
+
+    def test_open_file(self):
+        content = '[{"title": "ethanol \u00e9"}]\n' * 1000
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for compression, extension in zip(self.compressions, ['.gz', '.zst']):
+                by_extension = os.path.join(tmp_dir, f'records.json{extension}')
+                forced = os.path.join(tmp_dir, f'records_{compression}.json')
+                with open_file(by_extension, 'w') as f:
+                    f.write(content)
+                with open_file(forced, 'w', compression) as f:
+                    f.write(content)
+                for filename in [by_extension, forced]:
+                    self.assertEqual(detect_compression(filename), compression)
+                    self.assertLess(os.path.getsize(filename), len(content))
+                    with open_file(filename) as f:
+                        self.assertEqual(f.read(), content)
+            plain = os.path.join(tmp_dir, 'records.json')
+            with open_file(plain, 'w') as f:
+                f.write(content)
+            self.assertIsNone(detect_compression(plain))
+            with self.assertRaises(ValueError):
+                open_file(plain, 'w', 'bz2')
+
+    def test_data_and_graph_compressed(self):
+        # the graph needs the publications titles
+        pubmed_csv = ''.join(line for line in DataTest.pubmed_csv.splitlines(True) if not line.startswith(('2,', '5,')))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            raw_files = {}
+            for name, content in [('pubmed.csv', pubmed_csv), ('pubmed.json', DataTest.pubmed_json),
+                                  ('clinical_trials.csv', DataTest.clinical_trials_csv), ('drugs.csv', DataTest.drugs_csv)]:
+                raw_files[name] = os.path.join(tmp_dir, name)
+                with open(raw_files[name], 'w') as f:
+                    f.write(content)
+                with open_file(raw_files[name] + '.gz', 'w') as f:
+                    f.write(content)
+
+            expected_directory = os.path.join(tmp_dir, 'expected')
+            os.mkdir(expected_directory)
+            read_and_format_data([raw_files['pubmed.csv'], raw_files['pubmed.json']], raw_files['clinical_trials.csv'],
+                                 raw_files['drugs.csv'], expected_directory, no_cache=True)
+            export_graph(expected_directory, os.path.join(expected_directory, 'graph.json'))
+
+            for compression in self.compressions:
+                for chunk_size in [None, 2]:
+                    output_directory = os.path.join(tmp_dir, f'{compression}_{chunk_size}')
+                    os.mkdir(output_directory)
+                    read_and_format_data([raw_files['pubmed.csv'] + '.gz', raw_files['pubmed.json'] + '.gz'],
+                                         raw_files['clinical_trials.csv'] + '.gz', raw_files['drugs.csv'] + '.gz',
+                                         output_directory, chunk_size=chunk_size, no_cache=True, compression=compression)
+                    graph_file = os.path.join(output_directory, 'graph.json')
+                    export_graph(output_directory, graph_file, compression=compression)
+                    for name in ['pubmeds', 'clinical_trials', 'journals', 'drugs', 'graph']:
+                        filename = os.path.join(output_directory, f'{name}.json')
+                        if name != 'graph':
+                            filename += '.gz' if compression == 'gzip' else '.zst'
+                        self.assertEqual(detect_compression(filename), compression)
+                        with open_file(filename) as f, open(os.path.join(expected_directory, f'{name}.json')) as expected:
+                            self.assertEqual(f.read(), expected.read())
+
+
+class TestMentionMatcher(unittest.TestCase):
+
+    def test_search_same_as_substring(self):
+        patterns = ["ethanol", "methanol", "anol", "ethanol", "atropine", "e"]
+        contents = ["methanol and atropine", "ethanol", "", "no drug here", "atropinatropine"]
+        for use_backend in [True, False]:
+            matcher = MentionMatcher(patterns, use_backend=use_backend)
+            for content in contents:
+                expected = [i for i, pattern in enumerate(patterns) if pattern in content]
+                self.assertEqual(matcher.search(content), expected)
+
+    def test_search_empty_patterns(self):
+        self.assertEqual(MentionMatcher([]).search("ethanol"), [])
+        self.assertEqual(MentionMatcher(["", "x"]).search("ethanol"), [0])
+
+    def test_graph_mentions_same_as_nested_loop(self):
+        drug_nodes = [Drug(id=0, name="ethanol", atccode="A"), Drug(id=1, name="methanol", atccode="B"),
+                      Drug(id=2, name="atropine", atccode="C")]
+        publication_nodes = [Publication(id=3, title="methanol poisoning", date="2020-01-01"),
+                             Publication(id=4, title="atropine and ethanol", date="2020-01-02")]
+        clinical_trial_nodes = [ClinicalTrial(id=5, title="nothing", date="2020-01-03"),
+                                ClinicalTrial(id=6, title="ethanol", date="2020-01-04")]
+        g = Graph()
+        g._build_mentions(drug_nodes, publication_nodes, clinical_trial_nodes)
+
+        expected = [(d.id, n.id) for d in drug_nodes for n in publication_nodes + clinical_trial_nodes
+                    if d.is_name_mentionned(n.title)]
+        self.assertEqual([(link.node_a.id, link.node_b.id) for link in g.links], expected)
+
+    def test_parallel_mentions_same_as_serial(self):
+        patterns = ["ethanol", "methanol", "anol", "atropine"]
+        contents = ["methanol and atropine", "ethanol", "", "no drug here", "atropinatropine", "anol"] * 3
+        expected = [(p, c) for c, content in enumerate(contents) for p, pattern in enumerate(patterns) if pattern in content]
+        self.assertEqual(find_mentions(patterns, contents), sorted(expected))
+        self.assertEqual(find_mentions(patterns, contents, workers=2, chunk_size=4), sorted(expected))
+
+        drug_nodes = [Drug(id=i, name=name, atccode=str(i)) for i, name in enumerate(patterns)]
+        publication_nodes = [Publication(id=10 + i, title=title, date="2020-01-01") for i, title in enumerate(contents)]
+        serial, parallel = Graph(), Graph()
+        serial._build_mentions(drug_nodes, publication_nodes, [])
+        parallel._build_mentions(drug_nodes, publication_nodes, [], workers=2)
+        self.assertEqual([link.id for link in parallel.links], [link.id for link in serial.links])